@@ -4,16 +4,17 @@
 
 from __future__ import print_function
 
-import argparse
+import io
 import os
-import pathlib
 import platform
 import shlex  # See shlex.join polyfill further down in case of Python 2
-import socket
-import subprocess
 import sys
+import threading
 
-from collections import OrderedDict
+from collections import (
+    OrderedDict,
+    namedtuple,
+)
 from blnk.blnk_spec import (
     REQUIREMENTS,
     DEFAULTS,
@@ -28,47 +29,17 @@ from hierosoft.logging2 import getLogger
 
 logger = getLogger(__name__)
 # logger.setLevel(logging.INFO)
-# ^ Doesn't to anything! Instead do:
-logging.basicConfig(level=logging.DEBUG)  # format='%(message)s'
-
-if sys.version_info.major >= 3:
-    # shlex_quote: See further down
-    import datetime
-    from datetime import timezone
-    try:
-        timezone_utc = timezone.utc
-        # ^ "ModuleNotFoundError: No module named 'datetime.timezone';
-        #   'datetime' is not a package"
-    except ModuleNotFoundError:
-        logger.error("sys.path={}".format(sys.path))
-        logger.error(
-            "sys.version_info={}".format(sys.version_info))
-        raise
-    try:
-        import tkinter as tk
-        # from tkinter import ttk
-        from tkinter import messagebox
-        # ENABLE_TK = True
-        # ^ Check for it with `if 'tk' in globals():` instead.
-        # - only tkinter is in sys.modules--`as` doesn't change that.
-    except ModuleNotFoundError:
-        pass
-else:
+# ^ Doesn't to anything! Instead main does:
+# logging.basicConfig(level=logging.DEBUG)  # format='%(message)s'
+# NOTE: Importing blnk must not have side effects (nor import GUI,
+#   socket, datetime, subprocess or argparse modules) since BLink is
+#   embedded in other tools. Import those only where they are used.
+#   - tests/blnk/test_import_time.py enforces an import time budget.
+
+if sys.version_info.major < 3:
     ModuleNotFoundError = ImportError
     FileNotFoundError = IOError
     FileExistsError = OSError
-    from pytz import timezone
-    from pytz import utc as timezone_utc
-    try:
-        import Tkinter as tk  # type: ignore
-        # import ttk
-        import tkMessageBox as messagebox  # type: ignore
-    except ModuleNotFoundError:
-        pass
-
-from datetime import (  # noqa: F811
-    datetime,  # import this *after* "from datetime" imports!
-)
 
 
 if __name__ == "__main__":
@@ -85,7 +56,6 @@ from hierosoft import (  # noqa: F401
 )
 
 from hierosoft import (
-    replace_isolated,
     replace_vars,
     sysdirs,
 )
@@ -101,12 +71,31 @@ from hierosoft.morelogging import (
 
 from hierosoft.logging2 import getLogger
 
+from blnk import probe
+from blnk.appdirs import write_atomic
+from blnk.command import Command
+from blnk.handlers import DEFAULT_ASSOCIATIONS
+from blnk.mounts import find_share
+from blnk.probe import ProbeTimeout
+from blnk.parsing import (  # noqa: F401
+    FileTypeError,
+    ParseEvent,
+    get_values,
+    iterparse,
+    BLNK_HEADER,
+    SNIFF_BYTES,
+    load_stream,
+    merge_text,
+    parse_text,
+    sniff,
+)
+
 logger = getLogger(__name__)
 
 # Below is copied from a hierosoft comment
 #   (shlex_join appears to not be in six, though shlex_quote is.
 #   See feature request https://github.com/benjaminp/six/issues/386)
-if sys.version_info.major > 3 and sys.version_info.minor >= 8:
+if sys.version_info >= (3, 8):
     shlex_join = shlex.join
     shlex_quote = shlex.quote
 else:
@@ -127,48 +116,136 @@ else:
     shlex.join = shlex_join
 
 
-# Handle issues where the OS considers "BLNK" and all of these file
-#   extensions as "text/plain" rather than allowing them to be
-#   associated with separate programs.
-associations = {
-    ".kdb": ["keepassxc"],
-    ".kdbx": ["keepassxc"],
-    ".pyw": ["python"],
-    ".py": ["python"],
-    ".nja": ["ninja-ide", "-p"],  # required for opening project files
-    ".csv": ["libreoffice", "--calc"],
-    ".pdf": ["xdg-open"],  # changed below (See preferred_pdf_viewers loop)
-}
-if platform.system() == "Windows":
-    if which("py") is not None:
-        associations['.py'] = ["py", "-3"]
-        associations['.pyw'] = ["py", "-3"]
-else:
-    if which("libreoffice") is None:
-        if which("flatpak") is not None:
-            associations[".csv"] = ["flatpak", "run", "--branch=stable",
-                                    "--arch=x86_64", "--command=libreoffice",
-                                    "org.libreoffice.LibreOffice", "--calc"]
-
-# ^ Each value can be a string or list.
-# ^ Besides associations there is also a special case necessary for
-#   ninja-ide to change the file to the containing folder (See
-#   associations code further down).
+associations = DEFAULT_ASSOCIATIONS
+# ^ Each value can be a program, a list of arguments or a list of those
+#   to try in order (See blnk/handlers.py). Users can add more in
+#   associations.json instead (See get_handlers).
 settings = {
     "file_type_associations": associations,
+    "plan_cache": True,  # See get_plan_cache
+    "probe_timeout": probe.DEFAULT_TIMEOUT,  # See path_exists
+    "launch_strategy": "wait",  # See blnk/launch.py and --launch
+    "ignore_case": False,  # See get_case_resolver and --ignore-case
 }
+# ^ Change settings before loading or running any shortcut, or later
+#   using configure: the objects made from them (See
+#   get_resolve_config, get_handlers and get_plan_cache) are made once
+#   and then shared by every thread.
 
 # preferred_pdf_viewers = ["qpdfview", "atril", "evince"]
 # ^ evince is the GNOME and MATE "Document Viewer".
 preferred_pdf_viewers = []
+# ^ Tried before the ".pdf" association (set before the first
+#   get_handlers call).
+
+_init_lock = threading.RLock()
+# ^ Held while creating any of the objects below (and get_path_rules,
+#   get_handlers, etc.), so that threads (such as in blnk.batch) that
+#   use one at the same time get the same one.
+_exe_cache = None
+_hostname = None
+_umask = None
+
+
+def path_exists(path):
+    """Check whether path exists, but give up after probe_timeout
+    seconds (See get_resolve_config and blnk/probe.py) so a hung
+    network mount can't freeze the launch.
+
+    Raises:
+        ProbeTimeout: If the mount containing path didn't respond in
+            time (or didn't respond recently).
+    """
+    return probe.exists(path, timeout=get_resolve_config().probe_timeout)
+
+
+def path_isfile(path):
+    """Like path_exists but for os.path.isfile."""
+    return probe.isfile(path, timeout=get_resolve_config().probe_timeout)
+
+
+def path_isdir(path):
+    """Like path_exists but for os.path.isdir."""
+    return probe.isdir(path, timeout=get_resolve_config().probe_timeout)
+
+
+def _get_exe_cache():
+    global _exe_cache
+    if _exe_cache is None:
+        from blnk.appdirs import get_cache_dir
+        from blnk.exe_cache import ExecutableCache
+        with _init_lock:
+            if _exe_cache is None:
+                _exe_cache = ExecutableCache(
+                    os.path.join(get_cache_dir(), "which.json"),
+                    which,
+                    extra_dirs=[sysdirs['LOCAL_BIN']],
+                )
+    return _exe_cache
+
+
+def cached_which(name, more_paths=None):
+    """Find an executable like which, but using a persistent cache.
+
+    See blnk/exe_cache.py for how the cache is invalidated.
+    """
+    return _get_exe_cache().which(name, more_paths=more_paths)
+
+
+def which_key():
+    """Get a value that changes whenever cached_which could give a
+    different result, such as when a program is installed (See
+    ExecutableCache.get_key).
+    """
+    return _get_exe_cache().get_key()
+
+
+def get_handlers():
+    """Get the registry of programs that open non-blnk files (See
+    blnk/handlers.py): settings['file_type_associations'] (plus
+    preferred_pdf_viewers), then any in the associations.json files.
+
+    Returns:
+        HandlerRegistry: The registry (built once per process).
+    """
+    global _handlers
+    if _handlers is None:
+        with _init_lock:
+            if _handlers is None:
+                _handlers = _load_handlers()
+    return _handlers
+
+
+def _load_handlers():
+    from blnk.handlers import (
+        HandlerRegistry,
+        get_config_paths,
+        load_config,
+    )
+    handlers = HandlerRegistry(settings['file_type_associations'],
+                               key=which_key)
+    if preferred_pdf_viewers:
+        chain = handlers.chains.get(".pdf", [])
+        handlers.add(".pdf", [[viewer] for viewer in
+                              preferred_pdf_viewers] + chain)
+    for config_path in get_config_paths():
+        try:
+            config = load_config(config_path)
+        except ValueError as ex:
+            logger.error("Ignoring {}: {}".format(config_path, ex))
+            continue
+        for suffix, value in config.items():
+            handlers.add(suffix, value)
+    return handlers
+
+
+def probe_associations():
+    """Find the installed handler for every association now, rather
+    than on the first _plan_app for each suffix (such as before the
+    daemon forks, so each child inherits the results).
+    """
+    get_handlers().resolve_all(cached_which)
 
-path = None
-for try_pdf_viewer in preferred_pdf_viewers:
-    path = which(try_pdf_viewer)
-    if path is not None:
-        associations[".pdf"][0] = try_pdf_viewer
-        break
-del path
 
 '''
 ### XDG specification issue
@@ -215,10 +292,26 @@ batch file that runs blnk and sends the parameters to it).
 Create a shortcut:
 blnk -s <target> [<name or path of new shortcut>]
 
+Catalog shortcuts in directory trees (See blnk/catalog.py):
+blnk index <dir>...
+blnk query [--type <Type>] [--hostname <host>] ...
+
+Find shortcuts with missing targets (See blnk/check.py):
+blnk check <dir>...
+
+Open many files in one process (See blnk/batch.py):
+blnk run --batch [-0] [--dry-run] [<file>...]
+
+Refresh the target metadata of every shortcut in a tree (See
+blnk/update.py):
+blnk update --recursive <dir>...
+
 Examples:
 # Run a shortcut:
 blnk <blnk file>
 # Where <blnk file> is a path to a blnk file.
+# Open it without blnk staying in memory until the program exits:
+blnk --launch detach <blnk file>
 '''.format(Template=EXAMPLE_DATA)
 # ^ OPTIONS: moved to parser (now parser.print_usage() is called by usage)
 
@@ -230,10 +323,6 @@ blnk <blnk file>
 #   - %USERPROFILES%
 
 
-class FileTypeError(Exception):
-    pass
-
-
 def push_list(d, key, value):
     if key not in d:
         d[key] = []
@@ -266,13 +355,19 @@ def not_quoted(s, key=""):
         key_msg = "{}=".format(key)
     if s is None:
         return None
+    result = _strip_quotes(s)
+    if result is not s:
+        echo2("trimmed quotes from: {}{}".format(key_msg, s))
+    else:
+        echo2("using already not quoted {}: {}".format(key_msg, s))
+    return result
+
+
+def _strip_quotes(s):
+    """Do what not_quoted does but without any output."""
     for q in ['"', "'"]:
         if (len(s) > 1) and s.startswith(q) and s.endswith(q):
-            echo0("trimmed quotes from: {}{}".format(key_msg, s))
             return s[1:-1].replace("\\"+q, q)
-            break
-        else:
-            echo0("using already not quoted {}: {}".format(key_msg, s))
     return s
 
 
@@ -285,14 +380,60 @@ def is_url(path):
     return False
 
 
+def get_hostname():
+    """Get this computer's name for X-Source Metadata (looked up once
+    per process).
+    """
+    global _hostname
+    if _hostname is None:
+        import socket
+        # hostname = platform.node()
+        _hostname = socket.gethostname()  # the same in every thread
+        # socket.gethostname() may be FQDN on Fedora (according to a
+        #   comment on <https://stackoverflow.com/a/4271755/4541104>).
+    return _hostname
+
+
+def _get_umask():
+    """Get the process's umask (looked up once per process, since
+    os.umask can only get it by setting it).
+    """
+    global _umask
+    if _umask is None:
+        with _init_lock:  # Another thread must not see the 0o022.
+            if _umask is None:
+                umask = os.umask(0o022)
+                os.umask(umask)
+                _umask = umask
+    return _umask
+
+
+def get_timezone_utc():
+    """Get the UTC tzinfo (imported here so importing blnk doesn't)."""
+    if sys.version_info.major >= 3:
+        from datetime import timezone
+        return timezone.utc
+    from pytz import utc  # type: ignore
+    return utc
+
+
 def showMsgBoxOrErr(msg,
                     title="Blnk (Python {})".format(sys.version_info.major),
                     enable_gui=True):
-    # from tkinter import messagebox
     echo0("{}\nusing {}".format(msg, title))
     logger.warning("enable_gui={}".format(enable_gui))
     if not enable_gui:
         return
+    try:
+        if sys.version_info.major >= 3:
+            import tkinter as tk
+            from tkinter import messagebox
+        else:
+            import Tkinter as tk  # type: ignore
+            import tkMessageBox as messagebox  # type: ignore
+    except ModuleNotFoundError:
+        # Already shown by echo0 above.
+        return
     try:
         messagebox.showerror(title, msg)
     except tk.TclError as ex:
@@ -313,9 +454,10 @@ if os.path.isfile(tryBinPath):
 class BLink:
     '''Blink Link
     Attributes:
-        BASES (list[str]): A list of paths that could contain the
+        BASES (tuple[str]): Paths that could contain the
             directory if the directory is a drive letter that is not C
-            but the os is not Windows.
+            but the os is not Windows. Resolving paths uses the copy
+            in get_resolve_config, so change them using configure.
         LINE_ACTIONS (list[str]): Types of lines. "Comments" is *not* a
             line type, because comments are added to
             self._comments[action]
@@ -334,7 +476,7 @@ class BLink:
     cloud_path = replace_vars("%CLOUD%")
     # ^ Does return None if the entire string is one var that is blank.
     cloud_name = None
-    print('cloud_path="{}"'.format(cloud_path))
+    logger.debug('cloud_path="{}"'.format(cloud_path))
     if cloud_path is not None:
         # myCloud = myCloudName
         # if myCloud is None:
@@ -345,9 +487,9 @@ class BLink:
         #   (may imply a Windows network drive, so other OS network
         #   drive first on another OS.)
         cloud_name = os.path.split(cloud_path)[1]
-    print('cloud_name="{}"'.format(cloud_name))
+    logger.debug('cloud_name="{}"'.format(cloud_name))
+    BASES = tuple(BASES)  # copied by get_resolve_config
 
-    USERS_DIRS = ["Users", "Documents and Settings"]
     LINE_ACTIONS = ["ContentType", "Sections", "Values", "Top"]  # comment is N/A
 
     def __init__(self, path=None, assignmentOperator="=",
@@ -357,6 +499,7 @@ class BLink:
         self.contentTypeParts = None
         self.lastSection = None
         self.path = None  # load sets this if succeeds
+        self._loaded_path = None  # the file whose layout save keeps
         self.assignmentOperator = assignmentOperator
         self.commentDelimiter = commentDelimiter
         self._comments = {}
@@ -364,6 +507,10 @@ class BLink:
         self.tree['X-Blnk'] = OrderedDict()
         self.tree['X-Target Metadata'] = OrderedDict()
         self.tree['X-Source Metadata'] = OrderedDict()
+        self._index = {}
+        # ^ key: sections containing key, in tree order (See _set)
+        self._unquoted = {}
+        # ^ key: cached result of get(key)
 
         for key in BLink.LINE_ACTIONS:
             if key.lower() in ("contenttype", "top"):
@@ -383,10 +530,10 @@ class BLink:
 
     def getAbs(self, path):
         rawPath = path
-        if not os.path.exists(path):
+        if not path_exists(path):
             # See if it is relative to the blnk file.
             tryPath = os.path.join(os.path.dirname(self.path), path)
-            if os.path.exists(tryPath):
+            if path_exists(tryPath):
                 # path = os.path.realpath(tryPath)
                 path = os.path.abspath(tryPath)
                 print('* redirecting "{}" to "{}"'.format(rawPath, path))
@@ -479,7 +626,7 @@ class BLink:
             self._comments["Top"].append(comment)
 
     def is_blnk(self):
-        self.contentType == "text/blnk"
+        return self.contentType == "text/blnk"
 
     def _pushLine(self, rawL, path=None, row=None, col=None):
         '''
@@ -587,7 +734,7 @@ class BLink:
                 # else fall back to global section
                 sectionD = OrderedDict()
                 self.tree[section] = sectionD
-            sectionD[k] = v
+            self._set(section, k, v)
             logger.debug(
                 "SET {}.{}={}".format(
                     section.replace(BLink.SECTION_GLOBAL, "GLOBAL"), k, v))
@@ -606,6 +753,10 @@ class BLink:
                 in blnk format (Set to True if loading a blnk file for
                 sure, otherwise set it to False). Defaults to False.
 
+        Only the first SNIFF_BYTES of path are read (in binary mode,
+        See blnk.parsing.sniff) to decide whether it is blnk, so a
+        large or binary file is never decoded.
+
         Raises:
             FileNotFoundError: path doesn't point to an existing file
             UnicodeDecodeError: If ends with .blnk but is not Unicode.
@@ -617,24 +768,36 @@ class BLink:
         if not os.path.isfile(path):
             raise FileNotFoundError("\"{}\" does not exist.".format(path))
         try:
-            with open(path, 'r') as ins:
-                row = 0
-                for line in ins:
-                    row += 1
-                    try:
-                        self._pushLine(line, path=path, row=row)
-                    except FileTypeError as ex:
-                        # FIXME: See if FileTypeError is in python2
-                        # Do not produce error messages for the bash
-                        # script to show in the GUI since this is
-                        # recoverable (and expected if plain text files
-                        # are associated with blnk.
-                        logger.error("{}: {}".format(type(ex).__name__, ex))
-                        if blnk_format_only:
-                            raise
-                        logger.warning("* running file directly...")
-                        return self._choose_app(path)
+            with open(path, 'rb') as ins:
+                head = ins.read(SNIFF_BYTES)
+            kind, encoding = sniff(head,
+                                   complete=(len(head) < SNIFF_BYTES))
+        except UnicodeDecodeError:
+            if path.lower().endswith(".blnk"):
+                raise
+            kind, encoding = "other", None  # such as a binary file
+        try:
+            if kind == "other":
+                raise FileTypeError(
+                    "The file must start with \"{}\" (or the legacy"
+                    " \"Content-Type: text/blnk\") (file: {})"
+                    .format(BLNK_HEADER, path))
+            with open(path, 'r', encoding=encoding) as ins:
+                load_stream(self, ins, path=path)
+                # ^ same result as self._pushLine for each line
+                #   (See blnk/parsing.py)
                 self.lastSection = None
+        except FileTypeError as ex:
+            # FIXME: See if FileTypeError is in python2
+            # Do not produce error messages for the bash
+            # script to show in the GUI since this is
+            # recoverable (and expected if plain text files
+            # are associated with blnk.
+            logger.error("{}: {}".format(type(ex).__name__, ex))
+            if blnk_format_only:
+                raise
+            logger.warning("* running file directly...")
+            return self._choose_app(path)
         except UnicodeDecodeError as ex:
             if path.lower().endswith(".blnk"):
                 raise
@@ -643,8 +806,17 @@ class BLink:
             # the blank Exec handler to check the file extension.
             pass
         self.path = path
+        self._loaded_path = os.path.realpath(path)
         return 0
 
+    @classmethod
+    def aload(cls, path):
+        """Load a blnk file in the event loop's executor (See
+        blnk/aio.py), as in `link = await BLink.aload(path)`.
+        """
+        from blnk.aio import load
+        return load(path, cls=cls)
+
     @property
     def options(self):
         return self.tree['X-Blnk']
@@ -693,6 +865,17 @@ class BLink:
         return self.tree["X-Blnk"].get(valid_target_key)
 
     def save(self, path, overwrite=False):
+        """Write the shortcut to path.
+
+        The file is replaced atomically (See blnk.appdirs.write_atomic),
+        and not written at all if its bytes wouldn't change, so a sync
+        client doesn't upload it again. Saving the file that was loaded
+        only changes the lines whose values changed (See _serialize).
+
+        Returns:
+            dict: Empty, or "error" and "missing" if required fields
+                are missing (or 1 if path exists and not overwrite).
+        """
         # if not path:
         #     path = self.path
         results = {}
@@ -718,7 +901,7 @@ class BLink:
                 if value is None:
                     continue
                 if self.tree[section_name].get(key) is None:
-                    self.tree[section_name][key] = value
+                    self._set(section_name, key, value)
             for key, value in r_sections.items():
                 if self.tree[section_name].get(key) is None:
                     missing.append("{} in {}".format(key, section_name))
@@ -742,11 +925,60 @@ class BLink:
             echo0("Error: {} already exists.".format(path))
             return 1
 
-        with open(path, 'w') as outs:
-            self._save(outs)
+        self._write(path)
+        return results
+
+    def _write(self, path):
+        """Write the shortcut to path as save does, but without checking
+        for required fields (such as to only update the metadata of an
+        existing file, See blnk/update.py).
+
+        Returns:
+            bool: False if the file was unchanged so it wasn't written.
+        """
+        # Write the file a symlink points to, rather than replacing the
+        #   symlink (See write_atomic):
+        path = os.path.realpath(path)
+        data = self._serialize(path)
+        try:
+            with open(path, 'rb') as ins:
+                original = ins.read()
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            original = None
+            mode = 0o666 & ~_get_umask()
+        # Keep this layout for the next save (See _serialize):
+        self._loaded_path = path
+        if data == original:
+            logger.info("* \"{}\" is unchanged".format(path))
+            return False
+        write_atomic(path, data, mode=mode)
         logger.info("* wrote \"{}\"".format(path))
+        return True
 
-        return results
+    def _serialize(self, path):
+        '''Get the bytes that save writes to path.
+
+        If path is the file that was loaded, only the lines that changed
+        are changed (See blnk.parsing.merge_text), so comments, spacing
+        and newlines stay as they were. Otherwise (or if the file can't
+        be merged) the whole file is written by _save.
+        '''
+        if os.path.realpath(path) == self._loaded_path:
+            try:
+                with open(path, 'rb') as ins:
+                    original = ins.read().decode("utf-8")
+                return merge_text(
+                    original, self.tree, operator=self.assignmentOperator,
+                    delimiter=self.commentDelimiter, path=path,
+                ).encode("utf-8")
+            except (OSError, UnicodeDecodeError, SyntaxError, FileTypeError,
+                    ValueError) as ex:
+                logger.warning("* rewriting \"{}\" ({}: {})"
+                               .format(path, type(ex).__name__, ex))
+        stream = io.StringIO()
+        self._save(stream)
+        return stream.getvalue().replace("\n", os.linesep).encode("utf-8")
 
     def _write_comment(self, stream, comment):
         if "\r" in comment:
@@ -951,8 +1183,32 @@ class BLink:
             raise NotImplementedError("self.path was not generated")
         return results
 
+    @staticmethod
+    def get_target_times(stat_result):
+        """Get the "modified" and "created" metadata of a target.
+
+        Args:
+            stat_result (os.stat_result): The target's stat.
+
+        Returns:
+            tuple(datetime, datetime): The mtime and ctime in UTC.
+        """
+        from datetime import datetime
+        timezone_utc = get_timezone_utc()
+        return (datetime.fromtimestamp(stat_result.st_mtime,
+                                       tz=timezone_utc),
+                datetime.fromtimestamp(stat_result.st_ctime,
+                                       tz=timezone_utc))
+
     def analyze_target(self, options, target_key="Exec",
-                       enable_gui=True, target=None):
+                       enable_gui=True, target=None, stat_result=None):
+        """Set the metadata of the shortcut from its target.
+
+        Args:
+            stat_result (os.stat_result, optional): The target's stat,
+                if already known (such as from os.scandir, See
+                blnk/update.py). Otherwise the target is statted once.
+        """
         results = {}
         if options is None:
             options = self.options
@@ -965,14 +1221,13 @@ class BLink:
                 "Set target (usually via load or set_target"
                 " which are mutually exclusive)"
                 " before analyze_target")
-        mtime = None
-        ctime = None
+        from datetime import datetime
+        timezone_utc = get_timezone_utc()
         echo1('Using target: "{}"'.format(target))
-        mtime_ts = pathlib.Path(target).stat().st_mtime
-        mtime = datetime.fromtimestamp(mtime_ts, tz=timezone_utc)
-        ctime_ts = pathlib.Path(target).stat().st_ctime
-        ctime = datetime.fromtimestamp(ctime_ts, tz=timezone_utc)
-        # ^ stat raises FileNotFoundError if not os.path.exists
+        if stat_result is None:
+            stat_result = os.stat(target)
+            # ^ raises FileNotFoundError if not os.path.exists
+        mtime, ctime = BLink.get_target_times(stat_result)
         # TODO: test both on mac, and if necessary use
         #   os.stat(target).st_birthtime "To get file creation time on Mac
         #   and some Unix based systems."
@@ -992,26 +1247,23 @@ class BLink:
         Modify: 2022-08-09 14:39:55.144246010 -0400
         )
         '''
-        # hostname = platform.node()
-        hostname = socket.gethostname()
-        # socket.gethostname() may be FQDN on Fedora (according to a comment
-        #   on <https://stackoverflow.com/a/4271755/4541104>).
+        hostname = get_hostname()
         for key, value in options.items():
             # Must set self.tree["X-Blnk"]["Type"]
-            self.tree["X-Blnk"][key] = value
+            self._set("X-Blnk", key, value)
 
         Exec_fmt = "{}"
         if os.path.exists(target) and (" " in target):
             Exec_fmt = '"{}"'
 
-        self.tree["X-Blnk"]["Comment"] = \
-            "Created using '{}'".format(clean_shlex_join(sys.argv))
+        self._set("X-Blnk", "Comment",
+                  "Created using '{}'".format(clean_shlex_join(sys.argv)))
 
         if options['Type'] in ["Directory", "File", "Exec"]:
-            self.tree["X-Target Metadata"]["modified"] = mtime
-            self.tree["X-Target Metadata"]["created"] = ctime
+            self._set("X-Target Metadata", "modified", mtime)
+            self._set("X-Target Metadata", "created", ctime)
 
-        self.tree["X-Source Metadata"]["hostname"] = hostname
+        self._set("X-Source Metadata", "hostname", hostname)
         valid_target_key = TARGET_MAP[options["Type"]]
         if options['Type'] in ["Directory", "File"]:
             # target key will be changed automatically
@@ -1037,11 +1289,11 @@ class BLink:
                     .format(target_key, valid_target_key, options["Type"]))
                 logger.warning(warning)
                 target_key = valid_target_key
-            self.tree["X-Blnk"][target_key] = Exec_fmt.format(target)
+            self._set("X-Blnk", target_key, Exec_fmt.format(target))
 
             # target_key = options["Type"]
         elif target_key == 'Exec':
-            self.tree["X-Blnk"][target_key] = Exec_fmt.format(target)
+            self._set("X-Blnk", target_key, Exec_fmt.format(target))
             # "Terminal" already set in this case (iterated options above)
         elif target_key == "URL":
             if options['Type'] != "Link":
@@ -1049,9 +1301,9 @@ class BLink:
                     "The type for target URL should be Link but is {}"
                     "".format(options['Type'])
                 )
-            self.tree["X-Blnk"][target_key] = Exec_fmt.format(target)
+            self._set("X-Blnk", target_key, Exec_fmt.format(target))
             accessed = datetime.now(tz=timezone_utc)
-            self.tree["X-Target Metadata"]["accessed"] = accessed
+            self._set("X-Target Metadata", "accessed", accessed)
             # "Name", "Type" already set in this case (iterated options above)
             # Technically, "Terminal" could be useful for non-browser data
             #   such as json URLs.
@@ -1064,6 +1316,22 @@ class BLink:
             raise NotImplementedError("Setting target_key failed.")
         return results
 
+    def _set(self, section, key, value):
+        '''Set a value in an existing section of self.tree.
+
+        Always use this rather than changing self.tree directly, so the
+        key index that getBranch and get use stays current.
+        '''
+        self.tree[section][key] = value
+        sections = self._index.get(key)
+        if sections is None:
+            self._index[key] = [section]
+        elif section not in sections:
+            sections.append(section)
+            order = list(self.tree.keys())
+            sections.sort(key=order.index)
+        self._unquoted.pop(key, None)
+
     def getBranch(self, section, key):
         '''Get the actual section and the value.
 
@@ -1071,29 +1339,32 @@ class BLink:
             tuple(str): section (section name key for self.tree) and
                 value self.tree[section][key]. The reason section is
                 returned is in case the key doesn't exist there but
-                exists in another section.
+                exists in another section (the first one in self.tree
+                that has it, found using the index kept by _set).
         '''
-        v = None
         sectionD = self.tree.get(section)
         if sectionD is not None:
             v = sectionD.get(key)
-        if v is None:
-            section = None
-            for trySection, sectionD in self.tree.items():
-                v = sectionD.get(key)
-                if v is not None:
-                    section = trySection
-                    break
-        return section, v
+            if v is not None:
+                return section, v
+        for trySection in self._index.get(key, ()):
+            v = self.tree[trySection].get(key)
+            if v is not None:
+                return trySection, v
+        return None, None
 
     def get(self, key):
-        section = BLink.SECTION_GLOBAL
-        got_section, v = self.getBranch(section, key)
-        if got_section is None:
-            # It is using the latest format.
-            got_section, v = self.getBranch("[X-Blnk]", key)
-        # old_v = v
-        v = not_quoted(v, key=key)
+        '''Get a value (from the global section if present, otherwise
+        from the first section that has it) without enclosing quotes.
+        '''
+        try:
+            return self._unquoted[key]
+        except KeyError:
+            pass
+        _, v = self.getBranch(BLink.SECTION_GLOBAL, key)
+        if v is not None:
+            v = _strip_quotes(v)
+        self._unquoted[key] = v
         return v
 
     def getExec(self, key='Exec', split=None):
@@ -1101,7 +1372,8 @@ class BLink:
 
         Be careful when filling in paths from cwd here. This function
         will keep the quotes to ensure paths with spaces work, and to
-        ensure the original syntax of the line is kept.
+        ensure the original syntax of the line is kept. Use getArgv
+        instead to avoid splitting and unquoting the result again.
 
         Args:
             key (str, optional): Key desired. Defaults to "Exec".
@@ -1116,34 +1388,33 @@ class BLink:
                   even if Type is not "Application", because single
                   quotes need to be removed!
         '''
-        prefix = "[getExec] "  # noqa: F841
         if split is None:
             split = (key == 'Exec')
-        trySection = BLink.SECTION_BLINK  # formerly BLink.SECTION_GLOBAL
-        section, v = self.getBranch(trySection, key)
-        # Warning: don't remove quotes yet, because shlex.split
-        #   is done later! Removing the quotes now would split more
-        #   parts than should be.
-        # logger.debug(prefix+"got v={}".format(v))
+        argv, err = self.getArgv(key=key, split=split)
+        if argv is None:
+            return None, err
+        if split:
+            return shlex.join(argv), err
+        return argv[0], err
 
-        if v is None:
-            path = self.path
-            if path is not None:
-                path = "\"" + path + "\""
-            msg = ("WARNING: There was no \"{}\" variable in {}"
-                   "".format(key, path))
-            return None, msg
-        elif section != trySection:
-            sectionMsg = section
-            if section == BLink.SECTION_GLOBAL:
-                sectionMsg = "the main section"
-            else:
-                sectionMsg = "[{}]".format(section)
-            msg = "WARNING: \"{}\" was in {}".format(key, sectionMsg)
-        if v is None:
-            return None, msg
-        path = v
+    @staticmethod
+    def _translate(v, split=False, exists=path_exists):
+        '''Rewrite a value (such as Exec) for this platform (See
+        getArgv).
 
+        Args:
+            v (str): The value. If not split, it must already be
+                unquoted.
+            split (bool, optional): v is a command line rather than one
+                path.
+            exists (callable, optional): The function that checks the
+                candidates for a Windows drive letter (See
+                blnk/pathrules.py).
+
+        Raises:
+            ValueError: If v is a bad Windows path (on Windows).
+        '''
+        path = v
         if path.startswith("~/"):
             if platform.system() == "Windows":
                 if split:
@@ -1167,111 +1438,123 @@ class BLink:
                 # elif == 2 allow drive letter shortcut without slash
 
         else:  # Not windows
-
-            # Rewrite Windows paths **when on a non-Windows platform**:
-            # logger.debug("  [blnk] v: \"{}\"".format(v))
-
-            if v[1:2] == ":":
-                # ^ Unless the leading slash is removed, join will
-                #   ignore the param before it (will treat it as
-                #   starting at the root directory)!
-                # logger.debug("  v[1:2]: '{}'".format(v[1:2]))
-                if v.lower() == "c:\\tmp":
-                    path = sysdirs['TMP']
-                    echo1(prefix+"  [blnk] Detected {} as {}"
-                          "".format(v, sysdirs['TMP']))
-                elif v.lower().startswith("c"):
-                    echo1(prefix+"  [blnk] Detected c: in {}"
-                          "".format(v.lower()))
-                    path = v[3:].replace("\\", "/")
-                    rest = path
-                    # ^ Cut off C:\, so path may start with Users now:
-                    statedUsersDir = None
-                    for thisUsersDir in BLink.USERS_DIRS:
-                        tryPath = thisUsersDir.lower() + "/"
-                        if path.lower().startswith(tryPath):
-                            statedUsersDir = thisUsersDir
-                            break
-                        else:
-                            echo1("  [blnk] {} doesn't start with {}"
-                                  "".format(path.lower(),
-                                            thisUsersDir.lower() + "/"))
-                    echo1("  [blnk] statedUsersDir: {}"
-                          "".format(statedUsersDir))
-                    if statedUsersDir is not None:
-                        parts = path.split("/")
-                        # logger.debug("  [blnk] parts={}".format(parts))
-                        if len(parts) > 1:
-                            rel = ""
-                            if len(parts[2:]) > 0:
-                                rel = parts[2:][0]
-                                old = parts[:2][0]
-                                if len(parts[2:]) > 1:
-                                    rel = os.path.join(*parts[2:])
-                                if len(parts[:2]) > 1:
-                                    old = os.path.join(*parts[:2])
-                                # ^ splat ('*') since join takes
-                                #   multiple params not a list.
-                                echo1("  [blnk] changing \"{}\" to"
-                                      " \"{}\"".format(old, sysdirs['HOME']))
-                                path = os.path.join(sysdirs['HOME'], rel)
-                            else:
-                                path = sysdirs['HOME']
-                        else:
-                            path = sysdirs['HOME']
-                    elif path.lower() == "users":
-                        path = sysdirs['PROFILESFOLDER']
-                    else:
-                        path = os.path.join(sysdirs['HOME'], rest)
-                        echo0("  [blnk] {} was forced due to bad path:"
-                              " \"{}\".".format(path, v))
-                else:
-                    echo0("Detected drive letter that is not C:")
-                    # It starts with letter+colon but letter is NOT c.
-                    path = v.replace("\\", "/")
-                    rest = path[3:]
-                    isGood = False
-                    for thisBase in BLink.BASES:
-                        echo1("  [blnk] thisBase: \"{}\""
-                              "".format(thisBase))
-                        echo1("  [blnk] rest: \"{}\""
-                              "".format(rest))
-                        tryPath = os.path.join(thisBase, rest)
-                        echo1("  [blnk] tryPath: \"{}\""
-                              "".format(tryPath))
-                        if os.path.exists(tryPath):
-                            path = tryPath
-                            # Change something like D:\Meshes to
-                            # /home/x/Nextcloud/Meshes or use some other
-                            # replacement for D:\ that is in BASES.
-                            logger.warning(
-                                "  [blnk] {} was detected."
-                                .format(tryPath))
-                            isGood = True
-                            break
-                        else:
-                            echo0("  [blnk] {} doesn't exist."
-                                  "".format(tryPath))
-                    if not isGood:
-                        # Force it to be a non-Window path even if it
-                        # doesn't exist, but use the home directory
-                        # so it is a path that makes some sort of sense
-                        # to everyone even if they don't have the
-                        path = os.path.join(sysdirs['HOME'], rest)
-                        echo0("  [blnk] {} was forced due to bad path:"
-                              " \"{}\".".format(path, v))
+            # Rewrite Windows paths **when on a non-Windows platform**
+            #   (See blnk/pathrules.py for the rules).
+            config = get_resolve_config()
+            find = None
+            if config.ignore_case:
+                find = get_case_resolver().find
+            path, rule = get_path_rules().translate(
+                v, bases=config.bases, exists=exists, find=find)
+            if rule is not None:
+                echo1("  [blnk] Detected {} in {}"
+                      "".format(rule["prefix"], v))
             else:
-                path = v.replace("\\", "/")
+                # A UNC path (\\server\share\...) with no rule may be
+                #   on a mounted network share (See blnk/mounts.py):
+                share_path = find_share(v)
+                if share_path is not None:
+                    echo1("  [blnk] Detected the share of {} at {}"
+                          "".format(v, share_path))
+                    path = share_path
 
         path = replace_vars(path)
 
-        if BLink.cloud_name is not None:
-            for statedCloud in ["ownCloud", "owncloud"]:
-                path = replace_isolated(path, statedCloud,
-                                        BLink.cloud_name,
-                                        case_sensitive=False)
+        return get_path_rules().rename(path)
+
+    @staticmethod
+    def resolve_many(values, listings=None):
+        '''Rewrite many Exec or Path values (each one path, as with
+        getExec(split=False)) for this platform at once.
+
+        Instead of checking each candidate of each value (such as
+        every BASES directory for a D:\\ path) with its own stat, each
+        directory involved is listed once and all of the checks under
+        it are answered from that listing (See blnk/listing.py).
+
+        Args:
+            values (iterable[str]): The values, quoted or not.
+            listings (ListingCache, optional): Listings to reuse, such
+                as to check the results afterward with
+                listings.exists. Defaults to a new ListingCache.
+
+        Returns:
+            list[tuple(str, str)]: For each value (in the same order),
+                the path (or None) and an error message (or None).
+        '''
+        if listings is None:
+            from blnk.listing import ListingCache
+            listings = ListingCache(
+                timeout=get_resolve_config().probe_timeout)
+        results = []
+        for v in values:
+            try:
+                path = BLink._translate(_strip_quotes(v),
+                                        exists=listings.exists)
+            except ValueError as ex:
+                results.append((None, str(ex)))
+                continue
+            results.append((path, None))
+        return results
+
+    def getArgv(self, key='Exec', split=None):
+        '''Get Exec (or another key) from the blnk file as a list.
+
+        The value is rewritten for this platform the same way as by
+        getExec, but the result is never joined back into a string.
+
+        Args:
+            key (str, optional): Key desired. Defaults to "Exec".
+            split (bool, optional): Split the value into a command and
+                arguments (and make the command absolute if it is
+                relative to the blnk file). Otherwise the whole value
+                (without enclosing quotes) is one path. Defaults to
+                True only if key is 'Exec'.
+
+        Returns:
+            tuple(list[str], str): The argv (one element if not split),
+                or None if key isn't set, then an error or warning
+                message or None.
+        '''
+        prefix = "[getArgv] "  # noqa: F841
+        if split is None:
+            split = (key == 'Exec')
+        trySection = BLink.SECTION_BLINK  # formerly BLink.SECTION_GLOBAL
+        section, v = self.getBranch(trySection, key)
+        # Warning: don't remove quotes yet, because shlex.split
+        #   is done later! Removing the quotes now would split more
+        #   parts than should be.
+        # logger.debug(prefix+"got v={}".format(v))
+
+        msg = None
+        if v is None:
+            path = self.path
+            if path is not None:
+                path = "\"" + path + "\""
+            msg = ("WARNING: There was no \"{}\" variable in {}"
+                   "".format(key, path))
+            return None, msg
+        elif section != trySection:
+            sectionMsg = section
+            if section == BLink.SECTION_GLOBAL:
+                sectionMsg = "the main section"
+            else:
+                sectionMsg = "[{}]".format(section)
+            msg = "WARNING: \"{}\" was in {}".format(key, sectionMsg)
+        if not split:
+            # The whole value is one path, so remove any quotes now
+            #   (otherwise a quoted "D:\..." wouldn't be rewritten).
+            v = _strip_quotes(v)
+        path = BLink._translate(v, split=split, exists=path_exists)
 
         # logger.debug(prefix+"got path={}".format(path))
+        if msg is not None:
+            logger.debug(msg)
+        if not split:
+            if path != v:
+                logger.warning(prefix+"changed \"{}\" to \"{}\""
+                               .format(v, path))
+            return [path], None
         if platform.system() == "Windows":
             # old_parts = shlex.split(path)
             # ^ removes backslashes \ !!
@@ -1295,27 +1578,17 @@ class BLink:
         # if not os.path.exists(old_parts[0]):
         abs0 = self.getAbs(old_parts[0])
         if old_parts[0] == abs0:
-            if not os.path.exists(old_parts[0]):
+            if not path_exists(old_parts[0]):
                 logger.warning(
                     "  [blnk] \"{}\""
                     " wasn't an existing absolute or relative path"
                     .format(old_parts[0]))
         old_parts[0] = abs0
 
-        # NOTE: Extra '' marks should *not* matter, since no_quotes is used
-        # if len(old_parts) == 1:
-        #     # Prevent adding extra '' marks
-        #     path = old_parts[0]
-        # else:
-        if split:
-            path = shlex.join(old_parts)
-
-        # else:
-        #    print('* using existing relative target "{}"'.format(old_parts))
-
-        if path != v:
-            logger.warning(prefix+"changed \"{}\" to \"{}\"".format(v, path))
-        return path, None
+        if old_parts != [v]:
+            logger.warning(prefix+"changed \"{}\" to {}"
+                           .format(v, old_parts))
+        return old_parts, None
 
     @staticmethod
     def _run_parts(parts, check=True, cwd=None, target_blnk_type=False):
@@ -1336,15 +1609,24 @@ class BLink:
                 if available in the version of Python that is running
                 this module.
         '''
-        if cwd is not None:
-            if not_quoted(cwd) != cwd:
-                raise ValueError("cwd must not be quoted!")
-        for i in range(len(parts)):
-            if not_quoted(parts[i]) != parts[i]:
-                raise ValueError(
-                    "parts[{}] must not be quoted but is {}!"
-                    "".format(i, parts[i])
-                )
+        parts, cwd = BLink._resolve_parts(parts, cwd=cwd,
+                                          target_blnk_type=target_blnk_type)
+        return BLink._spawn_parts(parts, check=check, cwd=cwd)
+
+    @staticmethod
+    def _resolve_parts(parts, cwd=None, target_blnk_type=False):
+        '''Check a command and find its executable, without running it.
+
+        See _run_parts for documentation of the arguments.
+
+        Returns:
+            tuple(list[str], str): The command (parts[0] is changed to a
+                full path if only found in LOCAL_BIN, or if required by
+                subprocess) and the cwd (None if cwd is the target).
+        '''
+        parts = list(parts)
+        # ^ Each part is used as-is (not unquoted), since quotes were
+        #   already handled when the value was split (See getArgv).
         if (len(parts) > 1) and (parts[1] == cwd):
             echo0('Warning: not using cwd="{}" since that is the target.'
                   ''.format(cwd))
@@ -1352,8 +1634,6 @@ class BLink:
         # if cwd is not None:
         #     os.chdir(cwd)
         # ^ Use the cwd param of run or check_call instead.
-        logger.warning(
-            '* running "{}" (in "{}")...'.format(parts, os.getcwd()))
         if target_blnk_type and (parts[0] == "xdg-open"):
             raise ValueError(
                 'xdg-open was blocked to prevent infinite recursion'
@@ -1363,65 +1643,59 @@ class BLink:
         # else: There should be no infinite recursion if the document is
         #   not a type associated with blnk such as plain text.
 
-        run_fn = subprocess.check_call
-        run_fn_name = "subprocess.check_call"
-        use_check = False
         if len(parts) > 1:
-            if not os.path.exists(parts[1]):
-                logger.warning('"{}" does not exist.'.format(parts[1]))
-            else:
-                logger.info('"{}" was found.'.format(parts[1]))
+            try:
+                if not path_exists(parts[1]):
+                    logger.warning('"{}" does not exist.'.format(parts[1]))
+                else:
+                    logger.info('"{}" was found.'.format(parts[1]))
+            except ProbeTimeout as ex:
+                # Only informational, so let the program report it.
+                logger.warning(str(ex))
+        import subprocess
         if hasattr(subprocess, 'run'):
             # Python 3
-            use_check = True
-            run_fn = subprocess.run
-            run_fn_name = "subprocess.run"
-            logger.warning("  - run_fn=subprocess.run")
-            part0 = which(parts[0])
+            part0 = cached_which(parts[0])
             # if localPath not in os.environ["PATH"].split(os.pathsep):
             if part0 is None:
-                part0 = which(parts[0], more_paths=[sysdirs['LOCAL_BIN']])
+                part0 = cached_which(parts[0],
+                                     more_paths=[sysdirs['LOCAL_BIN']])
                 if part0 is not None:
                     parts[0] = part0
         else:
-            logger.warning(
-                "  - using Python 2 subprocess.check_call"
-                " from Python {}"
-                .format(sys.version_info.major))
             # check_call requires a full path (!):
             if not os.path.isfile(parts[0]):
-                part0 = which(parts[0], more_paths=[sysdirs['LOCAL_BIN']])
+                part0 = cached_which(parts[0],
+                                     more_paths=[sysdirs['LOCAL_BIN']])
                 if part0 is not None:
                     parts[0] = part0
-        completedprocess = None
-        returncode = None
+        return parts, cwd
+
+    @staticmethod
+    def _spawn_parts(parts, check=True, cwd=None, strategy=None):
+        '''Run a command that was already checked by _resolve_parts.
+
+        See _run_parts for documentation of the other arguments.
+
+        Args:
+            strategy (str, optional): How to start the program (See
+                blnk/launch.py). Defaults to
+                settings['launch_strategy'].
+
+        Returns:
+            int: The return code of the process (0 if the strategy
+                doesn't wait for it).
+        '''
+        from blnk.launch import launch
+        if strategy is None:
+            strategy = settings.get("launch_strategy")
+        logger.warning(
+            '* running "{}" (in "{}")...'.format(parts, os.getcwd()))
         try:
-            echo1("run_fn={}".format(run_fn_name))
-            if use_check:
-                echo1("* using check")
-                if cwd is not None:
-                    echo1("* manually-set cwd is None")
-                    # parts[0] = which(parts[0])
-                    echo1('parts[0]="{}"'.format(parts[0]))
-                    # Warning: If cwd is not None subprocess will raise
-                    #   FileNotFoundError if running
-                    #   ['xdg-open', DirectoryPath]!
-                    completedprocess = run_fn(parts, check=check, cwd=cwd)
-                else:
-                    echo1("* manually-set cwd is {}".format(cwd))
-                    completedprocess = run_fn(parts, check=check)
-            else:
-                echo1("* not using check")
-                if cwd is not None:
-                    echo1("* manually-set cwd is None")
-                    completedprocess = run_fn(parts, cwd=cwd)
-                else:
-                    echo1("* manually-set cwd is {}".format(cwd))
-                    completedprocess = run_fn(parts)
-            if completedprocess is not None:
-                if hasattr(completedprocess, "returncode"):
-                    returncode = completedprocess.returncode
-            echo0("returncode={}".format(completedprocess.returncode))
+            result = launch(parts, cwd=cwd, strategy=strategy, check=check)
+            # Warning: If cwd is not None subprocess will raise
+            #   FileNotFoundError if running ['xdg-open', DirectoryPath]!
+            echo0("returncode={}".format(result.returncode))
         except FileNotFoundError as ex:
             echo0("parts={}".format(parts))
             pathMsg = (" (The system path wasn't checked"
@@ -1436,31 +1710,7 @@ class BLink:
                 " failed{}:"
                 " {}".format(shlex.join(parts), pathMsg, ex),
             )
-        except FileNotFoundError as ex:
-            echo0(get_traceback())
-            raise FileNotFoundError(
-                'The file was not found: '
-                ' {} ({})'.format(shlex.join(parts), ex),
-            )
-        except Exception as ex:
-            raise ex
-        '''
-        except TypeError as ex:
-            # should only happen if sending check=check when run_fn
-            # is check_call--which doesn't work since check is only a
-            # keyword argument when run_fn is run.
-            if "unexpected keyword argument 'check'" in str(ex):
-                try:
-                    run_fn(parts)
-                except FileNotFoundError as ex:
-                    raise ex
-            else:
-                raise ex
-        '''
-        if returncode is None:
-            returncode = 1
-        # else should have been set to completedprocess.returncode
-        return returncode
+        return result.returncode
 
     @staticmethod
     def _run(Exec, Type, cwd=None):
@@ -1472,27 +1722,51 @@ class BLink:
         target, but the Exec argument is equivalent to 'Exec'.
 
         Args:
-            Exec (str): Should be the Exec value if Type is Application,
-                Path if a File or Directory, or URL if a Link.
+            Exec (Union[list[str],str]): The argv from getArgv for the
+                Exec value if Type is Application, Path if a File or
+                Directory, or URL if a Link. A str (the format of
+                getExec) is split using shlex.
             Type (str): "Directory", "File", OR "Application"
             cwd (str, optional) Set this to the value of the 'Path' key
                 if present to set the current working directory in the
                 subprocess.
         '''
-        echo1('* _run("{}", "{}", cwd="{}")'.format(Exec, Type, cwd))
+        return BLink.run_plan(BLink._plan(Exec, Type, cwd=cwd))
+
+    @staticmethod
+    def _plan(Exec, Type, cwd=None):
+        '''Decide what _run should run, without running it.
+
+        See _run for documentation of the arguments.
+
+        Returns:
+            Command: A launch plan (See run_plan).
+        '''
+        echo1('* _plan("{}", "{}", cwd="{}")'.format(Exec, Type, cwd))
         # tryCmd = "geany"  # See `app` variable instead.
         # TODO: try os.popen('open "{}"') on mac
         # NOTE: %USERPROFILE%, $HOME, ~, or such should already be
         #   replaced by getExec.
-        exists_fn = os.path.isfile
-        execParts = shlex.split(Exec)
-        if len(execParts) > 1:
-            Exec = execParts[0]
+        exists_fn = path_isfile
+        if isinstance(Exec, (list, tuple)):
+            execParts = list(Exec)
+        else:
+            execParts = shlex.split(Exec)
+        if not execParts:
+            raise ValueError("There is nothing to run for Type={}"
+                             .format(Type))
+        Exec = execParts[0]
         if Type == "Directory":
-            exists_fn = os.path.isdir
+            exists_fn = path_isdir
         elif Type == "Application":
             echo0('* running application {}'.format(execParts))
-            return BLink._run_parts(execParts, check=True, cwd=cwd)
+            program = execParts[0]
+            if not os.path.dirname(program):
+                # Store the full path so the cached plan can be checked
+                #   (None if not installed, so there is nothing to check).
+                program = cached_which(program,
+                                       more_paths=[sysdirs['LOCAL_BIN']])
+            return BLink._plan_parts(execParts, cwd=cwd, target=program)
         elif Type == "Link":
             def true_fn():
                 echo0('* assuming "{}" exists.'.format(Exec))
@@ -1502,19 +1776,17 @@ class BLink:
         if platform.system() == "Windows":
             if (len(Exec) >= 2) and (Exec[1] == ":"):
                 # starts with "C:" or another drive letter
-                if not os.path.exists(Exec):
+                if not path_exists(Exec):
                     raise FileNotFoundError(
                         "The Exec target doesn't exist: {}"
                         "".format(Exec)
                     )
-            os.startfile(Exec, 'open')
             # run_fn('cmd /c start "{}"'.format(Exec))
-            return 0
+            return Command(startfile=Exec, target=Exec)
         if Type == "Directory":
             echo0('* opening directory "{}"'.format(Exec))
-            execParts = ['xdg-open', not_quoted(Exec, key='_run() arg')]
-            return BLink._run_parts(execParts, check=True, cwd=cwd)
-        thisOpenCmd = None
+            execParts = ['xdg-open', Exec]
+            return BLink._plan_parts(execParts, cwd=cwd, target=execParts[1])
         if "://" not in Exec:
             if not exists_fn(Exec):
                 raise FileNotFoundError(
@@ -1522,7 +1794,6 @@ class BLink:
                     ''.format(Exec)
                 )
         if Type == "Link":
-            thisOpenCmd = 'xdg-open'
             '''
             if len(parts) == 1:
                 raise ValueError(
@@ -1531,41 +1802,48 @@ class BLink:
                     "".format(parts[1], parts)
                 )
             '''
-            return BLink._run_parts([thisOpenCmd, Exec], check=True)
-        try:
-            if Type == "File":
-                # thisOpenCmd = tryCmd
-                # FIXME: There should be a better way to solve this. The
-                #   infinite recursion only happens if the type of file
-                #   being opened (The file type of the path in the Exec
-                #   line) is associated with blnk.
-                echo0("  - thisOpenCmd={}...".format(thisOpenCmd))
-                if thisOpenCmd == "xdg-open":
-                    raise ValueError(
-                        '{} was blocked to prevent infinite'
-                        ' recursion in case the file type of {} is'
-                        ' associated with blnk.'
-                        ''.format(thisOpenCmd, Exec)
-                    )
-                return BLink._run_parts([thisOpenCmd, Exec], check=True)
-        except OSError as ex:
-            try:
-                echo0(str(ex))
-                thisOpenCmd = "open"
-                logger.warning("  - thisOpenCmd={}...".format(thisOpenCmd))
-                return BLink._run_parts([thisOpenCmd, Exec], check=True)
-            except OSError as ex2:
-                echo0(str(ex2))
-                thisOpenCmd = "xdg-launch"
-                logger.warning("  - trying {}...".format(thisOpenCmd))
-                return BLink._run_parts([thisOpenCmd, Exec], check=True)
-        except subprocess.CalledProcessError as ex:
-            # raise subprocess.CalledProcessError(
-            #     "{} couldn't open the Exec target: \"{}\""
-            #     "".format(thisOpenCmd, Exec)
-            # )
-            raise ex
-        return 1  # This should never happen.
+            return BLink._plan_parts(['xdg-open', Exec])
+        # Type is "File" (run chooses the app for a File before calling
+        #   _run, since if thisOpenCmd were "xdg-open" here and the file
+        #   type were associated with blnk, there would be infinite
+        #   recursion):
+        return BLink._plan_app(Exec)
+
+    @staticmethod
+    def _plan_parts(parts, cwd=None, target=None, target_blnk_type=False):
+        '''Make a launch plan for a command (See _run_parts for args).
+
+        Args:
+            target (str, optional): The file or directory that must
+                still exist for the plan to be reused (See
+                blnk.plan_cache).
+
+        Returns:
+            Command: A launch plan (See run_plan).
+        '''
+        parts, cwd = BLink._resolve_parts(parts, cwd=cwd,
+                                          target_blnk_type=target_blnk_type)
+        return Command(argv=parts, cwd=cwd, target=target)
+
+    @staticmethod
+    def run_plan(plan, strategy=None):
+        '''Run a launch plan made by plan (or _plan).
+
+        Args:
+            plan (Command): What to run (or its to_dict form).
+            strategy (str, optional): See _spawn_parts (os.startfile
+                never waits, so it ignores this).
+
+        Returns:
+            int: The return code of the process (0 if OK).
+        '''
+        if isinstance(plan, dict):
+            plan = Command.from_dict(plan)
+        if plan.startfile is not None:
+            os.startfile(plan.startfile, 'open')
+            return 0
+        return BLink._spawn_parts(plan.argv, check=True, cwd=plan.cwd,
+                                  strategy=strategy)
 
     def _choose_app(self, path):
         '''Choose an application and run it.
@@ -1573,79 +1851,91 @@ class BLink:
         Type is "File" (only use _run instead of _choose_app if Type is
         Application).
         '''
-        global settings
-        prefix = "_choose_app"
+        return BLink.run_plan(BLink._plan_app(path))
+
+    @staticmethod
+    def _plan_app(path):
+        '''Choose an application (See _choose_app) without running it.
+
+        Returns:
+            Command: A launch plan (See run_plan).
+        '''
+        prefix = "_plan_app"
         cwd = None
         # cwd = os.path.dirname(os.path.realpath(self.path))
         # logger.info('  - set cwd="{}"'.format(cwd))
         # ^ Leave cwd as None since it should only be set by
         #   the 'Path' key of the shortcut.
         logger.warning("  - choosing app for \"{}\"".format(path))
+        target = path
         app = "geany"
-        # If you set blnk to handle unknown files:
-        more_parts = []
-        orig_app = app
-        cmd_parts = None
-        more_missing = []
-        associations = settings['file_type_associations']
-        for dotExt, args in associations.items():
-            if path.lower().endswith(dotExt):
-                if isinstance(args, list):
-                    app = args[0]
-                    more_parts = args[1:]
-                else:
-                    app = args
-                if which(app) is not None:
-                    break
-                else:
-                    more_missing.append(app)
-                # else keep looking for other options
-                if which(app) is not None:
-                    app = which(app)  # in case not in path
-                cmd_parts = [app] + more_parts + [path]
+        # ^ If you set blnk to handle unknown files
+        dotExt = os.path.splitext(path)[1]
+        argv, more_missing = get_handlers().resolve(path, cached_which)
 
         # shlex.split is NOT necessary since _choose_app should
         # NOT run for executables (Type=Application).
 
-        '''
-        absPath = self.getAbs(path)
-        if os.path.splitext(path)[1] == "" and os.access(absPath, os.X_OK):
-            # app = path
-            # more_parts = []
-            cmd_parts =
-        '''
-        if which(app) is None:
-            echo0(prefix+"{} is not in the system PATH.".format(app))
-            dotExt = os.path.splitext(path)[1]
-            missing_msg = ""
-            if len(more_missing) > 0:
-                missing_msg = " (and any of: {})".format(more_missing)
-            logger.warning(
-                '    "{}"{} is missing so {} will open {}.'
-                .format(app, missing_msg, orig_app, dotExt))
-            app = orig_app
-            more_parts = []
-        else:
-            app = which(app)
         if path.lower().endswith(".nja"):
             path = os.path.split(path)[0]
             # ^ With the -p option, Ninja-IDE will only open a directory
             #   (with or without an nja, but not the nja file directly).
-        logger.warning("    - app={}".format(app))
-        if cmd_parts is None:
-            return BLink._run_parts(
-                [app] + more_parts + [path],
-                cwd=cwd,
-            )
-        else:
-            return BLink._run_parts(
-                cmd_parts,
-                cwd=cwd,
-            )
+        if argv is None:
+            if more_missing:
+                logger.warning(
+                    '    {} {} missing so {} will open {}.'
+                    .format(more_missing,
+                            "is" if len(more_missing) == 1 else "are",
+                            app, dotExt))
+            if cached_which(app) is None:
+                echo0(prefix+"{} is not in the system PATH.".format(app))
+            else:
+                app = cached_which(app)
+            argv = [app]
+        logger.warning("    - app={}".format(argv[0]))
+        return BLink._plan_parts(
+            argv + [path],
+            cwd=cwd,
+            target=target,
+        )
+
+    def resolve_target(self):
+        '''Get what run would open, without opening it or choosing an
+        application.
+
+        This uses the same keys and getExec rewriting as plan.
+
+        Returns:
+            tuple(str, str): The Type and the target (a URL if Type is
+                Link, the executable if Type is Application, otherwise
+                a file or directory). The target is None if the
+                shortcut doesn't have one.
+        '''
+        Type = self.get('Type')
+        if Type == "Link":
+            return Type, self.get('URL')
+        source_key = 'Exec'
+        split = True
+        if Type in ["Directory", "File"]:
+            if self.get('Path') is not None:
+                source_key = 'Path'
+                split = False
+        argv, err = self.getArgv(key=source_key, split=split)
+        if not argv:
+            return Type, None
+        return Type, argv[0]
 
     def run(self):
         '''Run the BLink object.
         '''
+        return BLink.run_plan(self.plan())
+
+    def plan(self):
+        '''Decide what run should run, without running it.
+
+        Returns:
+            Command: A launch plan (See run_plan).
+        '''
 
         '''
         section = None
@@ -1664,10 +1954,10 @@ class BLink:
                 raise SyntaxError(
                     "if Type={} then URL should be set.".format(Type)
                 )
-            return BLink._run(url, Type)
+            return BLink._plan([url], Type)
         source_key = 'Exec'
         split = True
-        if self.get('Type') in ["Directory", "File"]:
+        if Type in ["Directory", "File"]:
             # old_v = self.get('Exec')
             try_v = self.get('Path')
             if try_v is not None:
@@ -1679,65 +1969,44 @@ class BLink:
                 #   is resolved.
                 split = False
 
-        execStr, err = self.getExec(key=source_key, split=split)
-        # ^ Adds single quotes as necessary!
+        argv, err = self.getArgv(key=source_key, split=split)
         # ^ Makes the path absolute
-        if self.get('Type') in ["Directory", "File"]:
-            if not execStr:
+        if Type in ["Directory", "File"]:
+            if not argv:
                 raise KeyError("Missing {}".format(source_key))
-            if not os.path.exists(not_quoted(execStr)):
+            if not path_exists(argv[0]):
                 raise FileNotFoundError('There is no "{}"'
-                                        .format(execStr))
-            # Do *not change to not_quoted yet* though, or _run
-            #   will split it wrong if there are spaces!
-        # exec_parts = None
+                                        .format(argv[0]))
         if err is not None:
             echo0(err)
-        if execStr is None:
+        if argv is None:
             echo0("* Exec is None so choosing app...")
-            return self._choose_app(self.path)
+            return BLink._plan_app(self.path)
             # ^ Open the file itself since it is *not* in .blnk format.
             #   (Not XDG, but see [The XDG desktop file spec alludes to
             #   Directory as a Type of desktop file but doesn't define a
             #   standard for
             #   it.](gitlab.freedesktop.org/xdg/xdg-utils/-/issues/210)
-        else:
-            # exec_parts = shlex.split(execStr)
-            # ^ Do *not* use (removes backslashes on Windows)
-            # if source_key == 'Path':  # comment since if Directory, run it
-            if self.get("Type") == "File":
-                # execStr = not_quoted(execStr, key=source_key)
-                # execStr = exec_parts[0]  # removes backslashes
-                # if len(exec_parts) > 1:
-                #     raise ValueError("Extra parts (expected file for Exec,"
-                #                      " but got: {})".format(exec_parts))
-                echo0("* Type={} so choosing app...".format(Type))
-                # RETURN EARLY for file
-                return self._choose_app(execStr)
-        # else only Run the execStr itself if type is Application!
-
-        # RETURNED already unless neither no Exec nor Type "File"
-
-        # ensure version with quotes etc. isn't used:
-        # del execStr
-
-        # - However, _run detects Type=Directory and handles that.
-        # echo0("Trying _run...")
-        cwd, PathErr = self.getExec(key='Path')
-        # ^ Resolves relative paths, but also adds quotes, so:
-        cwd = not_quoted(cwd)
+        if Type == "File":
+            echo0("* Type={} so choosing app...".format(Type))
+            # RETURN EARLY for file
+            return BLink._plan_app(argv[0])
+        # else only Run the argv itself if type is Application!
+
+        # - However, _plan detects Type=Directory and handles that.
+        cwd = None
+        cwd_argv, PathErr = self.getArgv(key='Path', split=False)
         if PathErr is not None:
             echo0(PathErr)
         else:
-            echo1("* there is no PathErr from getExec(key='cwd') in run.")
+            cwd = cwd_argv[0]
             echo1('  - cwd="{}"'.format(cwd))
 
         # Type is "Application" or "Directory" if we didn't return yet,
         #   usually (neither missing Exec nor is Type "File").
-        #   - _run should split parts (for relative, see getExec)
-        #     *only if* Type is "Application"
-        #   - Type is detected automatically.
-        return BLink._run(execStr, self.get('Type'), cwd=cwd)
+        #   - argv is only split into several parts if Type is
+        #     "Application" (See getArgv).
+        return BLink._plan(argv, Type, cwd=cwd)
 
 
 dtLines = [
@@ -1782,6 +2051,7 @@ def create_icon(dtPath):
             iconCommandParts = ["xdg-desktop-icon", "install",
                                 "--novendor"]
             cmdParts = iconCommandParts + [dtPath]
+            import subprocess
             try:
                 BLink._run_parts(cmdParts)
             except subprocess.CalledProcessError:
@@ -1791,8 +2061,259 @@ def create_icon(dtPath):
                 echo0(str(cmdParts))
 
 
+_plan_cache = None
+_path_rules = None
+_handlers = None
+_case_resolver = None
+_resolve_config = None
+
+ResolveConfig = namedtuple("ResolveConfig", ["bases", "ignore_case",
+                                             "probe_timeout"])
+ResolveConfig.__doc__ = '''The settings used to resolve paths (See
+get_resolve_config).
+
+Attributes:
+    bases (tuple[str]): The directories that could contain a Windows
+        path (See BLink.BASES).
+    ignore_case (bool): See settings['ignore_case'].
+    probe_timeout (float): See settings['probe_timeout'].
+'''
+
+
+def get_resolve_config():
+    """Get the settings used to resolve paths, as they were when this
+    was first called (or configure was last called), so every thread
+    resolving at the same time uses the same ones.
+
+    Returns:
+        ResolveConfig: The settings (read-only).
+    """
+    global _resolve_config
+    if _resolve_config is None:
+        with _init_lock:
+            if _resolve_config is None:
+                _resolve_config = ResolveConfig(
+                    bases=tuple(BLink.BASES),
+                    ignore_case=bool(settings["ignore_case"]),
+                    probe_timeout=settings["probe_timeout"],
+                )
+    return _resolve_config
+
+
+def configure(bases=None, **changes):
+    """Change settings after shortcuts may have been loaded.
+
+    The shared objects made from settings are made again when next
+    used. A shortcut being resolved in another thread meanwhile uses
+    either all of the old settings or all of the new ones.
+
+    Args:
+        bases (Iterable[str], optional): Replace the bases in
+            get_resolve_config (BLink.BASES isn't changed).
+        changes: New values for keys in settings.
+
+    Raises:
+        KeyError: If a key isn't in settings.
+    """
+    global _resolve_config, _case_resolver, _plan_cache, _handlers
+    for key in changes:
+        if key not in settings:
+            raise KeyError("There is no setting named {}".format(key))
+    with _init_lock:
+        config = get_resolve_config()
+        settings.update(changes)
+        if bases is not None:
+            config = config._replace(bases=tuple(bases))
+        _resolve_config = config._replace(
+            ignore_case=bool(settings["ignore_case"]),
+            probe_timeout=settings["probe_timeout"],
+        )
+        _case_resolver = None
+        _plan_cache = None
+        _handlers = None
+
+
+def get_path_rules():
+    """Get the rules that rewrite Windows paths (See blnk/pathrules.py):
+    the defaults, then any in the user's path_rules.json.
+
+    Returns:
+        PathRules: The rules (compiled once per process).
+    """
+    global _path_rules
+    if _path_rules is None:
+        with _init_lock:
+            if _path_rules is None:
+                _path_rules = _load_path_rules()
+    return _path_rules
+
+
+def _load_path_rules():
+    from blnk.pathrules import PathRules, get_rules_path, load_config
+    variables = dict(sysdirs)
+    if BLink.cloud_name is not None:
+        variables["CLOUD_NAME"] = BLink.cloud_name
+    path_rules = PathRules(variables=variables)
+    try:
+        config = load_config()
+    except ValueError as ex:
+        logger.error("Ignoring {}: {}".format(get_rules_path(), ex))
+        config = {"rules": [], "renames": {}}
+    for rule in config["rules"]:
+        path_rules.add(rule)
+    for old, new in config["renames"].items():
+        path_rules.add_rename(old, new)
+    return path_rules
+
+
+def get_case_resolver():
+    """Get the resolver that finds Windows paths with the wrong case
+    (See blnk.listing.CaseInsensitiveResolver). It is only used if
+    ignore_case is True (See get_resolve_config).
+
+    Returns:
+        CaseInsensitiveResolver: The resolver (one per process, so its
+            caches are shared by every lookup).
+    """
+    global _case_resolver
+    if _case_resolver is None:
+        from blnk.listing import CaseInsensitiveResolver
+        with _init_lock:
+            if _case_resolver is None:
+                _case_resolver = CaseInsensitiveResolver(
+                    timeout=get_resolve_config().probe_timeout)
+    return _case_resolver
+
+
+def get_plan_cache():
+    """Get the launch plan cache (See blnk/plan_cache.py).
+
+    Returns:
+        PlanCache: The cache, or None if settings['plan_cache'] is
+            False.
+    """
+    global _plan_cache
+    if not settings.get("plan_cache"):
+        return None
+    if _plan_cache is None:
+        with _init_lock:
+            if _plan_cache is None:
+                _plan_cache = _load_plan_cache()
+    return _plan_cache
+
+
+def _load_plan_cache():
+    from blnk.appdirs import get_cache_dir
+    from blnk.plan_cache import PlanCache
+    config = get_resolve_config()
+    context = {
+        "sysdirs": dict(sysdirs),
+        "BASES": config.bases,
+        "cloud_name": BLink.cloud_name,
+        "path_rules": get_path_rules().rules,
+        "renames": get_path_rules().renames,
+        "ignore_case": config.ignore_case,
+        "associations": get_handlers().chains,
+        "platform": platform.system(),
+    }
+    return PlanCache(os.path.join(get_cache_dir(), "plans"),
+                     context=context, exists=path_exists,
+                     state=lambda: [_bases_state(config.bases),
+                                    which_key()])
+
+
+def _bases_state(bases):
+    # A path is translated to the first BASES directory that has it (See
+    #   BLink._translate), so a plan made before one appeared (such as
+    #   when the cloud folder is mounted) is stale.
+    state = []
+    for base in bases:
+        try:
+            state.append(path_isdir(base))
+        except ProbeTimeout:
+            state.append(None)
+    return state
+
+
+def _run_cached_plan(path):
+    """Run the cached launch plan for path if there is a valid one.
+
+    Returns:
+        int: The return code, or None if there was no valid plan (or
+            the plan's program is gone) so the caller should load path.
+    """
+    plan_cache = get_plan_cache()
+    if plan_cache is None:
+        return None
+    plan = _get_cached_plan(plan_cache, path)
+    if plan is None:
+        return None
+    logger.info('* using the cached launch plan for "{}"'.format(path))
+    try:
+        return BLink.run_plan(plan)
+    except FileNotFoundError as ex:
+        # Nothing was started (The program may have been removed).
+        logger.warning("  - discarding the cached plan: {}".format(ex))
+        plan_cache.discard(path)
+    return None
+
+
+def _cache_plan(path, link, plan):
+    plan_cache = get_plan_cache()
+    if plan_cache is None:
+        return
+    values = []
+    for section in link.tree.values():
+        values.extend(section.values())
+    plan_cache.put(path, plan.to_dict(), values=values)
+
+
+def _get_cached_plan(plan_cache, path):
+    data = plan_cache.get(path)
+    if data is None:
+        return None
+    try:
+        return Command.from_dict(data)
+    except ValueError:
+        return None
+
+
+def plan_file(path):
+    """Decide how run_file would open path, without running anything.
+
+    The plan cache is used and filled the same way as in run_file.
+
+    Args:
+        path (str): A blnk file, or any other file (which is planned
+            to open using _choose_app's logic).
+
+    Returns:
+        Command: A launch plan (See BLink.run_plan).
+    """
+    plan_cache = get_plan_cache()
+    if plan_cache is not None:
+        plan = _get_cached_plan(plan_cache, path)
+        if plan is not None:
+            return plan
+    try:
+        link = BLink(path)
+    except FileTypeError:
+        return BLink._plan_app(path)
+    if not link.is_blnk():
+        # such as a binary file that couldn't be decoded
+        return BLink._plan_app(path)
+    plan = link.plan()
+    _cache_plan(path, link, plan)
+    return plan
+
+
 def run_file(path, enable_gui=True):
     '''Run a blnk file.
+
+    If settings['plan_cache'] is True, the launch plan is cached so
+    running the same unchanged shortcut again skips parsing and
+    resolving it (See blnk/plan_cache.py).
+
     Args:
         enable_gui (bool, optional): Try to show a tk messagebox for
             errors if True. Defaults to True.
@@ -1801,6 +2322,8 @@ def run_file(path, enable_gui=True):
         int: 0 if OK, otherwise there was an error.
     '''
     try:
+        if _run_cached_plan(path) is not None:
+            return 0
         link = BLink(path, blnk_format_only=False)
         # ^ This path is the blnk file, not its target.
         # if link.path:
@@ -1811,13 +2334,15 @@ def run_file(path, enable_gui=True):
         #   fails.
         # New way:
         if link.is_blnk():
-            link.run()
+            plan = link.plan()
+            _cache_plan(path, link, plan)
+            BLink.run_plan(plan)
         # else load already ran _choose_app
         return 0
     except FileTypeError:
         pass
         # already handled by Blink
-    except FileNotFoundError as ex:
+    except (FileNotFoundError, ProbeTimeout) as ex:
         # echo0(get_traceback())
         # msg = "The file was not found: {} {}".format(ex, get_traceback())
         # msg = get_traceback()
@@ -1868,6 +2393,8 @@ def name_from_url(url):
 
 def required_length(count_min, count_max):
     # See <https://stackoverflow.com/a/4195302>
+    import argparse
+
     class RequiredLength(argparse.Action):
         def __call__(self, parser, args, values, option_string=None):
             if not count_min <= len(values) <= count_max:
@@ -1897,7 +2424,32 @@ def dump_args(args):
     print("args.update={}".format(args.update), file=sys.stderr)
 
 
-def main():
+# Each subcommand is in its own module (imported only if used) and its
+#   function takes the remaining arguments as a list.
+SUBCOMMANDS = OrderedDict([
+    ("index", ("blnk.catalog", "index_main")),
+    ("query", ("blnk.catalog", "query_main")),
+    ("check", ("blnk.check", "check_main")),
+    ("run", ("blnk.batch", "run_main")),
+    ("update", ("blnk.update", "update_main")),
+])
+
+
+def run_subcommand(name, argv):
+    import importlib
+    module_name, function_name = SUBCOMMANDS[name]
+    module = importlib.import_module(module_name)
+    return getattr(module, function_name)(argv)
+
+
+def main(argv=None):
+    import argparse
+    logging.basicConfig(level=logging.DEBUG)  # format='%(message)s'
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and (argv[0] in SUBCOMMANDS) and not os.path.exists(argv[0]):
+        # ^ A file named like a subcommand can still be run.
+        return run_subcommand(argv[0], argv[1:])
     parser = argparse.ArgumentParser(
         prog="blnk",
         description=__doc__,
@@ -1941,8 +2493,36 @@ def main():
     group = parser.add_mutually_exclusive_group()
     group.add_argument("-v", "--verbose")
     group.add_argument("-V", "--debug")
+    parser.add_argument(
+        "--daemon", action='store_true',
+        help=("Keep blnk loaded and serve requests forwarded by"
+              " scripts/blnk over a Unix domain socket (See"
+              " blnk/daemon.py)."),
+    )
+
+    parser.add_argument(
+        "--launch", choices=["wait", "detach", "exec", "posix_spawn"],
+        help=("How to start the target (default: {}; See"
+              " blnk/launch.py). Use detach, exec or posix_spawn so blnk"
+              " doesn't stay resident until the program exits."
+              .format(settings["launch_strategy"])),
+    )
+
+    parser.add_argument(
+        "--ignore-case", action='store_true',
+        help=("If a Windows path in the shortcut isn't found, look for"
+              " it again ignoring case (such as D:\\meshes\\Tree.OBJ"
+              " as ~/Nextcloud/Meshes/tree.obj)."),
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.launch:
+        settings["launch_strategy"] = args.launch
+    if args.ignore_case:
+        configure(ignore_case=True)
+    if args.daemon:
+        from blnk.daemon import serve
+        return serve()
     args.target = None
     args.name = None
     if args.create_shortcut:
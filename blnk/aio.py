@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+'''
+asyncio API for launchers that are themselves asyncio-based.
+
+Usage:
+    returncode = await blnk.aio.run_file(path, timeout=10)
+    link = await BLink.aload(path)
+
+Loading and planning (parsing, probing paths and choosing a program)
+are the same as for the blocking API (See blnk.plan_file) but run in
+the event loop's executor, so a slow or hung mount doesn't block the
+loop. The program is started with asyncio.create_subprocess_exec.
+
+Strategies (See blnk/launch.py):
+- wait: Await the program's exit. If the call is cancelled or times
+  out, the program is terminated (then killed after TERMINATE_SECONDS)
+  unless terminate=False.
+- detach and posix_spawn: Start the program in its own session with its
+  standard streams on os.devnull and return right away. It is reaped in
+  the background by the event loop.
+- exec: Never replaces the process running an event loop, so it is the
+  same as detach.
+'''
+import asyncio
+import os
+import shlex
+import subprocess
+
+from hierosoft.logging2 import getLogger
+
+from blnk import (
+    BLink,
+    get_plan_cache,
+    plan_file,
+    settings,
+)
+from blnk.command import Command
+
+logger = getLogger(__name__)
+
+TERMINATE_SECONDS = 5.0
+
+_detached = set()  # tasks that reap detached programs
+
+
+def _run_blocking(fn, *args):
+    return asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+
+async def load(path, cls=BLink):
+    '''Load a blnk file without blocking the event loop (See
+    BLink.aload).
+
+    Args:
+        path (str): The blnk file.
+        cls (type, optional): BLink or a subclass of it to load path
+            into.
+
+    Raises:
+        FileTypeError: If path isn't a blnk file (It is never run with
+            another program, unlike BLink(path, blnk_format_only=False)).
+    '''
+    return await _run_blocking(cls, path)
+
+
+async def plan(path):
+    '''Decide how to open path without blocking the event loop (See
+    blnk.plan_file).
+
+    Returns:
+        Command: A launch plan.
+    '''
+    return await _run_blocking(plan_file, path)
+
+
+async def _reap(proc):
+    try:
+        await proc.wait()
+    finally:
+        _detached.discard(asyncio.current_task())
+
+
+async def _stop(proc):
+    if proc.returncode is not None:
+        return
+    try:
+        proc.terminate()
+        try:
+            await asyncio.wait_for(proc.wait(), TERMINATE_SECONDS)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+    except ProcessLookupError:
+        pass  # It already exited.
+
+
+async def run_plan(plan, strategy=None, check=True, terminate=True):
+    '''Run a launch plan (See BLink.run_plan).
+
+    Args:
+        plan (Command): What to run (or its to_dict form).
+        strategy (str, optional): See the module docstring. Defaults to
+            settings['launch_strategy'].
+        check (bool, optional): Raise CalledProcessError if the program
+            fails (only for wait).
+        terminate (bool, optional): Terminate the program if this is
+            cancelled while waiting for it.
+
+    Returns:
+        int: The return code of the program (0 if not waited for).
+
+    Raises:
+        FileNotFoundError: If the program doesn't exist.
+    '''
+    if isinstance(plan, dict):
+        plan = Command.from_dict(plan)
+    if plan.startfile is not None:
+        await _run_blocking(os.startfile, plan.startfile, 'open')
+        return 0
+    if strategy is None:
+        strategy = settings.get("launch_strategy")
+    parts = plan.argv
+    logger.warning('* running "{}" ({})...'.format(parts, strategy))
+    kwargs = {}
+    if strategy != "wait":
+        kwargs = {
+            "stdin": subprocess.DEVNULL,
+            "stdout": subprocess.DEVNULL,
+            "stderr": subprocess.DEVNULL,
+            "start_new_session": True,
+        }
+    try:
+        proc = await asyncio.create_subprocess_exec(*parts, cwd=plan.cwd,
+                                                    **kwargs)
+    except FileNotFoundError as ex:
+        raise FileNotFoundError(
+            "Running external application `{}` failed: {}"
+            .format(shlex.join(parts), ex))
+    if strategy != "wait":
+        task = asyncio.ensure_future(_reap(proc))
+        _detached.add(task)
+        return 0
+    try:
+        returncode = await proc.wait()
+    except asyncio.CancelledError:
+        if terminate:
+            await asyncio.shield(_stop(proc))
+        raise
+    if check and returncode:
+        raise subprocess.CalledProcessError(returncode, parts)
+    return returncode
+
+
+async def run_file(path, timeout=None, strategy=None, check=True,
+                   terminate=True):
+    '''Open a blnk file (or any other file, with the program chosen for
+    it) like blnk.run_file, without blocking the event loop.
+
+    Unlike blnk.run_file, errors are raised rather than shown.
+
+    Args:
+        path (str): The file.
+        timeout (float, optional): Give up (raising asyncio.TimeoutError)
+            if the file isn't planned and the program hasn't exited by
+            then (or started, if not waiting for it).
+        strategy (str, optional): See run_plan.
+        check (bool, optional): See run_plan.
+        terminate (bool, optional): See run_plan (this also applies to a
+            timeout).
+
+    Returns:
+        int: The return code of the program (0 if not waited for).
+
+    Raises:
+        FileNotFoundError: If path or the program doesn't exist.
+        ProbeTimeout: If a mount needed to resolve path didn't respond.
+    '''
+    async def _run():
+        try:
+            return await run_plan(await plan(path), strategy=strategy,
+                                  check=check, terminate=terminate)
+        except FileNotFoundError:
+            # The program may have been removed since the plan was
+            #   cached (as in blnk._run_cached_plan).
+            plan_cache = get_plan_cache()
+            if plan_cache is not None:
+                plan_cache.discard(path)
+            raise
+    return await asyncio.wait_for(_run(), timeout)
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+'''
+Per-user directories where blnk keeps its own files (not shortcuts),
+such as caches and settings.
+
+blnk/__init__.py imports this module and the others it is built on
+(such as blnk.probe and blnk.handlers) while it is being imported, so
+none of them may import from blnk/__init__ at module level, which
+would be a circular import. They import each other directly instead
+(such as blnk.probe importing this module).
+'''
+import os
+import platform
+import sys
+import tempfile
+
+APP_NAME = "blnk"
+
+
+def get_cache_dir():
+    '''Get the directory for blnk's caches (which may not exist yet).
+
+    Set the BLNK_CACHE_DIR environment variable to override it.
+
+    Returns:
+        str: Such as ~/.cache/blnk on Linux.
+    '''
+    path = os.environ.get("BLNK_CACHE_DIR")
+    if path:
+        return path
+    if platform.system() == "Windows":
+        base = os.environ.get("LOCALAPPDATA")
+        if not base:
+            base = os.path.join(os.path.expanduser("~"), "AppData", "Local")
+        return os.path.join(base, APP_NAME, "Cache")
+    if sys.platform == "darwin":
+        return os.path.join(os.path.expanduser("~"), "Library", "Caches",
+                            APP_NAME)
+    base = os.environ.get("XDG_CACHE_HOME")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, APP_NAME)
+
+
+def get_config_dir():
+    '''Get the directory for blnk's settings (which may not exist yet).
+
+    Set the BLNK_CONFIG_DIR environment variable to override it.
+
+    Returns:
+        str: Such as ~/.config/blnk on Linux.
+    '''
+    path = os.environ.get("BLNK_CONFIG_DIR")
+    if path:
+        return path
+    if platform.system() == "Windows":
+        base = os.environ.get("APPDATA")
+        if not base:
+            base = os.path.join(os.path.expanduser("~"), "AppData",
+                                "Roaming")
+        return os.path.join(base, APP_NAME)
+    if sys.platform == "darwin":
+        return os.path.join(os.path.expanduser("~"), "Library",
+                            "Application Support", APP_NAME)
+    base = os.environ.get("XDG_CONFIG_HOME")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".config")
+    return os.path.join(base, APP_NAME)
+
+
+def get_system_config_dirs():
+    '''Get the directories for system-wide settings of blnk (which
+    may not exist), least important first.
+
+    Returns:
+        list[str]: Such as ["/etc/xdg/blnk"] on Linux (one for each
+            directory in XDG_CONFIG_DIRS).
+    '''
+    if platform.system() == "Windows":
+        base = os.environ.get("PROGRAMDATA")
+        if not base:
+            return []
+        return [os.path.join(base, APP_NAME)]
+    if sys.platform == "darwin":
+        return [os.path.join("/Library", "Application Support", APP_NAME)]
+    config_dirs = os.environ.get("XDG_CONFIG_DIRS") or "/etc/xdg"
+    # The first directory is the most important (See the XDG Base
+    #   Directory spec).
+    return [os.path.join(path, APP_NAME)
+            for path in reversed(config_dirs.split(os.pathsep)) if path]
+
+
+def write_atomic(path, data, mode=None):
+    '''Write bytes to path through a temporary file and a rename, so
+    readers never see a partial file.
+
+    Args:
+        path (str): The destination. Its directory is created if
+            necessary.
+        data (bytes): The entire new content.
+        mode (int, optional): The permissions of the new file (such as
+            those of the file being replaced). Otherwise only the user
+            can read it, as for tempfile.mkstemp.
+    '''
+    parent = os.path.dirname(path)
+    if parent and not os.path.isdir(parent):
+        os.makedirs(parent, exist_ok=True)
+    # A unique name, since other threads may write the same path:
+    fd, tmp_path = tempfile.mkstemp(dir=parent or None,
+                                    prefix=os.path.basename(path) + ".",
+                                    suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as outs:
+            outs.write(data)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+'''
+Batch Runner
+------------
+Open many files (such as shortcuts selected in a file manager) in one
+process instead of starting Python once per file.
+
+Usage:
+    blnk run <file>
+    blnk run --batch [-0] [--jobs <n>] [--dry-run] [--launch <strategy>]
+                     [<file>...]
+
+With --batch, paths are taken from the arguments, or from stdin (one
+per line, or NUL-separated with -0) if there are none. Each file is
+resolved (See blnk.plan_file) in a bounded thread pool, then all of
+them are launched. The URLs of Type=Link shortcuts are passed to the
+browser together when it supports that (See blnk/browser.py) unless
+--separate-urls. Problems are reported together at the end (in one
+dialog unless --non-interactive), instead of stopping at the first one.
+
+--dry-run writes one JSON object per file (its argv and cwd, or its
+error) and a summary line without launching anything, so resolution
+can be timed by itself.
+'''
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from blnk import (
+    BLink,
+    configure,
+    get_plan_cache,
+    logger,
+    plan_file,
+    run_file,
+    settings,
+    showMsgBoxOrErr,
+)
+from blnk.browser import coalesce_url_plans
+
+DEFAULT_JOBS = 8
+
+
+def read_paths(stream, null=False):
+    '''Read paths from a binary stream such as sys.stdin.buffer.
+
+    Args:
+        null (bool, optional): Paths are separated by NUL (as from
+            `find -print0`) instead of newlines.
+
+    Returns:
+        list[str]: The non-empty paths.
+    '''
+    data = stream.read()
+    separator = b"\0" if null else b"\n"
+    paths = []
+    for raw in data.split(separator):
+        if not null:
+            raw = raw.rstrip(b"\r")
+        if raw:
+            paths.append(os.fsdecode(raw))
+    return paths
+
+
+def _resolve(path):
+    try:
+        return {"path": path, "plan": plan_file(path)}
+    except Exception as ex:
+        return {"path": path,
+                "error": "{}: {}".format(type(ex).__name__, ex)}
+
+
+def resolve_all(paths, jobs=DEFAULT_JOBS):
+    '''Get the launch plan of each file concurrently.
+
+    Returns:
+        list[dict]: For each path (in the same order), "path" and either
+            "plan" (Command) or "error" (str).
+    '''
+    if (jobs <= 1) or (len(paths) <= 1):
+        return [_resolve(path) for path in paths]
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(_resolve, paths))
+
+
+def _launch_one(result, strategy=None, plan_cache=None):
+    try:
+        BLink.run_plan(result["plan"], strategy=strategy)
+    except Exception as ex:
+        if plan_cache is not None:
+            # The plan may be stale (such as if the program was
+            #   removed), so don't use it next time.
+            plan_cache.discard(result["path"])
+        result["error"] = "{}: {}".format(type(ex).__name__, ex)
+
+
+def launch_all(results, strategy=None, coalesce_urls=True):
+    '''Launch each resolved plan, recording errors in results.
+
+    Args:
+        results (list[dict]): The output of resolve_all. "error" is set
+            in any item that fails to launch.
+        strategy (str, optional): See blnk/launch.py.
+        coalesce_urls (bool, optional): Open the URLs of Type=Link
+            shortcuts in as few browser calls as possible (See
+            blnk/browser.py), falling back to one xdg-open per URL.
+    '''
+    plan_cache = get_plan_cache()
+    pending = [result for result in results if "error" not in result]
+    if coalesce_urls:
+        groups = coalesce_url_plans([result["plan"] for result in pending])
+    else:
+        groups = [(result["plan"], [i]) for i, result in enumerate(pending)]
+    for plan, indices in groups:
+        if plan is pending[indices[0]]["plan"]:
+            # It wasn't combined with any others.
+            _launch_one(pending[indices[0]], strategy=strategy,
+                        plan_cache=plan_cache)
+            continue
+        try:
+            BLink.run_plan(plan, strategy=strategy)
+            continue
+        except Exception as ex:
+            logger.warning("* opening {} URLs at once failed ({}: {}),"
+                           " so opening them one at a time"
+                           .format(len(indices), type(ex).__name__, ex))
+        for i in indices:
+            _launch_one(pending[i], strategy=strategy,
+                        plan_cache=plan_cache)
+
+
+def plan_to_json(result):
+    '''Get the dry-run output for one item from resolve_all.'''
+    if "error" in result:
+        return {"path": result["path"], "error": result["error"]}
+    plan = result["plan"]
+    if plan.startfile is not None:
+        return {"path": result["path"], "startfile": plan.startfile}
+    return {"path": result["path"], "argv": plan.argv, "cwd": plan.cwd}
+
+
+def run_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="blnk run",
+        description="Open one file, or many files at once with --batch.",
+    )
+    parser.add_argument("paths", nargs="*", metavar="file")
+    parser.add_argument("--batch", action="store_true",
+                        help=("Open every file given (or read from stdin"
+                              " if none are given)"))
+    parser.add_argument("-0", "--null", action="store_true",
+                        help="Paths from stdin are separated by NUL")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                        help=("The maximum number of threads resolving"
+                              " files (default: {})".format(DEFAULT_JOBS)))
+    parser.add_argument("--dry-run", action="store_true",
+                        help=("Write each file's argv and cwd as JSON"
+                              " instead of launching anything"))
+    parser.add_argument(
+        "--launch", choices=["wait", "detach", "exec", "posix_spawn"],
+        help=("How to start each program (See blnk/launch.py; default"
+              " for --batch: detach, so the programs open together)"),
+    )
+    parser.add_argument("--separate-urls", action="store_true",
+                        help=("Open each URL with its own xdg-open call"
+                              " instead of passing them to the browser"
+                              " together"))
+    parser.add_argument("--ignore-case", action="store_true",
+                        help=("Find Windows paths in shortcuts even if"
+                              " their case is wrong (See blnk"
+                              " --ignore-case)"))
+    parser.add_argument("-y", "--non-interactive", action="store_true",
+                        help="Report errors without a GUI dialog")
+    args = parser.parse_args(argv)
+    if args.ignore_case:
+        configure(ignore_case=True)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    enable_gui = not args.non_interactive
+    if not args.batch:
+        if len(args.paths) != 1:
+            parser.error("Expected one file (use --batch for several)")
+        if args.launch:
+            settings["launch_strategy"] = args.launch
+        if args.dry_run:
+            print(json.dumps(plan_to_json(resolve_all(args.paths)[0])))
+            return 0
+        return run_file(args.paths[0], enable_gui=enable_gui)
+    paths = args.paths
+    if not paths:
+        stdin = getattr(sys.stdin, "buffer", sys.stdin)
+        paths = read_paths(stdin, null=args.null)
+    strategy = args.launch
+    if strategy is None:
+        strategy = "detach"
+    elif (strategy == "exec") and (len(paths) > 1):
+        parser.error("--launch exec can only open one file")
+    start = time.time()
+    results = resolve_all(paths, jobs=args.jobs)
+    resolve_seconds = time.time() - start
+    if args.dry_run:
+        for result in results:
+            print(json.dumps(plan_to_json(result)))
+    else:
+        launch_all(results, strategy=strategy,
+                   coalesce_urls=not args.separate_urls)
+    errors = [result for result in results if "error" in result]
+    summary = {
+        "count": len(results),
+        "errors": len(errors),
+        "resolve_seconds": round(resolve_seconds, 3),
+        "seconds": round(time.time() - start, 3),
+        "jobs": args.jobs,
+    }
+    if args.dry_run:
+        print(json.dumps({"summary": summary}))
+    else:
+        logger.info("* batch: {}".format(summary))
+    if not errors:
+        return 0
+    if not args.dry_run:
+        msg = "{} of {} files couldn't be opened:\n{}".format(
+            len(errors), len(results),
+            "\n".join("- {}: {}".format(result["path"], result["error"])
+                      for result in errors),
+        )
+        showMsgBoxOrErr(msg, enable_gui=enable_gui)
+    return 1
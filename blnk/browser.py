@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+'''
+Open many URLs with as few browser processes as possible.
+
+xdg-open only takes one URL, so opening N Type=Link shortcuts the usual
+way makes N separate remote-open handshakes with the browser. Instead,
+the default web browser is looked up the way xdg-mime does (the
+x-scheme-handler/https entry in the mimeapps.list files, then the
+.desktop file it names). If its Exec line has the %U field code it
+accepts several URLs, so the URLs are passed to it in chunks. Otherwise
+(or if no browser can be found), each URL is opened with xdg-open as
+before. On macOS, `open` accepts several URLs itself.
+'''
+import os
+import platform
+import shlex
+
+from blnk.command import Command
+
+MAX_URLS_PER_CALL = 20
+MAX_ARGV_CHARS = 32768  # far below ARG_MAX, even with a big environment
+
+URL_SCHEME_TYPE = "x-scheme-handler/https"
+
+
+def get_config_dirs():
+    config_home = (os.environ.get("XDG_CONFIG_HOME")
+                   or os.path.join(os.path.expanduser("~"), ".config"))
+    config_dirs = os.environ.get("XDG_CONFIG_DIRS") or "/etc/xdg"
+    return [config_home] + [path for path in config_dirs.split(os.pathsep)
+                            if path]
+
+
+def get_data_dirs():
+    data_home = (os.environ.get("XDG_DATA_HOME")
+                 or os.path.join(os.path.expanduser("~"), ".local",
+                                 "share"))
+    data_dirs = (os.environ.get("XDG_DATA_DIRS")
+                 or "/usr/local/share:/usr/share")
+    return [data_home] + [path for path in data_dirs.split(os.pathsep)
+                          if path]
+
+
+def get_mimeapps_paths():
+    '''Get the mimeapps.list files in order of precedence (See the XDG
+    MIME Applications Associations spec).
+    '''
+    desktops = [name.lower() for name in
+                os.environ.get("XDG_CURRENT_DESKTOP", "").split(":")
+                if name]
+    paths = []
+    for config_dir in get_config_dirs():
+        for desktop in desktops:
+            paths.append(os.path.join(config_dir,
+                                      desktop + "-mimeapps.list"))
+        paths.append(os.path.join(config_dir, "mimeapps.list"))
+    for data_dir in get_data_dirs():
+        applications = os.path.join(data_dir, "applications")
+        for desktop in desktops:
+            paths.append(os.path.join(applications,
+                                      desktop + "-mimeapps.list"))
+        paths.append(os.path.join(applications, "mimeapps.list"))
+    return paths
+
+
+def read_ini_values(path, section, key):
+    '''Get a key's value in one section of an ini-style file.
+
+    Returns:
+        str: The value, or None if the file, section or key is missing.
+    '''
+    try:
+        with open(path, 'r') as ins:
+            current = None
+            for line in ins:
+                line = line.strip()
+                if line.startswith("[") and line.endswith("]"):
+                    current = line[1:-1]
+                    continue
+                if current != section:
+                    continue
+                name, sign, value = line.partition("=")
+                if sign and (name.strip() == key):
+                    return value.strip()
+    except (IOError, OSError, UnicodeDecodeError):
+        pass
+    return None
+
+
+def find_default_browser_desktop():
+    '''Find the .desktop file of the default web browser.
+
+    Returns:
+        str: The path, or None if not found.
+    '''
+    for mimeapps_path in get_mimeapps_paths():
+        value = read_ini_values(mimeapps_path, "Default Applications",
+                                URL_SCHEME_TYPE)
+        if not value:
+            continue
+        for name in value.split(";"):
+            name = name.strip()
+            if not name:
+                continue
+            for data_dir in get_data_dirs():
+                path = os.path.join(data_dir, "applications", name)
+                if os.path.isfile(path):
+                    return path
+    return None
+
+
+def get_multi_url_command(desktop_path=None):
+    '''Get the command that opens several URLs at once.
+
+    Args:
+        desktop_path (str, optional): The browser's .desktop file.
+            Defaults to find_default_browser_desktop().
+
+    Returns:
+        tuple(list[str], list[str]): The arguments before and after
+            the URLs, or None if the browser (or the platform) can't
+            open several URLs in one call.
+    '''
+    if platform.system() == "Darwin":
+        return ["open"], []
+    if platform.system() == "Windows":
+        return None
+    if desktop_path is None:
+        desktop_path = find_default_browser_desktop()
+    if desktop_path is None:
+        return None
+    exec_value = read_ini_values(desktop_path, "Desktop Entry", "Exec")
+    if not exec_value:
+        return None
+    try:
+        parts = shlex.split(exec_value)
+    except ValueError:
+        return None
+    if "%U" not in parts:
+        return None
+    i = parts.index("%U")
+    # Drop other field codes (such as %i and %c), which only make sense
+    #   to a launcher that has the icon and name.
+    before = [part.replace("%%", "%") for part in parts[:i]
+              if not (len(part) == 2 and part.startswith("%")
+                      and part != "%%")]
+    after = [part.replace("%%", "%") for part in parts[i+1:]
+             if not (len(part) == 2 and part.startswith("%")
+                     and part != "%%")]
+    if not before:
+        return None
+    return before, after
+
+
+def chunk_urls(urls, max_count=MAX_URLS_PER_CALL,
+               max_chars=MAX_ARGV_CHARS):
+    '''Split urls into lists that each fit on one command line.
+
+    Yields:
+        list[str]: Up to max_count URLs with up to max_chars characters
+            in total (a longer single URL gets its own list).
+    '''
+    chunk = []
+    chars = 0
+    for url in urls:
+        if chunk and ((len(chunk) >= max_count)
+                      or (chars + len(url) + 1 > max_chars)):
+            yield chunk
+            chunk = []
+            chars = 0
+        chunk.append(url)
+        chars += len(url) + 1
+    if chunk:
+        yield chunk
+
+
+def get_link_url(plan):
+    '''Get the URL if plan only opens a URL with xdg-open.
+
+    Returns:
+        str: The URL, or None if plan does anything else.
+    '''
+    argv = plan.argv
+    if (not argv) or (len(argv) != 2):
+        return None
+    if os.path.basename(argv[0]) != "xdg-open":
+        return None
+    if "://" not in argv[1]:
+        return None
+    return argv[1]
+
+
+def coalesce_url_plans(plans, command=None):
+    '''Combine the plans that only open a URL into browser calls.
+
+    Args:
+        plans (list[Command]): Launch plans (See BLink.run_plan).
+        command (tuple, optional): See get_multi_url_command (which is
+            only called if there are at least 2 URLs).
+
+    Returns:
+        list[tuple(Command, list[int])]: Each plan to run, with the
+            indices of the plans it replaces (so that the caller can
+            fall back to those if it fails). A plan that wasn't
+            combined is returned as is.
+    '''
+    url_indices = []
+    results = []
+    for i, plan in enumerate(plans):
+        if get_link_url(plan) is None:
+            results.append((plan, [i]))
+        else:
+            url_indices.append(i)
+    if len(url_indices) < 2:
+        return [(plans[i], [i]) for i in range(len(plans))]
+    if command is None:
+        command = get_multi_url_command()
+    if command is None:
+        return [(plans[i], [i]) for i in range(len(plans))]
+    before, after = command
+    urls = [plans[i].argv[1] for i in url_indices]
+    start = 0
+    for chunk in chunk_urls(urls):
+        indices = url_indices[start:start+len(chunk)]
+        start += len(chunk)
+        results.append((Command(argv=before + chunk + after), indices))
+    return results
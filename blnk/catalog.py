@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+'''
+Shortcut Catalog
+----------------
+Index .blnk files in whole directory trees into a local SQLite database
+so questions such as "which shortcuts are Type=Link" or "which were
+created on host X" don't require opening every file.
+
+Usage:
+    blnk index [--db <database>] [--prune <pattern>]... <dir>...
+    blnk query [--db <database>] [--type <Type>] [--hostname <host>]
+               [--name <pattern>] [--target <pattern>] [--under <dir>]
+               [--errors] [--limit <n>] [--jsonl]
+
+Only files whose size or mtime changed since the last index are parsed
+again, and rows for files that no longer exist under an indexed
+directory are removed.
+'''
+from __future__ import print_function
+
+import argparse
+import fnmatch
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from blnk.appdirs import get_cache_dir
+from blnk.record import read_record as read_shortcut_record
+
+CATALOG_NAME = "catalog.sqlite3"
+
+DEFAULT_PRUNE = [".git", ".svn", ".hg", "__pycache__"]
+
+COLUMNS = (
+    "path",
+    "size",
+    "mtime_ns",
+    "type",
+    "name",
+    "target_key",
+    "target",
+    "created",
+    "modified",
+    "accessed",
+    "hostname",
+    "error",
+    "indexed_at",
+)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS shortcuts (
+    path TEXT PRIMARY KEY,
+    size INTEGER,
+    mtime_ns INTEGER,
+    type TEXT,
+    name TEXT,
+    target_key TEXT,
+    target TEXT,
+    created TEXT,
+    modified TEXT,
+    accessed TEXT,
+    hostname TEXT,
+    error TEXT,
+    indexed_at REAL
+);
+CREATE INDEX IF NOT EXISTS shortcuts_type ON shortcuts (type);
+CREATE INDEX IF NOT EXISTS shortcuts_hostname ON shortcuts (hostname);
+'''
+
+
+def get_catalog_path():
+    return os.path.join(get_cache_dir(), CATALOG_NAME)
+
+
+def connect(db_path=None):
+    '''Open (and create if necessary) the catalog database.'''
+    if db_path is None:
+        db_path = get_catalog_path()
+    parent = os.path.dirname(db_path)
+    if parent and not os.path.isdir(parent):
+        os.makedirs(parent)
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def is_pruned(name, prune):
+    for pattern in prune:
+        if fnmatch.fnmatch(name, pattern):
+            return True
+    return False
+
+
+def walk_blnk_files(root, prune=None, entry_map=None):
+    '''Find .blnk files using os.scandir.
+
+    Args:
+        root (str): The directory to search recursively.
+        prune (list[str], optional): fnmatch patterns for names of
+            files or directories to skip.
+        entry_map (dict, optional): Store each os.DirEntry of each
+            directory here by path (before any file in the directory is
+            yielded) so that their stat can be reused, such as for
+            shortcut targets in the same tree (See blnk/update.py).
+
+    Yields:
+        tuple(str, os.stat_result): The path and stat of each file.
+    '''
+    if prune is None:
+        prune = DEFAULT_PRUNE
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError as ex:
+            print("Warning: skipped {}: {}".format(directory, ex),
+                  file=sys.stderr)
+            continue
+        if entry_map is not None:
+            for entry in entries:
+                entry_map[entry.path] = entry
+        for entry in entries:
+            if is_pruned(entry.name, prune):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.lower().endswith(".blnk"):
+                    yield entry.path, entry.stat()
+            except OSError as ex:
+                print("Warning: skipped {}: {}".format(entry.path, ex),
+                      file=sys.stderr)
+
+
+def read_record(path):
+    '''Parse the fields the catalog stores from a blnk file (See
+    blnk.record.read_record).
+
+    Returns:
+        dict: Values for COLUMNS (except path, size, mtime_ns and
+            indexed_at).
+    '''
+    record = read_shortcut_record(path)._asdict()
+    del record["path"]
+    record["error"] = None
+    return record
+
+
+def _under(root):
+    '''Get an SQL condition matching paths under root.
+
+    The prefix is compared exactly, since LIKE ignores the case of ASCII
+    letters (and treats "%" and "_" as wildcards).
+
+    Returns:
+        tuple(str, list): The condition and its parameters.
+    '''
+    prefix = root.rstrip(os.sep) + os.sep
+    return "substr(path, 1, ?) = ?", [len(prefix), prefix]
+
+
+def index_tree(conn, root, prune=None):
+    '''Update the catalog for one directory tree.
+
+    Returns:
+        dict: Counts of "seen", "parsed", "unchanged", "removed" and
+            "errors".
+    '''
+    root = os.path.abspath(root)
+    counts = {"seen": 0, "parsed": 0, "unchanged": 0, "removed": 0,
+              "errors": 0}
+    known = {}
+    condition, params = _under(root)
+    cursor = conn.execute(
+        "SELECT path, size, mtime_ns FROM shortcuts WHERE " + condition,
+        params)
+    for path, size, mtime_ns in cursor:
+        known[path] = (size, mtime_ns)
+    seen = set()
+    rows = []
+    for path, stat in walk_blnk_files(root, prune=prune):
+        counts["seen"] += 1
+        seen.add(path)
+        if known.get(path) == (stat.st_size, stat.st_mtime_ns):
+            counts["unchanged"] += 1
+            continue
+        try:
+            record = read_record(path)
+        except Exception as ex:
+            # Store it anyway so it can be found with `blnk query --errors`
+            record = {"error": "{}: {}".format(type(ex).__name__, ex)}
+            counts["errors"] += 1
+        record["path"] = path
+        record["size"] = stat.st_size
+        record["mtime_ns"] = stat.st_mtime_ns
+        record["indexed_at"] = time.time()
+        rows.append(tuple(record.get(column) for column in COLUMNS))
+        counts["parsed"] += 1
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO shortcuts ({}) VALUES ({})".format(
+                ", ".join(COLUMNS), ", ".join("?" for _ in COLUMNS)),
+            rows,
+        )
+        gone = [(path,) for path in known if path not in seen]
+        conn.executemany("DELETE FROM shortcuts WHERE path = ?", gone)
+        counts["removed"] = len(gone)
+    return counts
+
+
+def query(conn, shortcut_type=None, hostname=None, name=None, target=None,
+          under=None, errors=False, limit=None):
+    '''Get catalog rows matching all of the given conditions.
+
+    Args:
+        name (str, optional): A glob pattern (case-sensitive) for Name.
+        target (str, optional): A glob pattern for the target.
+        under (str, optional): Only include shortcuts under this
+            directory.
+        errors (bool, optional): Only include files that couldn't be
+            parsed.
+
+    Returns:
+        list[dict]: One dict per shortcut (keys are COLUMNS).
+    '''
+    conditions = []
+    params = []
+    if shortcut_type is not None:
+        conditions.append("type = ?")
+        params.append(shortcut_type)
+    if hostname is not None:
+        conditions.append("hostname = ?")
+        params.append(hostname)
+    if name is not None:
+        conditions.append("name GLOB ?")
+        params.append(name)
+    if target is not None:
+        conditions.append("target GLOB ?")
+        params.append(target)
+    if under is not None:
+        condition, under_params = _under(os.path.abspath(under))
+        conditions.append(condition)
+        params.extend(under_params)
+    if errors:
+        conditions.append("error IS NOT NULL")
+    sql = "SELECT {} FROM shortcuts".format(", ".join(COLUMNS))
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY path"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit)
+    return [dict(zip(COLUMNS, row)) for row in conn.execute(sql, params)]
+
+
+def index_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="blnk index",
+        description="Add .blnk files in directory trees to the catalog.",
+    )
+    parser.add_argument("directories", nargs="+", metavar="dir")
+    parser.add_argument("--db", help="The catalog database (default: {})"
+                        .format(get_catalog_path()))
+    parser.add_argument(
+        "--prune", action="append", metavar="pattern",
+        help=("Skip files or directories with names matching this"
+              " glob pattern (can be repeated; default: {})"
+              .format(DEFAULT_PRUNE)),
+    )
+    args = parser.parse_args(argv)
+    conn = connect(args.db)
+    try:
+        for root in args.directories:
+            start = time.time()
+            counts = index_tree(conn, root, prune=args.prune)
+            counts["directory"] = os.path.abspath(root)
+            counts["seconds"] = round(time.time() - start, 3)
+            print(json.dumps(counts))
+    finally:
+        conn.close()
+    return 0
+
+
+def query_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="blnk query",
+        description="Find shortcuts in the catalog (See `blnk index`).",
+    )
+    parser.add_argument("--db", help="The catalog database (default: {})"
+                        .format(get_catalog_path()))
+    parser.add_argument("--type", dest="shortcut_type",
+                        help="Such as Link, Directory, File or Application")
+    parser.add_argument("--hostname",
+                        help="The host where the shortcut was created")
+    parser.add_argument("--name", help="A glob pattern for Name")
+    parser.add_argument("--target", help="A glob pattern for the target")
+    parser.add_argument("--under", metavar="dir",
+                        help="Only show shortcuts under this directory")
+    parser.add_argument("--errors", action="store_true",
+                        help="Only show files that couldn't be parsed")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--jsonl", action="store_true",
+                        help="Write one JSON object per line")
+    args = parser.parse_args(argv)
+    conn = connect(args.db)
+    try:
+        rows = query(conn, shortcut_type=args.shortcut_type,
+                     hostname=args.hostname, name=args.name,
+                     target=args.target, under=args.under,
+                     errors=args.errors, limit=args.limit)
+    finally:
+        conn.close()
+    if args.jsonl:
+        for row in rows:
+            print(json.dumps(row))
+    else:
+        print(json.dumps(rows, indent=2))
+    return 0
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+'''
+Broken Shortcut Checker
+-----------------------
+Find .blnk files whose target (after the same cross-platform rewriting
+that run uses, See BLink.resolve_target) no longer exists.
+
+Usage:
+    blnk check [--jobs <n>] [--all] [--prune <pattern>]... <dir>...
+
+Each file is loaded, resolved and its target checked in a bounded
+thread pool, so slow network or FUSE mounts overlap instead of
+serializing. One JSON object is written per line as results arrive
+(only problems unless --all), then a summary line with the time spent
+in each phase.
+'''
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    wait,
+)
+
+from blnk import (
+    BLink,
+    ProbeTimeout,
+    cached_which,
+    path_exists,
+)
+from blnk.catalog import (
+    DEFAULT_PRUNE,
+    walk_blnk_files,
+)
+
+DEFAULT_JOBS = 16
+
+PHASES = ("walk", "load", "resolve", "stat")
+
+
+class PhaseTimer(object):
+    '''Add up the time spent in each phase across threads.'''
+    def __init__(self):
+        self.totals = {phase: 0.0 for phase in PHASES}
+        self._lock = threading.Lock()
+
+    def add(self, phase, seconds):
+        with self._lock:
+            self.totals[phase] += seconds
+
+
+def target_exists(Type, target):
+    '''Check whether a target from BLink.resolve_target exists.
+
+    Returns:
+        bool: True if it exists (an Application's executable may also
+            be found in the PATH).
+
+    Raises:
+        ProbeTimeout: If the target's mount didn't respond (See
+            blnk.path_exists).
+    '''
+    if path_exists(target):
+        return True
+    if (Type == "Application") and (os.path.dirname(target) == ""):
+        return cached_which(target) is not None
+    return False
+
+
+def check_file(path, timer):
+    '''Check one shortcut.
+
+    Returns:
+        dict: "path", "status" ("ok", "missing", "skipped" (such as for
+            Type=Link) or "error") and, depending on the status, "type",
+            "target" and "error".
+    '''
+    result = {"path": path}
+    start = time.time()
+    try:
+        link = BLink(path=path)
+    except Exception as ex:
+        timer.add("load", time.time() - start)
+        result["status"] = "error"
+        result["error"] = "{}: {}".format(type(ex).__name__, ex)
+        return result
+    loaded = time.time()
+    timer.add("load", loaded - start)
+    try:
+        Type, target = link.resolve_target()
+    except Exception as ex:
+        timer.add("resolve", time.time() - loaded)
+        result["status"] = "error"
+        result["error"] = "{}: {}".format(type(ex).__name__, ex)
+        return result
+    resolved = time.time()
+    timer.add("resolve", resolved - loaded)
+    result["type"] = Type
+    result["target"] = target
+    if target is None:
+        result["status"] = "error"
+        result["error"] = "There is no target."
+    elif (Type == "Link") or ("://" in target):
+        result["status"] = "skipped"
+    else:
+        try:
+            if target_exists(Type, target):
+                result["status"] = "ok"
+            else:
+                result["status"] = "missing"
+        except ProbeTimeout as ex:
+            result["status"] = "error"
+            result["error"] = "{}: {}".format(type(ex).__name__, ex)
+    timer.add("stat", time.time() - resolved)
+    return result
+
+
+def check_trees(roots, jobs=DEFAULT_JOBS, prune=None, timer=None):
+    '''Check every shortcut under the given directories.
+
+    Args:
+        roots (list[str]): Directories to search recursively.
+        jobs (int, optional): The maximum number of threads.
+        prune (list[str], optional): See blnk.catalog.walk_blnk_files.
+        timer (PhaseTimer, optional): Add the time of each phase to
+            this.
+
+    Yields:
+        dict: The result of check_file for each shortcut, in the order
+            they finish.
+    '''
+    if timer is None:
+        timer = PhaseTimer()
+    # Limit how many paths are queued so huge trees don't use a lot of
+    #   memory before any results are written:
+    max_pending = jobs * 4
+    pending = set()
+    ready = deque()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for root in roots:
+            walk_start = time.time()
+            for path, _ in walk_blnk_files(root, prune=prune):
+                timer.add("walk", time.time() - walk_start)
+                pending.add(executor.submit(check_file, path, timer))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending,
+                                         return_when=FIRST_COMPLETED)
+                    ready.extend(future.result() for future in done)
+                while ready:
+                    yield ready.popleft()
+                walk_start = time.time()
+            timer.add("walk", time.time() - walk_start)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def check_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="blnk check",
+        description=("Find shortcuts whose targets don't exist, writing"
+                     " JSON lines as they are found."),
+    )
+    parser.add_argument("directories", nargs="+", metavar="dir")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                        help="The maximum number of threads (default: {})"
+                        .format(DEFAULT_JOBS))
+    parser.add_argument("--all", action="store_true",
+                        help="Also write shortcuts that are OK or skipped")
+    parser.add_argument(
+        "--prune", action="append", metavar="pattern",
+        help=("Skip files or directories with names matching this"
+              " glob pattern (can be repeated; default: {})"
+              .format(DEFAULT_PRUNE)),
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    timer = PhaseTimer()
+    counts = {}
+    start = time.time()
+    for result in check_trees(args.directories, jobs=args.jobs,
+                              prune=args.prune, timer=timer):
+        status = result["status"]
+        counts[status] = counts.get(status, 0) + 1
+        if args.all or (status in ("missing", "error")):
+            print(json.dumps(result))
+            sys.stdout.flush()
+    summary = {
+        "counts": counts,
+        "seconds": round(time.time() - start, 3),
+        # The other phases overlap (they add up the time of each thread):
+        "thread_seconds": {phase: round(seconds, 3)
+                           for phase, seconds in timer.totals.items()},
+        "jobs": args.jobs,
+    }
+    print(json.dumps({"summary": summary}))
+    if counts.get("missing") or counts.get("error"):
+        return 1
+    return 0
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+'''
+The resolved form of a shortcut: what to run, where, and for which
+target (See BLink.plan and BLink.run_plan).
+
+argv stays a list from the moment the shortcut's value is split (See
+BLink.getArgv) until it is spawned, so paths with spaces or quotes are
+never joined, re-split or unquoted again along the way. It is only
+rendered as a string for messages.
+'''
+import shlex
+
+
+class Command(object):
+    '''A launch plan.
+
+    Attributes:
+        argv (list[str]): The program and its arguments (None if
+            startfile is set).
+        cwd (str): The working directory for the program, or None.
+        target (str): The file or directory that must still exist for
+            a cached plan to be reused (See blnk.plan_cache), or None.
+        startfile (str): On Windows, open this with os.startfile
+            instead of running argv.
+    '''
+    def __init__(self, argv=None, cwd=None, target=None, startfile=None):
+        if (argv is None) == (startfile is None):
+            raise ValueError("Set either argv or startfile.")
+        self.argv = list(argv) if argv is not None else None
+        self.cwd = cwd
+        self.target = target
+        self.startfile = startfile
+
+    def __str__(self):
+        if self.startfile is not None:
+            return "startfile {}".format(shlex.quote(self.startfile))
+        result = " ".join(shlex.quote(part) for part in self.argv)
+        if self.cwd is not None:
+            result += " (in {})".format(shlex.quote(self.cwd))
+        return result
+
+    def __repr__(self):
+        return "Command({})".format(
+            ", ".join("{}={!r}".format(key, value)
+                      for key, value in self.to_dict().items()))
+
+    def __eq__(self, other):
+        if not isinstance(other, Command):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def to_dict(self):
+        '''Get the JSON-serializable form (See from_dict).'''
+        if self.startfile is not None:
+            return {"startfile": self.startfile, "target": self.target}
+        return {"argv": list(self.argv), "cwd": self.cwd,
+                "target": self.target}
+
+    @classmethod
+    def from_dict(cls, data):
+        '''Make a Command from the output of to_dict.
+
+        Raises:
+            ValueError: If data has neither argv nor startfile.
+        '''
+        return cls(argv=data.get("argv"), cwd=data.get("cwd"),
+                   target=data.get("target"),
+                   startfile=data.get("startfile"))
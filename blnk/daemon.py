@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+'''
+Blnk Launcher Daemon
+--------------------
+Keep the blnk module (and hierosoft) loaded and serve run, create and
+update requests over a Unix domain socket, so that each click on a
+.blnk file doesn't pay for interpreter startup, imports and argparse
+setup.
+
+Start it with `blnk --daemon` (for example, from the desktop session's
+autostart). scripts/blnk forwards its arguments to the daemon if one is
+listening, otherwise it runs main() in-process as before.
+
+Protocol (one request per connection):
+- The client sends one JSON line: {"argv": [...], "cwd": "...",
+  "env": {...}}, along with its stdin, stdout and stderr file
+  descriptors (SCM_RIGHTS) if the platform supports socket.send_fds.
+- The daemon forks, so each request gets its own copy of the already
+  imported module (and of any warm caches) plus its own cwd and
+  environment, then runs main() with the client's argv and standard
+  streams.
+- The daemon answers with one JSON line: {"returncode": <int>}.
+'''
+from __future__ import print_function
+
+import json
+import os
+import socket
+import socketserver
+import struct
+import sys
+import tempfile
+
+from blnk import (
+    echo0,
+    get_resolve_config,
+    get_traceback,
+    logger,
+    main,
+    probe_associations,
+)
+from blnk.launch import set_exec_allowed
+
+SOCKET_ENV_NAME = "BLNK_SOCKET"
+SOCKET_NAME = "blnk.sock"
+MAX_REQUEST_SIZE = 1024 * 1024
+
+
+def get_socket_path():
+    '''Get the path of the daemon's Unix domain socket.
+
+    scripts/blnk has a copy of this logic so that the client doesn't
+    have to import blnk (which would defeat the purpose of the daemon).
+    Keep them the same.
+
+    Returns:
+        str: The value of the BLNK_SOCKET environment variable if set,
+            otherwise blnk.sock in XDG_RUNTIME_DIR, otherwise a
+            per-user name in the temporary directory.
+    '''
+    path = os.environ.get(SOCKET_ENV_NAME)
+    if path:
+        return path
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, SOCKET_NAME)
+    return os.path.join(tempfile.gettempdir(),
+                        "blnk-{}.sock".format(os.getuid()))
+
+
+def _peer_uid(sock):
+    '''Get the uid of the process on the other end of sock.
+
+    Returns:
+        int: The uid, or None if the platform doesn't provide it.
+    '''
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    fmt = "3i"  # struct ucred: pid, uid, gid
+    creds = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED,
+                            struct.calcsize(fmt))
+    _, uid, _ = struct.unpack(fmt, creds)
+    return uid
+
+
+def _recv_request(sock):
+    '''Receive one JSON line and any file descriptors sent with it.
+
+    Returns:
+        tuple(dict, list[int]): The request and the descriptors.
+    '''
+    fds = []
+    if hasattr(socket, "recv_fds"):
+        data, fds, _, _ = socket.recv_fds(sock, 65536, 3)
+    else:
+        data = sock.recv(65536)
+    while data and not data.endswith(b"\n"):
+        if len(data) > MAX_REQUEST_SIZE:
+            raise ValueError("The request is too large.")
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return json.loads(data.decode("utf-8")), list(fds)
+
+
+def _redirect_std_fds(fds):
+    '''Replace this process' stdin, stdout and stderr with the client's.
+    '''
+    if len(fds) != 3:
+        for fd in fds:
+            os.close(fd)
+        return
+    sys.stdout.flush()
+    sys.stderr.flush()
+    for std_fd, fd in enumerate(fds):
+        os.dup2(fd, std_fd)
+        os.close(fd)
+
+
+def run_request(request):
+    '''Run main() the same way as if the client had run it.
+
+    This changes the process' environment, cwd and sys.argv, so only
+    call it in a forked child (as BLinkDaemon does).
+
+    Args:
+        request (dict): The decoded request (See module docstring).
+
+    Returns:
+        int: The return code of main(), 0 if OK.
+    '''
+    env = request.get("env")
+    if env is not None:
+        os.environ.clear()
+        os.environ.update(env)
+    cwd = request.get("cwd")
+    if cwd:
+        os.chdir(cwd)
+    sys.argv = ["blnk"] + list(request.get("argv", []))
+    try:
+        returncode = main()
+    except SystemExit as ex:
+        # such as from argparse
+        returncode = ex.code
+    except Exception:
+        echo0(get_traceback())
+        returncode = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    if returncode is None:
+        returncode = 0
+    elif not isinstance(returncode, int):
+        echo0(returncode)
+        returncode = 1
+    return returncode
+
+
+class BLinkRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        peer_uid = _peer_uid(sock)
+        if (peer_uid is not None) and (peer_uid != os.getuid()):
+            logger.error("Refused a request from uid {}".format(peer_uid))
+            return
+        request, fds = _recv_request(sock)
+        _redirect_std_fds(fds)
+        returncode = run_request(request)
+        response = json.dumps({"returncode": returncode}) + "\n"
+        sock.sendall(response.encode("utf-8"))
+
+
+class BLinkDaemon(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    '''Serve each request in a forked copy of the warm process.
+    '''
+    # Children may wait for a GUI application (until it closes), so
+    #   allow plenty of them and don't wait for them on shutdown:
+    max_children = 1024
+    block_on_close = False
+
+
+def warm():
+    '''Compute anything that is the same for every request, before
+    forking, so that each child inherits it.
+    '''
+    logger.info("BASES={}".format(get_resolve_config().bases))
+    probe_associations()
+    # A child must answer its client after launching, so it can't
+    #   replace itself with the program:
+    set_exec_allowed(False)
+
+
+def _remove_stale_socket(path):
+    '''Remove the socket file if no daemon is listening on it.
+
+    Raises:
+        RuntimeError: if another daemon is already listening.
+    '''
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.remove(path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError("A blnk daemon is already listening on \"{}\""
+                       .format(path))
+
+
+def serve(path=None):
+    '''Run the daemon until interrupted.
+
+    Args:
+        path (str, optional): The socket path. Defaults to
+            get_socket_path().
+
+    Returns:
+        int: 0 if stopped normally, otherwise 1.
+    '''
+    if not (hasattr(socket, "AF_UNIX") and hasattr(os, "fork")):
+        echo0("Error: --daemon requires Unix domain sockets and fork.")
+        return 1
+    if path is None:
+        path = get_socket_path()
+    try:
+        _remove_stale_socket(path)
+    except RuntimeError as ex:
+        echo0("Error: {}".format(ex))
+        return 1
+    warm()
+    old_umask = os.umask(0o077)
+    try:
+        server = BLinkDaemon(path, BLinkRequestHandler)
+    finally:
+        os.umask(old_umask)
+    echo0('* blnk daemon listening on "{}"'.format(path))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(path):
+            os.remove(path)
+    return 0
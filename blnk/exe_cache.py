@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+'''
+Persistent cache of executable lookups (results of which).
+
+Each uncached which call walks every PATH directory, and a launch can
+make several of them (See _choose_app and _run_parts in blnk). The
+results are stored in the user cache directory along with a key made
+of PATH and the mtime of each directory searched (Adding or removing a
+file changes the mtime of its directory), so a warm launch only stats
+the directories themselves and installing or removing software
+invalidates the cache automatically.
+'''
+import json
+import os
+import threading
+import time
+
+from blnk.appdirs import write_atomic
+
+CACHE_VERSION = 1
+
+
+class ExecutableCache(object):
+    '''Remember the results of a which function.
+
+    Only bare names (not paths) are cached, since a path doesn't
+    require a PATH walk.
+
+    Attributes:
+        path (str): The JSON file where the cache is stored.
+        resolve (callable): The uncached which function, called as
+            resolve(name) or resolve(name, more_paths=more_paths).
+        extra_dirs (list[str]): Directories that are searched in
+            addition to PATH (such as via more_paths, like
+            ~/.local/bin) so their mtimes are part of the key.
+        revalidate_seconds (float): How long to trust the key before
+            statting the directories again (matters for long-running
+            processes such as `blnk --daemon`).
+    '''
+    def __init__(self, path, resolve, extra_dirs=None,
+                 revalidate_seconds=1.0):
+        self.path = path
+        self.resolve = resolve
+        self.extra_dirs = list(extra_dirs) if extra_dirs else []
+        self.revalidate_seconds = revalidate_seconds
+        self._key = None
+        self._entries = None
+        self._checked = None
+        self._lock = threading.RLock()  # for threads in check or batch
+
+    def make_key(self):
+        '''Get the current cache key.
+
+        Returns:
+            list: PATH, PATHEXT (for Windows) and [directory, mtime_ns]
+                pairs (mtime_ns is None if the directory doesn't exist).
+        '''
+        env_path = os.environ.get("PATH", "")
+        dir_times = []
+        for directory in env_path.split(os.pathsep) + self.extra_dirs:
+            if not directory:
+                continue
+            try:
+                mtime_ns = os.stat(directory).st_mtime_ns
+            except OSError:
+                mtime_ns = None
+            dir_times.append([directory, mtime_ns])
+        return [env_path, os.environ.get("PATHEXT"), dir_times]
+
+    def _load(self):
+        key = self.make_key()
+        entries = {}
+        try:
+            with open(self.path, 'r') as ins:
+                data = json.load(ins)
+            if ((data.get("version") == CACHE_VERSION)
+                    and (data.get("key") == key)):
+                entries = data.get("entries", {})
+        except (OSError, ValueError):
+            # Missing or corrupt: start over.
+            pass
+        self._key = key
+        self._entries = entries
+        self._checked = time.time()
+
+    def _validate(self):
+        if self._entries is None:
+            self._load()
+            return
+        if time.time() - self._checked < self.revalidate_seconds:
+            return
+        key = self.make_key()
+        if key != self._key:
+            self._key = key
+            self._entries = {}
+        self._checked = time.time()
+
+    def get_key(self):
+        '''Get the key that the cached results are valid for (checked
+        at most once per revalidate_seconds, See make_key).
+        '''
+        with self._lock:
+            self._validate()
+            return self._key
+
+    def save(self):
+        data = {
+            "version": CACHE_VERSION,
+            "key": self._key,
+            "entries": self._entries,
+        }
+        try:
+            write_atomic(self.path, json.dumps(data).encode("utf-8"))
+        except OSError:
+            # The cache is only an optimization, so keep going.
+            pass
+
+    def which(self, name, more_paths=None):
+        '''Find an executable the same way as resolve, using the cache.
+
+        Returns:
+            str: The full path, or None if not found.
+        '''
+        if (not name) or (os.path.dirname(name) != ""):
+            if more_paths:
+                return self.resolve(name, more_paths=more_paths)
+            return self.resolve(name)
+        entry_key = name
+        if more_paths:
+            entry_key += "\0" + os.pathsep.join(more_paths)
+        with self._lock:
+            self._validate()
+            if entry_key in self._entries:
+                return self._entries[entry_key]
+        if more_paths:
+            result = self.resolve(name, more_paths=more_paths)
+        else:
+            result = self.resolve(name)
+        with self._lock:
+            self._entries[entry_key] = result
+            self.save()
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self.save()
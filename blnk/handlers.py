@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+'''
+Choose the program that opens a file that isn't blnk (See
+BLink._plan_app).
+
+Each suffix (such as ".csv" or ".tar.gz", case-insensitive) has a
+chain of handlers: argument lists that start with the program, tried
+in order until one is installed. Suffixes are indexed by lowercase
+suffix, so a path is matched by looking up each of its own suffixes
+(longest first) rather than checking every association. If no handler
+for the longest suffix is installed, shorter ones are tried (so .tar.gz
+can fall back to .gz).
+
+Associations in associations.json in each system config directory and
+then the user's (See get_config_paths) replace the defaults for the
+same suffix. For example:
+
+    {
+        "associations": {
+            ".csv": [["libreoffice", "--calc"], ["gnumeric"]],
+            ".tar.gz": ["file-roller"],
+            ".log": "geany"
+        }
+    }
+
+A value can be a program, one handler (a list of arguments) or a chain
+(a list of handlers).
+
+Which handler of a suffix is installed is worked out once (See
+HandlerRegistry.resolve) using a which function such as
+blnk.cached_which, whose results persist between runs, and again only
+if the registry's key function (such as blnk.which_key) says that
+software may have been installed or removed.
+'''
+import json
+import os
+import platform
+import threading
+
+ASSOCIATIONS_NAME = "associations.json"
+
+LIBREOFFICE_FLATPAK = [
+    "flatpak", "run", "--branch=stable", "--arch=x86_64",
+    "--command=libreoffice", "org.libreoffice.LibreOffice",
+]
+
+
+def _default_associations():
+    # Handle issues where the OS considers "BLNK" and all of these file
+    #   extensions as "text/plain" rather than allowing them to be
+    #   associated with separate programs.
+    python = [["python"]]
+    csv = [["libreoffice", "--calc"]]
+    if platform.system() == "Windows":
+        python.insert(0, ["py", "-3"])
+    else:
+        csv.append(LIBREOFFICE_FLATPAK + ["--calc"])
+    return {
+        ".kdb": [["keepassxc"]],
+        ".kdbx": [["keepassxc"]],
+        ".pyw": python,
+        ".py": python,
+        ".nja": [["ninja-ide", "-p"]],  # required for opening projects
+        ".csv": csv,
+        ".pdf": [["xdg-open"]],  # See blnk.preferred_pdf_viewers
+    }
+
+
+DEFAULT_ASSOCIATIONS = _default_associations()
+# ^ Besides associations there is also a special case necessary for
+#   ninja-ide to change the file to the containing folder (See
+#   BLink._plan_app).
+
+
+def get_config_paths():
+    '''Get the associations files (which may not exist), least
+    important first.
+    '''
+    from blnk.appdirs import get_config_dir, get_system_config_dirs
+    directories = get_system_config_dirs() + [get_config_dir()]
+    return [os.path.join(directory, ASSOCIATIONS_NAME)
+            for directory in directories]
+
+
+def to_chain(value):
+    '''Get the chain of handlers from an association's value.
+
+    Args:
+        value (Union[str,list]): A program, a handler (list[str]) or a
+            chain (list[list[str]]).
+
+    Returns:
+        list[list[str]]: The handlers.
+
+    Raises:
+        ValueError: If value is none of those.
+    '''
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, (list, tuple)) or not value:
+        raise ValueError("An association must be a program, a list of"
+                         " arguments or a list of those: {!r}"
+                         .format(value))
+    if all(isinstance(part, str) for part in value):
+        return [list(value)]
+    chain = []
+    for handler in value:
+        if isinstance(handler, str):
+            handler = [handler]
+        if ((not isinstance(handler, (list, tuple))) or (not handler)
+                or not all(isinstance(part, str) for part in handler)):
+            raise ValueError("A handler must be a list of arguments: {!r}"
+                             .format(handler))
+        chain.append(list(handler))
+    return chain
+
+
+def load_config(path):
+    '''Read an associations file.
+
+    Returns:
+        dict: The associations in the file (empty if it doesn't exist).
+
+    Raises:
+        ValueError: If the file isn't valid JSON, isn't a JSON object,
+            or an association isn't valid (See to_chain).
+    '''
+    try:
+        with open(path, 'r') as ins:
+            data = json.load(ins)
+    except (IOError, OSError):
+        return {}
+    if not isinstance(data, dict):
+        raise ValueError("{} should contain a JSON object, not {}"
+                         .format(path, type(data).__name__))
+    associations = data.get("associations") or {}
+    if not isinstance(associations, dict):
+        raise ValueError("\"associations\" in {} should be an object,"
+                         " not {}"
+                         .format(path, type(associations).__name__))
+    associations = dict(associations)
+    for suffix, value in associations.items():
+        try:
+            to_chain(value)
+        except ValueError as ex:
+            raise ValueError("{} in {} ({})".format(ex, path, suffix))
+    return associations
+
+
+def _fold(suffix):
+    suffix = suffix.lower()
+    if not suffix.startswith("."):
+        suffix = "." + suffix
+    return suffix
+
+
+class HandlerRegistry(object):
+    '''The associations, indexed by suffix.
+
+    Attributes:
+        chains (dict): Each lowercase suffix (such as ".tar.gz") and its
+            handlers (list[list[str]]), in the order to try them.
+        max_dots (int): The most dots in any suffix.
+        key (callable): Get a value that changes whenever the which
+            function could give a different result (None if it never
+            does). A suffix is resolved again if the value changed.
+    '''
+    def __init__(self, associations=None, key=None):
+        self.chains = {}
+        self.max_dots = 0
+        self.key = key
+        self._resolved = {}  # suffix: (key, (argv or None, missing))
+        self._lock = threading.Lock()
+        if associations is None:
+            associations = DEFAULT_ASSOCIATIONS
+        for suffix, value in associations.items():
+            self.add(suffix, value)
+
+    def add(self, suffix, value):
+        '''Set a suffix's handlers (replacing any it had).
+
+        Args:
+            suffix (str): Such as ".csv" or ".tar.gz".
+            value (Union[str,list]): See to_chain.
+        '''
+        suffix = _fold(suffix)
+        chain = to_chain(value)
+        with self._lock:
+            self.chains[suffix] = chain
+            self._resolved.pop(suffix, None)
+            self.max_dots = max(self.max_dots, suffix.count("."))
+
+    def match(self, path):
+        '''Get the suffixes of path that have associations.
+
+        Returns:
+            list[str]: The suffixes, longest first.
+        '''
+        name = os.path.basename(path).lower()
+        suffixes = []
+        dot = name.find(".")
+        while dot != -1:
+            suffix = name[dot:]
+            if (suffix.count(".") <= self.max_dots) and (
+                    suffix in self.chains):
+                suffixes.append(suffix)
+            dot = name.find(".", dot + 1)
+        return suffixes
+
+    def resolve_suffix(self, suffix, which):
+        '''Find the first installed handler for suffix (once).
+
+        Args:
+            suffix (str): A suffix in chains.
+            which (callable): Get a program's path, or None if it isn't
+                installed.
+
+        Returns:
+            tuple(list[str], list[str]): The handler's arguments with
+                the full path of the program (None if no handler is
+                installed), and the programs before it that aren't.
+        '''
+        key = self.key() if self.key is not None else None
+        with self._lock:
+            resolved = self._resolved.get(suffix)
+            chain = self.chains[suffix]
+        if (resolved is not None) and (resolved[0] == key):
+            return resolved[1]
+        missing = []
+        argv = None
+        for handler in chain:
+            program = which(handler[0])
+            if program is not None:
+                argv = [program] + handler[1:]
+                break
+            missing.append(handler[0])
+        result = (argv, missing)
+        with self._lock:
+            self._resolved[suffix] = (key, result)
+        return result
+
+    def resolve(self, path, which):
+        '''Find the installed handler for path.
+
+        Args:
+            path (str): The file to open.
+            which (callable): See resolve_suffix.
+
+        Returns:
+            tuple(list[str], list[str]): The handler's arguments (not
+                including path), or None if path has no association or
+                none of its handlers is installed, and the programs
+                that were tried but aren't installed.
+        '''
+        missing = []
+        for suffix in self.match(path):
+            argv, suffix_missing = self.resolve_suffix(suffix, which)
+            missing.extend(suffix_missing)
+            if argv is not None:
+                return list(argv), missing
+        return None, missing
+
+    def resolve_all(self, which):
+        '''Resolve every suffix now (such as before a daemon forks).'''
+        for suffix in list(self.chains):
+            self.resolve_suffix(suffix, which)
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+'''
+Launch strategies (See BLink.run_plan and settings['launch_strategy']).
+
+- wait: Run the program and wait for it to exit (the original
+  behavior, and the default). The return code is the program's.
+- detach: Start the program in its own session (setsid) with its
+  standard streams on os.devnull, then return right away so blnk can
+  exit instead of staying resident while a GUI app is open. Until blnk
+  exits, a thread waits for the program so it doesn't stay a zombie
+  (such as in the daemon). Then the program is reparented to init.
+- exec: Replace the blnk process with the program (os.execvp), so
+  nothing of blnk stays in memory and the program keeps blnk's pid and
+  standard streams. This never returns on success. It is only allowed
+  when blnk launches one target in its own process (the daemon turns
+  it into detach, See set_exec_allowed).
+- posix_spawn: Like detach, but using os.posix_spawnp, which avoids
+  copying the parent's memory map. It falls back to detach if
+  unavailable or if a working directory is required (posix_spawn has
+  no chdir action in Python).
+
+Each launch logs its latency (the time until the program was started,
+not until it exited). tests/blnk/benchmark_launch.py compares them.
+'''
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from collections import (
+    OrderedDict,
+    namedtuple,
+)
+
+from hierosoft.logging2 import getLogger
+
+logger = getLogger(__name__)
+
+DEFAULT_STRATEGY = "wait"
+
+LaunchResult = namedtuple("LaunchResult", ["returncode", "strategy",
+                                           "latency"])
+LaunchResult.__doc__ = '''The result of launch.
+
+Attributes:
+    returncode (int): The program's return code for wait, otherwise 0.
+    strategy (str): The strategy that was actually used (such as
+        "detach" if posix_spawn wasn't possible).
+    latency (float): Seconds from the start of launch until the program
+        was started.
+'''
+
+_exec_allowed = True
+
+
+def set_exec_allowed(allowed):
+    '''Allow or disallow the exec strategy (it falls back to detach).
+
+    Disallow it in any process that must outlive the launch, such as a
+    forked daemon child that still has to answer its client.
+    '''
+    global _exec_allowed
+    _exec_allowed = allowed
+
+
+def _reap(wait_fn, *args):
+    '''Call wait_fn in a daemon thread, so a detached program is reaped
+    when it exits without blocking the caller or blnk's exit.
+    '''
+    thread = threading.Thread(target=wait_fn, args=args, name="blnk-reap")
+    thread.daemon = True
+    thread.start()
+
+
+def _waitpid(pid):
+    try:
+        os.waitpid(pid, 0)
+    except ChildProcessError:
+        pass  # already reaped
+
+
+def launch_wait(parts, cwd=None, check=True):
+    start = time.time()
+    with subprocess.Popen(parts, cwd=cwd) as proc:
+        latency = time.time() - start
+        returncode = proc.wait()
+    if check and returncode:
+        raise subprocess.CalledProcessError(returncode, parts)
+    return LaunchResult(returncode, "wait", latency)
+
+
+def launch_detach(parts, cwd=None, check=True):
+    start = time.time()
+    proc = subprocess.Popen(
+        parts,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    latency = time.time() - start
+    _reap(proc.wait)
+    return LaunchResult(0, "detach", latency)
+
+
+def launch_exec(parts, cwd=None, check=True):
+    if not _exec_allowed:
+        logger.info("  - exec isn't allowed here, so using detach")
+        return launch_detach(parts, cwd=cwd, check=check)
+    if cwd is not None:
+        os.chdir(cwd)
+    logger.info("* replacing blnk with {}".format(parts))
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execvp(parts[0], parts)
+    # ^ Only returns by raising OSError (such as FileNotFoundError).
+
+
+def launch_posix_spawn(parts, cwd=None, check=True):
+    if (cwd is not None) or not hasattr(os, "posix_spawnp"):
+        logger.info("  - posix_spawn isn't possible here, so using detach")
+        return launch_detach(parts, cwd=cwd, check=check)
+    start = time.time()
+    pid = os.posix_spawnp(
+        parts[0],
+        parts,
+        os.environ,
+        file_actions=[
+            (os.POSIX_SPAWN_OPEN, 0, os.devnull, os.O_RDONLY, 0),
+            (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+            (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+        ],
+        setsid=True,
+    )
+    latency = time.time() - start
+    _reap(_waitpid, pid)
+    return LaunchResult(0, "posix_spawn", latency)
+
+
+STRATEGIES = OrderedDict([
+    ("wait", launch_wait),
+    ("detach", launch_detach),
+    ("exec", launch_exec),
+    ("posix_spawn", launch_posix_spawn),
+])
+
+
+def launch(parts, cwd=None, strategy=None, check=True):
+    '''Start a program that was already resolved (See
+    BLink._resolve_parts).
+
+    Args:
+        parts (list[str]): The program and its arguments.
+        cwd (str, optional): The working directory for the program.
+        strategy (str, optional): A key in STRATEGIES. Defaults to
+            DEFAULT_STRATEGY.
+        check (bool, optional): For wait, raise CalledProcessError if
+            the program returns non-zero.
+
+    Raises:
+        ValueError: If strategy is unknown.
+        FileNotFoundError: If the program can't be found.
+
+    Returns:
+        LaunchResult: The result (exec never returns on success).
+    '''
+    if strategy is None:
+        strategy = DEFAULT_STRATEGY
+    launch_fn = STRATEGIES.get(strategy)
+    if launch_fn is None:
+        raise ValueError("Unknown launch strategy {} (expected one of {})"
+                         .format(repr(strategy), list(STRATEGIES)))
+    result = launch_fn(parts, cwd=cwd, check=check)
+    logger.info("* launched using {} in {:.1f} ms"
+                .format(result.strategy, result.latency * 1000))
+    return result
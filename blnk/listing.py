@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+'''
+Answer many existence checks from directory listings (See
+BLink.resolve_many).
+
+Checking each candidate path with os.path.exists costs one stat per
+path per candidate base, which adds up on a network filesystem. A
+ListingCache instead lists each directory once (os.scandir, with a
+deadline as in blnk/probe.py) and answers every check under it from
+that listing. A path's parent is only listed if the parent itself was
+found in its own parent's listing, so a missing directory near the top
+answers all of the paths below it without touching the filesystem
+again.
+
+Listings are a snapshot, so use a ListingCache for one batch of work,
+not for the life of a process. A broken symlink counts as existing
+(unlike for os.path.exists).
+
+CaseInsensitiveResolver finds a path whose case differs from the
+actual one (such as D:\\meshes\\Tree.OBJ from Windows, where the
+copy is Meshes/tree.obj). It walks the path one folder at a time using
+lowercased listings, which are reused while the directory's mtime is
+the same, and remembers each resolved prefix (both up to a limit, least
+recently used first) so another path in the same tree only walks the
+part that differs.
+
+Both can be shared by threads (such as in blnk.batch).
+'''
+import errno
+import os
+import threading
+
+from collections import OrderedDict
+
+from blnk import probe
+
+DEFAULT_MAX_ENTRIES = 1024
+
+_MISSING_ERRNOS = (errno.ENOENT, errno.ENOTDIR, errno.EACCES, errno.EPERM)
+
+
+def _scan(directory):
+    with os.scandir(directory) as entries:
+        return frozenset(entry.name for entry in entries)
+
+
+def _mtime_ns(path):
+    return os.stat(path).st_mtime_ns
+
+
+class ListingCache(object):
+    '''Cached directory listings.
+
+    Attributes:
+        timeout (float): The deadline for each listing (See
+            blnk.probe.get_timeout).
+        scans (int): How many directories were actually listed.
+    '''
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.scans = 0
+        self._listings = {}
+        # ^ directory: frozenset of names, or None if not a directory
+        self._lock = threading.Lock()
+
+    def list_dir(self, directory):
+        '''Get the names in directory.
+
+        Returns:
+            frozenset: The names, or None if directory doesn't exist
+                (or isn't a directory or can't be read).
+
+        Raises:
+            ProbeTimeout: If the directory's mount didn't respond.
+        '''
+        directory = os.path.abspath(directory)
+        with self._lock:
+            if directory in self._listings:
+                return self._listings[directory]
+        names = None
+        parent = os.path.dirname(directory)
+        if (parent == directory) or self.exists(directory):
+            try:
+                names = probe.probe(_scan, directory, timeout=self.timeout)
+                with self._lock:
+                    self.scans += 1
+            except probe.ProbeTimeout:
+                raise
+            except OSError as ex:
+                if ex.errno not in _MISSING_ERRNOS:
+                    raise
+        with self._lock:
+            # If another thread listed it too, both listings are okay.
+            self._listings[directory] = names
+        return names
+
+    def exists(self, path):
+        '''Check whether path exists using its parent's listing.
+
+        Raises:
+            ProbeTimeout: If the mount didn't respond.
+        '''
+        path = os.path.abspath(path)
+        parent, name = os.path.split(path)
+        if not name:
+            return os.path.isdir(path)  # the root directory
+        names = self.list_dir(parent)
+        return (names is not None) and (name in names)
+
+    def clear(self):
+        with self._lock:
+            self._listings.clear()
+
+
+class CaseInsensitiveResolver(object):
+    '''Find paths ignoring case (See the module docstring).
+
+    Attributes:
+        max_entries (int): The most listings, and the most prefixes,
+            to remember.
+        timeout (float): The deadline for each stat or listing (See
+            blnk.probe.get_timeout).
+        scans (int): How many directories were actually listed.
+    '''
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, timeout=None):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.scans = 0
+        self._listings = OrderedDict()
+        # ^ directory: (mtime_ns, {lowercase name: [names]})
+        self._prefixes = OrderedDict()
+        # ^ (base, lowercase relative path): actual path
+        self._lock = threading.Lock()  # for both caches and scans
+        # ^ Not held during a stat or listing, so a slow mount doesn't
+        #   block other threads' lookups.
+
+    def _recall(self, cache, key):
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _remember(self, cache, key, value):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_entries:
+                cache.popitem(last=False)
+
+    def _probe(self, fn, path):
+        '''Call fn(path) with a deadline.
+
+        Returns:
+            The result, or None if path doesn't exist.
+
+        Raises:
+            ProbeTimeout: If the mount didn't respond.
+        '''
+        try:
+            return probe.probe(fn, path, timeout=self.timeout)
+        except OSError as ex:
+            if ex.errno not in _MISSING_ERRNOS:
+                raise
+        return None
+
+    def get_lower_names(self, directory):
+        '''Get the names in directory by lowercase name.
+
+        Returns:
+            dict: Each lowercase name and the actual names (sorted,
+                since more than one may differ only by case), or None
+                if directory can't be listed.
+        '''
+        mtime_ns = self._probe(_mtime_ns, directory)
+        if mtime_ns is None:
+            return None
+        entry = self._recall(self._listings, directory)
+        if (entry is not None) and (entry[0] == mtime_ns):
+            return entry[1]
+        names = self._probe(_scan, directory)
+        if names is None:
+            return None
+        with self._lock:
+            self.scans += 1
+        lower_names = {}
+        for name in sorted(names):
+            lower_names.setdefault(name.lower(), []).append(name)
+        self._remember(self._listings, directory, (mtime_ns, lower_names))
+        return lower_names
+
+    def _walk(self, base, parts, use_prefixes):
+        lowered = [part.lower() for part in parts]
+        current = base
+        start = 0
+        if use_prefixes:
+            for i in range(len(parts), 0, -1):
+                cached = self._recall(self._prefixes,
+                                      (base, "/".join(lowered[:i])))
+                if cached is not None:
+                    current = cached
+                    start = i
+                    break
+        for i in range(start, len(parts)):
+            lower_names = self.get_lower_names(current)
+            if lower_names is None:
+                return None, start
+            names = lower_names.get(lowered[i])
+            if not names:
+                return None, start
+            # Prefer the exact case if there is more than one:
+            name = parts[i] if parts[i] in names else names[0]
+            current = os.path.join(current, name)
+            self._remember(self._prefixes,
+                           (base, "/".join(lowered[:i+1])), current)
+        return current, start
+
+    def find(self, base, rest):
+        '''Find rest under base, ignoring the case of rest.
+
+        Args:
+            base (str): An existing directory (its own case must be
+                correct).
+            rest (str): A relative path ("\\" or "/" separated).
+
+        Returns:
+            str: The actual path, or None if there is none.
+
+        Raises:
+            ProbeTimeout: If the mount didn't respond.
+        '''
+        parts = [part for part in rest.replace("\\", "/").split("/")
+                 if part]
+        if not parts:
+            return None
+        path, start = self._walk(base, parts, True)
+        if start == 0:
+            return path
+        if ((start == len(parts))
+                and (self._probe(_mtime_ns, path) is not None)):
+            return path  # All from the cache, and it still exists.
+        if (path is not None) and (start < len(parts)):
+            return path  # The walk after the cached prefix succeeded.
+        # A cached prefix was stale (renamed or removed), so start over:
+        return self._walk(base, parts, False)[0]
+
+    def clear(self):
+        with self._lock:
+            self._listings.clear()
+            self._prefixes.clear()
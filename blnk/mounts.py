@@ -0,0 +1,315 @@
+# -*- coding: utf-8 -*-
+'''
+The Linux mount table, and where each network share is mounted.
+
+/proc/self/mountinfo is parsed once and reused (See MountTable) by
+blnk.probe, to tell network mounts from local ones, and by find_share,
+which turns a UNC path from a Windows shortcut (such as
+\\\\server\\share\\folder\\file.txt) into the local mount of that share
+(such as /mnt/share/folder/file.txt) with the longest matching share
+path. These mounts are indexed:
+
+- CIFS/SMB: The source //server/share[/folder] (plus the mount's root
+  inside the share, for a bind mount).
+- NFS: The source server:/export/path, as \\\\server\\export\\path.
+- GVFS (such as shares opened in a file manager): Each
+  smb-share:server=...,share=... folder in the gvfsd-fuse mount. These
+  aren't in the mount table, so the folder is listed when a share isn't
+  found (at most once per GVFS_SECONDS), with a deadline (See
+  blnk.probe) and without holding up other threads using the table.
+
+Server and share names are case-insensitive, as on Windows.
+'''
+import os
+import threading
+import time
+
+from collections import namedtuple
+
+MOUNTINFO_PATH = "/proc/self/mountinfo"
+MOUNTS_SECONDS = 10.0  # How long to trust the mount table
+GVFS_SECONDS = 5.0  # How long to wait before listing GVFS shares again
+
+CIFS_FS_TYPES = frozenset(["cifs", "smb3", "smbfs"])
+NFS_FS_TYPES = frozenset(["nfs", "nfs4"])
+GVFS_FS_TYPES = frozenset(["fuse.gvfsd-fuse"])
+GVFS_SMB_PREFIX = "smb-share:"
+
+Mount = namedtuple("Mount", ["mount_point", "fs_type", "source", "root"])
+Mount.__doc__ = '''One line of /proc/self/mountinfo.
+
+Attributes:
+    mount_point (str): Where it is mounted.
+    fs_type (str): Such as "ext4" or "cifs".
+    source (str): Such as "/dev/sda1" or "//server/share".
+    root (str): The directory of the filesystem that is mounted there
+        ("/" except for a bind mount).
+'''
+
+
+def unescape_field(field):
+    # The mount table uses octal escapes such as \040 for a space.
+    if "\\" not in field:
+        return field
+    result = ""
+    i = 0
+    while i < len(field):
+        if (field[i] == "\\") and field[i+1:i+4].isdigit():
+            result += chr(int(field[i+1:i+4], 8))
+            i += 4
+        else:
+            result += field[i]
+            i += 1
+    return result
+
+
+def parse_mountinfo(text):
+    '''Parse the content of /proc/self/mountinfo.
+
+    Returns:
+        list[Mount]: The mounts in the order listed.
+    '''
+    mounts = []
+    for line in text.splitlines():
+        parts = line.split()
+        # The optional fields (after the 6th) end with "-":
+        try:
+            separator = parts.index("-", 6)
+        except ValueError:
+            continue
+        if len(parts) < separator + 3:
+            continue
+        mounts.append(Mount(
+            mount_point=unescape_field(parts[4]),
+            fs_type=parts[separator+1],
+            source=unescape_field(parts[separator+2]),
+            root=unescape_field(parts[3]),
+        ))
+    return mounts
+
+
+def split_unc(path):
+    '''Split a UNC path (\\\\server\\share\\...) into its parts.
+
+    Returns:
+        list[str]: The server, share and any folders, or None if path
+            isn't a UNC path.
+    '''
+    if not (path.startswith("\\\\") or path.startswith("//")):
+        return None
+    parts = [part for part in path[2:].replace("\\", "/").split("/")
+             if part]
+    if len(parts) < 2:
+        return None
+    return parts
+
+
+def get_share_parts(mount):
+    '''Get the UNC path parts of a network mount (See split_unc).
+
+    Returns:
+        list[str]: The server, share and any folders, or None if mount
+            isn't a CIFS or NFS mount.
+    '''
+    if mount.fs_type in CIFS_FS_TYPES:
+        parts = split_unc(mount.source)
+    elif mount.fs_type in NFS_FS_TYPES:
+        server, sep, export = mount.source.partition(":")
+        if not sep:
+            return None
+        parts = [server] + [part for part in export.split("/") if part]
+        if len(parts) < 2:
+            return None
+    else:
+        return None
+    if parts is None:
+        return None
+    root_parts = [part for part in mount.root.split("/") if part]
+    if root_parts and (parts[-len(root_parts):] != root_parts):
+        parts += root_parts  # a bind mount of a folder in the share
+    return parts
+
+
+def parse_gvfs_name(name):
+    '''Get the UNC path parts of a GVFS share folder.
+
+    Args:
+        name (str): Such as "smb-share:server=nas,share=media".
+
+    Returns:
+        list[str]: The server and share, or None if name isn't an SMB
+            share.
+    '''
+    if not name.startswith(GVFS_SMB_PREFIX):
+        return None
+    values = {}
+    for pair in name[len(GVFS_SMB_PREFIX):].split(","):
+        key, sep, value = pair.partition("=")
+        if sep:
+            values[key] = value
+    if not (values.get("server") and values.get("share")):
+        return None
+    return [values["server"], values["share"]]
+
+
+def _key(parts):
+    return "/".join(part.lower() for part in parts)
+
+
+class MountTable(object):
+    '''The parsed mount table, read again if it may have changed.
+
+    Attributes:
+        path (str): The mountinfo file.
+        mounts (list[Mount]): The mounts, longest mount point first (or
+            None if there is no mount table).
+        shares (dict): Lowercase "server/share[/folder...]" (See
+            get_share_parts) and the local directory.
+        gvfs_roots (list[str]): The mount points of gvfsd-fuse.
+        gvfs_shares (dict): Lowercase "server/share" and the local
+            directory of each share in a gvfs_roots folder, as of the
+            last time they were listed (See scan_gvfs).
+    '''
+    def __init__(self, path=MOUNTINFO_PATH):
+        self.path = path
+        self.mounts = None
+        self.shares = {}
+        self.gvfs_roots = []
+        self.gvfs_shares = {}
+        self._loaded = None
+        self._mtime = None
+        self._gvfs_scanned = None
+        self._lock = threading.RLock()
+
+    def refresh(self, force=False):
+        '''Read the mount table once, or again if its mtime changed or
+        it is older than MOUNTS_SECONDS (/proc doesn't update the mtime
+        when something is mounted).
+        '''
+        with self._lock:
+            now = time.time()
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError:
+                mtime = None
+            if ((not force) and (self._loaded is not None)
+                    and (mtime == self._mtime)
+                    and (now - self._loaded <= MOUNTS_SECONDS)):
+                return
+            self._loaded = now
+            self._mtime = mtime
+            try:
+                with open(self.path, 'r') as ins:
+                    mounts = parse_mountinfo(ins.read())
+            except (IOError, OSError):
+                self.mounts = None  # not Linux (or /proc isn't mounted)
+                self.shares = {}
+                self.gvfs_roots = []
+                self.gvfs_shares = {}
+                return
+            shares = {}
+            gvfs_roots = []
+            for mount in mounts:
+                if mount.fs_type in GVFS_FS_TYPES:
+                    gvfs_roots.append(mount.mount_point)
+                    continue
+                parts = get_share_parts(mount)
+                if parts is not None:
+                    # Keep the first one if a share is mounted twice.
+                    shares.setdefault(_key(parts), mount.mount_point)
+            mounts.sort(key=lambda mount: len(mount.mount_point),
+                        reverse=True)
+            self.mounts = mounts
+            self.shares = shares
+            self.gvfs_roots = gvfs_roots
+            if not gvfs_roots:
+                self.gvfs_shares = {}
+
+    def scan_gvfs(self):
+        '''List the shares in each gvfs_roots folder again, unless that
+        was done less than GVFS_SECONDS ago.
+
+        The table isn't locked while listing, and a folder that doesn't
+        respond is skipped (See blnk.probe.probe).
+
+        Returns:
+            bool: True if the shares were listed.
+        '''
+        from blnk.probe import probe  # blnk.probe imports this module
+        with self._lock:
+            now = time.time()
+            if ((self._gvfs_scanned is not None)
+                    and (now - self._gvfs_scanned < GVFS_SECONDS)):
+                return False
+            self._gvfs_scanned = now
+            gvfs_roots = list(self.gvfs_roots)
+        gvfs_shares = {}
+        for gvfs_root in gvfs_roots:
+            try:
+                names = probe(os.listdir, gvfs_root)
+            except OSError:  # including ProbeTimeout
+                continue
+            for name in names:
+                parts = parse_gvfs_name(name)
+                if parts is not None:
+                    gvfs_shares.setdefault(_key(parts),
+                                           os.path.join(gvfs_root, name))
+        with self._lock:
+            self.gvfs_shares = gvfs_shares
+        return True
+
+    def get_mounts(self):
+        '''Get the mounts, longest mount point first (or None).'''
+        with self._lock:
+            self.refresh()
+            return self.mounts
+
+    def find_share(self, path):
+        '''Get the local path of a UNC path (See find_share).'''
+        parts = split_unc(path)
+        if parts is None:
+            return None
+        with self._lock:
+            self.refresh()
+            result = self._find_share(parts)
+            if (result is not None) or not self.gvfs_roots:
+                return result
+        # GVFS mounts a share when it is first opened.
+        if not self.scan_gvfs():
+            return None
+        with self._lock:
+            return self._find_share(parts)
+
+    def _find_share(self, parts):
+        lowered = [part.lower() for part in parts]
+        for count in range(len(parts), 1, -1):
+            key = "/".join(lowered[:count])
+            mount_point = self.shares.get(key)
+            if mount_point is None:
+                mount_point = self.gvfs_shares.get(key)
+            if mount_point is not None:
+                if count == len(parts):
+                    return mount_point
+                return os.path.join(mount_point, *parts[count:])
+        return None
+
+
+_mount_table = MountTable()
+
+
+def get_mounts():
+    '''Get the mounts of this process (See MountTable.get_mounts).'''
+    return _mount_table.get_mounts()
+
+
+def find_share(path):
+    '''Find where a Windows network path is mounted.
+
+    Args:
+        path (str): A UNC path such as \\\\server\\share\\folder.
+
+    Returns:
+        str: The local path (such as /mnt/share/folder), or None if
+            path isn't a UNC path or its share isn't mounted.
+    '''
+    return _mount_table.find_share(path)
@@ -0,0 +1,540 @@
+# -*- coding: utf-8 -*-
+'''
+Fast blnk parser
+----------------
+Parse a whole blnk file in one pass, producing the same BLink.tree and
+BLink._comments as calling BLink._pushLine for each line (including
+the legacy "Content-Type:" first line and the deprecated ':' operator)
+but without stripping each line several times or formatting debug
+messages for every section and value.
+
+tests/blnk/test_parsing.py checks parity with _pushLine.
+
+For jobs that only need a few keys from each file, iterparse yields
+events lazily without building a tree at all.
+
+Before any of that, BLink.load calls sniff on the first SNIFF_BYTES of
+the file (read in binary mode), so a large or binary file that is
+opened with blnk (such as when text files are associated with it) is
+handed to another program after one small read rather than decoded.
+
+merge_text goes the other way for BLink.save: it updates the original
+text of a file to match a tree, so lines whose values didn't change
+(and comments, spacing and the legacy header) stay byte-for-byte the
+same.
+'''
+import codecs
+
+from collections import (
+    OrderedDict,
+    namedtuple,
+)
+
+from hierosoft import echo0
+
+from hierosoft.morelogging import (
+    echo_SyntaxWarning,
+    raise_SyntaxError,
+)
+
+SECTION_GLOBAL = "\n"  # same as BLink.SECTION_GLOBAL
+BLNK_HEADER = "[X-Blnk]"
+BLNK_CONTENT_TYPE = "text/blnk"
+CONTENT_TYPE_OPENER = "Content-Type:"
+
+SNIFF_BYTES = 4096  # How much of a file sniff needs
+
+# Check UTF-32 first, since its little-endian BOM starts with UTF-16's:
+BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+class FileTypeError(Exception):
+    pass
+
+
+ParseEvent = namedtuple("ParseEvent", ["event", "row", "section", "key",
+                                       "value"])
+ParseEvent.__doc__ = '''An event yielded by iterparse.
+
+Attributes:
+    event (str): "header" (the "[X-Blnk]" or legacy "Content-Type:"
+        line; value is the content type), "section" (section is the
+        name), "value" (section, key and value are set) or "comment"
+        (value is the whole comment line).
+    row (int): The line number (counting from 1).
+    section (str): The current section (SECTION_GLOBAL if a value is
+        before any section, which only happens in hand-written files).
+    key (str): The variable name for "value" events, the variable or
+        section the comment follows for "comment" events, otherwise
+        None.
+    value (str): See event.
+'''
+
+
+def find_operator(line, operator, path=None, row=None):
+    '''Find the assignment operator in a line (See BLink.splitLine).
+
+    If operator isn't in line, fall back to the deprecated ':' operator
+    unless the ':' seems to be part of a path (such as C:\\).
+
+    Args:
+        line (str): A stripped line that is not a comment nor section.
+        operator (str): The current assignment operator.
+
+    Returns:
+        tuple(int, str): The index of the operator (-1 if not found) and
+            the operator (':' if reverted to the deprecated operator, in
+            which case the caller should keep using ':').
+    '''
+    i = line.find(operator)
+    if i >= 0:
+        return i, operator
+    i = line.find(':')
+    if i < 0:
+        return i, operator
+    if (line[i+1:i+2] != "\\") or (line[i+2:i+3] == "\\"):
+        # ^ If followed by "\\", then the path may start with
+        #   \\ (the start of a UNC network path).
+        echo0("* reverting to deprecated ':' operator for {}"
+              "".format(line))
+        return i, ":"
+    echo_SyntaxWarning(
+        path,
+        row,
+        "WARNING: The line contains no '=', but ':'"
+        " seems like a path since it is followed by"
+        " \\ not \\\\",
+    )
+    return -1, operator
+
+
+def parse_text(link, text, path=None, first_row=1):
+    '''Parse blnk text into a BLink.
+
+    The result is the same as calling link._pushLine for each line, so
+    link may already contain lines (such as from a previous call).
+
+    Args:
+        link (BLink): The object to fill (tree, _comments, contentType,
+            contentTypeParts, assignmentOperator and the _last_line_*
+            state are updated).
+        text (str): The content, with newlines already converted to
+            "\\n" (as by open in text mode).
+        path (str, optional): Show this path in syntax messages.
+        first_row (int, optional): The row number of the first line of
+            text (for syntax messages).
+
+    Raises:
+        FileTypeError: If the content is not blnk format (the first
+            non-blank line must be "[X-Blnk]" or "Content-Type: ...").
+        SyntaxError: If a line is not valid blnk format.
+        NotImplementedError: If a value is in an unknown section.
+    '''
+    tree = link.tree
+    set_value = link._set  # keeps link's key index current
+    comments = link._comments
+    operator = link.assignmentOperator
+    delimiter = link.commentDelimiter
+    content_type = link.contentType
+    section = link.lastSection
+    mode = link._last_line_mode
+    mode_key = link._last_line_key
+    row = first_row - 1
+    try:
+        for line in text.split("\n"):
+            row += 1
+            line = line.strip()
+            if not line:
+                continue
+            if line == BLNK_HEADER:
+                content_type = BLNK_CONTENT_TYPE
+                link.contentType = content_type
+                link.contentTypeParts = [content_type]
+                section = "X-Blnk"
+                mode = "Sections"
+                mode_key = section
+                continue
+            if content_type is None:
+                if line.startswith(CONTENT_TYPE_OPENER):
+                    values = [value.strip() for value in
+                              line[len(CONTENT_TYPE_OPENER):].split(";")]
+                    content_type = values[0]
+                    link.contentType = content_type
+                    link.contentTypeParts = values
+                    if content_type == BLNK_CONTENT_TYPE:
+                        section = "X-Blnk"
+                        mode = "Sections"
+                        mode_key = section
+                        continue
+            if content_type != BLNK_CONTENT_TYPE:
+                # NOTE: FileTypeError tells load to _choose_app
+                raise FileTypeError(
+                    "The file must contain \"Content-Type:\""
+                    " (usually \"Content-Type: text/blnk\")"
+                    " before anything else, but"
+                    " _pushLine got \"{}\" (last file: {})"
+                    "".format(line, link.path)
+                )
+            if line.startswith(delimiter):
+                if mode == "Values":
+                    comments["Values"].setdefault(mode_key, []).append(line)
+                elif mode == "Sections":
+                    comments["Sections"].setdefault(mode_key, []).append(
+                        line)
+                else:
+                    comments["ContentType"].append(line)
+                continue
+            if (line[0] == "[") and (line[-1] == "]") and (len(line) >= 2):
+                name = line[1:-1].strip()
+                if not name:
+                    raise_SyntaxError(path, row,
+                                      "_pushLine got an empty section")
+                section = name
+                mode = "Sections"
+                mode_key = section
+                continue
+            i, operator = find_operator(line, operator, path=path, row=row)
+            if i < 0:
+                raise_SyntaxError(path, row,
+                                  "The line contains no '{}': `{}`"
+                                  "".format(operator, line))
+            k = line[:i].strip()
+            v = line[i+len(operator):].strip()
+            if delimiter in v:
+                echo_SyntaxWarning(
+                    path,
+                    row,
+                    "WARNING: `{}` contains a comment delimiter '{}'"
+                    " but inline comments are not supported."
+                    "".format(line, delimiter),
+                )
+            mode = "Values"
+            mode_key = k
+            value_section = section
+            if value_section is None:
+                value_section = SECTION_GLOBAL
+            if value_section not in tree:
+                if value_section != SECTION_GLOBAL:
+                    raise NotImplementedError(
+                        "Invalid section {} for {}={}"
+                        .format(value_section, k, v))
+                # else fall back to global section
+                tree[value_section] = OrderedDict()
+            set_value(value_section, k, v)
+    finally:
+        link.assignmentOperator = operator
+        link.lastSection = section
+        link._last_line_mode = mode
+        link._last_line_key = mode_key
+
+
+def sniff(head, complete=False):
+    '''Decide whether a file is blnk format from its first bytes.
+
+    Args:
+        head (bytes): The start of the file (up to SNIFF_BYTES).
+        complete (bool, optional): head is the whole file (otherwise a
+            file with no non-blank line in head is not blnk, nor is one
+            whose first non-blank line doesn't end in head).
+
+    Returns:
+        tuple(str, str): The kind ("blnk" if it starts with "[X-Blnk]",
+            "legacy" if with "Content-Type: text/blnk", "empty" if it
+            is blank and complete, otherwise "other") and the encoding
+            to open it with (from its byte order mark, or None for the
+            default).
+
+    Raises:
+        UnicodeDecodeError: If head isn't text in the encoding of its
+            byte order mark (or UTF-8 if it has none).
+    '''
+    encoding = None
+    for bom, bom_encoding in BOMS:
+        if head.startswith(bom):
+            encoding = bom_encoding
+            break
+    # Incremental, so a character cut off at the end of head is okay:
+    decoder = codecs.getincrementaldecoder(encoding or "utf-8")()
+    text = decoder.decode(head, final=complete)
+    if (encoding is None) and ("\x00" in text):
+        # Valid UTF-8 but binary (such as a file of zeros)
+        raise UnicodeDecodeError("utf-8", head, text.index("\x00"),
+                                 text.index("\x00") + 1,
+                                 "NUL is not allowed in text")
+    text = text.lstrip("\ufeff")
+    for line in text.splitlines(True):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if not (complete or line.endswith(("\n", "\r"))):
+            break  # too long to be a header
+        if stripped == BLNK_HEADER:
+            return "blnk", encoding
+        if (stripped.startswith(CONTENT_TYPE_OPENER)
+                and (stripped[len(CONTENT_TYPE_OPENER):].split(";")[0]
+                     .strip() == BLNK_CONTENT_TYPE)):
+            return "legacy", encoding
+        break
+    else:
+        if complete:
+            return "empty", encoding
+    return "other", encoding
+
+
+def load_stream(link, stream, path=None):
+    '''Parse a blnk text stream into a BLink (See parse_text).
+
+    Only the lines up to the first non-blank one are read before
+    deciding whether it is blnk, so a large non-blnk file isn't read
+    (FileTypeError is raised instead).
+    '''
+    row = 0
+    while True:
+        line = stream.readline()
+        if not line:
+            return
+        row += 1
+        if line.strip():
+            break
+    parse_text(link, line + stream.read(), path=path, first_row=row)
+
+
+def iterparse(source, path=None):
+    '''Yield the events (See ParseEvent) in a blnk file lazily.
+
+    This accepts the same grammar as BLink._pushLine but doesn't build
+    a tree, so the caller can stop early (such as after getting Type and
+    Path). Unlike BLink, a value in a section that BLink doesn't know
+    is yielded rather than raising NotImplementedError.
+
+    Args:
+        source (Union[str,TextIO]): A path or a text stream. A path is
+            opened here and closed when the generator is exhausted or
+            closed.
+        path (str, optional): Show this path in syntax messages
+            (defaults to source if source is a path).
+
+    Raises:
+        FileTypeError: If the first non-blank line isn't "[X-Blnk]" nor
+            a "Content-Type: text/blnk" line.
+        SyntaxError: If a line is not valid blnk format.
+    '''
+    if not hasattr(source, "readline"):
+        if path is None:
+            path = source
+        with open(source, 'r') as ins:
+            for event in iterparse(ins, path=path):
+                yield event
+        return
+    operator = "="
+    delimiter = "#"
+    content_type = None
+    section = None
+    mode_key = None
+    row = 0
+    for line in source:
+        row += 1
+        line = line.strip()
+        if not line:
+            continue
+        if line == BLNK_HEADER:
+            content_type = BLNK_CONTENT_TYPE
+            section = mode_key = "X-Blnk"
+            yield ParseEvent("header", row, section, None, content_type)
+            continue
+        if content_type is None:
+            if line.startswith(CONTENT_TYPE_OPENER):
+                content_type = \
+                    line[len(CONTENT_TYPE_OPENER):].split(";")[0].strip()
+                if content_type == BLNK_CONTENT_TYPE:
+                    section = mode_key = "X-Blnk"
+                    yield ParseEvent("header", row, section, None,
+                                     content_type)
+                    continue
+        if content_type != BLNK_CONTENT_TYPE:
+            raise FileTypeError(
+                "The file must start with \"{}\" (or the legacy"
+                " \"Content-Type: text/blnk\"), but got \"{}\""
+                " (file: {})".format(BLNK_HEADER, line, path)
+            )
+        if line.startswith(delimiter):
+            yield ParseEvent("comment", row, section, mode_key, line)
+            continue
+        if (line[0] == "[") and (line[-1] == "]") and (len(line) >= 2):
+            name = line[1:-1].strip()
+            if not name:
+                raise_SyntaxError(path, row, "got an empty section")
+            section = mode_key = name
+            yield ParseEvent("section", row, section, None, None)
+            continue
+        i, operator = find_operator(line, operator, path=path, row=row)
+        if i < 0:
+            raise_SyntaxError(path, row,
+                              "The line contains no '{}': `{}`"
+                              "".format(operator, line))
+        mode_key = line[:i].strip()
+        value_section = section
+        if value_section is None:
+            value_section = SECTION_GLOBAL
+        yield ParseEvent("value", row, value_section, mode_key,
+                         line[i+len(operator):].strip())
+
+
+def get_values(source, keys, section="X-Blnk"):
+    '''Get some values from a blnk file, reading only as far as needed.
+
+    Args:
+        source (Union[str,TextIO]): A path or a text stream.
+        keys (Iterable[str]): The variable names to get.
+        section (str, optional): The section containing the keys.
+
+    Returns:
+        dict: The values found (keys that aren't in the file are not
+            set).
+    '''
+    wanted = set(keys)
+    results = {}
+    events = iterparse(source)
+    try:
+        for event in events:
+            if event.event == "section":
+                if (event.section != section) and results:
+                    # The rest of the section was already read.
+                    break
+            elif ((event.event == "value") and (event.section == section)
+                    and (event.key in wanted)):
+                results[event.key] = event.value
+                if len(results) == len(wanted):
+                    break
+    finally:
+        events.close()
+    return results
+
+
+def _get_newline(lines):
+    for line in lines:
+        if line.endswith("\r\n"):
+            return "\r\n"
+        if line.endswith("\n"):
+            return "\n"
+    return "\n"
+
+
+def merge_text(text, tree, operator="=", delimiter="#", path=None):
+    '''Update blnk text to match a tree (See BLink.save).
+
+    Each value line is kept as is if its value is the same in tree,
+    otherwise only the value is replaced (the key, indentation and
+    spacing around the operator are kept). Lines for keys that are no
+    longer in tree are removed. Keys only in tree are added after the
+    last value of their section, and sections only in tree (that have
+    any values) are added at the end.
+
+    Args:
+        text (str): The original content, with its own newlines (such
+            as decoded from the bytes of the file).
+        tree (OrderedDict): The sections (See BLink.tree). Values are
+            formatted using str.format, as by BLink._save.
+        operator (str, optional): The assignment operator.
+        delimiter (str, optional): The comment delimiter.
+        path (str, optional): Show this path in syntax messages.
+
+    Raises:
+        FileTypeError: If text isn't blnk format.
+        SyntaxError: If a line is not valid blnk format.
+        ValueError: If tree has a value outside of any section (the
+            caller should write the whole file instead).
+
+    Returns:
+        str: The new content.
+    '''
+    lines = text.splitlines(True)
+    newline = _get_newline(lines)
+    out = []
+    section_ends = {}  # section: index in out after its last value
+    seen = {}  # section: keys that are in text
+    content_type = None
+    section = None
+    for row, line in enumerate(lines, start=1):
+        stripped = line.strip()
+        if (not stripped) or stripped.startswith(delimiter):
+            out.append(line)
+            continue
+        if ((content_type is None)
+                and stripped.startswith(CONTENT_TYPE_OPENER)):
+            content_type = \
+                stripped[len(CONTENT_TYPE_OPENER):].split(";")[0].strip()
+            if content_type == BLNK_CONTENT_TYPE:
+                stripped = BLNK_HEADER  # the legacy header
+        if stripped == BLNK_HEADER:
+            content_type = BLNK_CONTENT_TYPE
+            section = "X-Blnk"
+            out.append(line)
+            section_ends[section] = len(out)
+            continue
+        if content_type != BLNK_CONTENT_TYPE:
+            raise FileTypeError(
+                "The file must start with \"{}\" (or the legacy"
+                " \"Content-Type: text/blnk\"), but got \"{}\""
+                " (file: {})".format(BLNK_HEADER, stripped, path)
+            )
+        if ((stripped[0] == "[") and (stripped[-1] == "]")
+                and (len(stripped) >= 2)):
+            section = stripped[1:-1].strip()
+            out.append(line)
+            section_ends[section] = len(out)
+            continue
+        i, operator = find_operator(stripped, operator, path=path, row=row)
+        if i < 0:
+            raise_SyntaxError(path, row,
+                              "The line contains no '{}': `{}`"
+                              "".format(operator, stripped))
+        key = stripped[:i].strip()
+        value_section = section
+        if value_section is None:
+            value_section = SECTION_GLOBAL
+        seen.setdefault(value_section, set()).add(key)
+        values = tree.get(value_section)
+        if (values is None) or (key not in values):
+            continue  # removed
+        value = "{}".format(values[key])
+        if value != stripped[i+len(operator):].strip():
+            value_start = line.find(stripped) + i + len(operator)
+            after = line[value_start:]
+            spacing = after[:len(after) - len(after.lstrip(" \t"))]
+            ending = line[len(line.rstrip("\r\n")):]
+            line = line[:value_start] + spacing + value + ending
+        out.append(line)
+        section_ends[value_section] = len(out)
+    if out and not out[-1].endswith("\n"):
+        out[-1] += newline
+    inserts = []
+    appended = []
+    for name, values in tree.items():
+        found = seen.get(name, ())
+        missing = [key for key in values if key not in found]
+        if not missing:
+            continue
+        if name == SECTION_GLOBAL:
+            raise ValueError("There are values outside of any section.")
+        new_lines = ["{}{}{}{}".format(key, operator, values[key], newline)
+                     for key in missing]
+        if name in section_ends:
+            inserts.append((section_ends[name], new_lines))
+        else:
+            appended.append("[{}]{}".format(name, newline))
+            appended.extend(new_lines)
+            appended.append(newline)
+    for index, new_lines in sorted(inserts, reverse=True):
+        if index and not out[index-1].endswith("\n"):
+            out[index-1] += newline
+        out[index:index] = new_lines
+    if appended and out and out[-1].strip():
+        out.append(newline)
+    return "".join(out + appended)
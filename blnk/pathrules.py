@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+'''
+Rewrite Windows paths (such as in a shortcut made on Windows) for this
+platform using an ordered table of prefix rules (See BLink.getArgv).
+
+Each rule has a case-insensitive Windows prefix (a drive letter, UNC
+share or folder) and what to replace it with. All prefixes are compiled
+into one trie, so a path is matched by walking it once (the longest
+matching prefix wins) instead of trying each rule in turn. "\\" and "/"
+are equivalent in prefixes and paths, and a prefix only matches up to
+a separator (so C:\\tmp doesn't match C:\\tmp2).
+
+A rule is a dict (See DEFAULT_RULES):
+- prefix (str): Such as "P:", "C:\\Users" or "\\\\server\\share".
+- to (str): The replacement. %NAME% is replaced by variables[NAME]
+  (such as %HOME%), and "~" by the home directory.
+- exact (bool, optional): Only match the whole path, not a prefix.
+- skip (int, optional): Also drop this many folders after the prefix
+  (such as the user name after C:\\Users).
+- search (bool or list[str], optional): Use the first of these
+  directories (or of the bases given to translate, if True) that has
+  the rest of the path, and "to" only if none do.
+
+Renames replace one whole folder name (case-insensitive) anywhere in a
+path, such as ownCloud with the local cloud folder's name.
+
+Rules and renames in the user's path_rules.json (See get_rules_path)
+are added after the defaults, so a rule for the same prefix replaces
+the default one. For example:
+
+    {
+        "rules": [
+            {"prefix": "P:\\\\", "to": "/mnt/projects"},
+            {"prefix": "\\\\\\\\nas\\\\media", "to": "/srv/media"}
+        ],
+        "renames": {"Dropbox": "Nextcloud"}
+    }
+'''
+import json
+import os
+import re
+import string
+
+from hierosoft.logging2 import getLogger
+
+logger = getLogger(__name__)
+
+RULES_NAME = "path_rules.json"
+
+_VAR_RE = re.compile(r"%([A-Za-z_][A-Za-z0-9_]*)%")
+_SEP_RE = re.compile(r"([\\/])")
+
+
+def _default_rules():
+    rules = [
+        {"prefix": "C:", "to": "%HOME%", "forced": True},
+        {"prefix": "C:\\Users", "to": "%HOME%", "skip": 1},
+        {"prefix": "C:\\Users", "to": "%PROFILESFOLDER%", "exact": True},
+        {"prefix": "C:\\Documents and Settings", "to": "%HOME%",
+         "skip": 1},
+        {"prefix": "C:\\tmp", "to": "%TMP%", "exact": True},
+    ]
+    # Any other drive may be a network drive, so look for the rest of
+    #   the path in each base (See BLink.BASES).
+    for letter in string.ascii_uppercase:
+        if letter != "C":
+            rules.append({"prefix": letter + ":", "to": "%HOME%",
+                          "search": True, "forced": True})
+    return rules
+
+
+DEFAULT_RULES = _default_rules()
+# ^ The behavior of blnk before rules could be configured.
+
+DEFAULT_RENAMES = {"ownCloud": "%CLOUD_NAME%"}
+# ^ Only used if CLOUD_NAME is set (See BLink.cloud_name).
+
+
+def get_rules_path():
+    '''Get the path of the user's rules file (which may not exist).'''
+    from blnk.appdirs import get_config_dir
+    return os.path.join(get_config_dir(), RULES_NAME)
+
+
+def load_config(path=None):
+    '''Read the user's rules file.
+
+    Returns:
+        dict: The "rules" (list[dict]) and "renames" (dict) in the
+            file, each empty if the file or key doesn't exist.
+
+    Raises:
+        ValueError: If the file isn't valid JSON or a rule has no
+            prefix.
+    '''
+    if path is None:
+        path = get_rules_path()
+    try:
+        with open(path, 'r') as ins:
+            data = json.load(ins)
+    except (IOError, OSError):
+        data = {}
+    rules = list(data.get("rules") or [])
+    for rule in rules:
+        if not rule.get("prefix"):
+            raise ValueError("A rule in {} has no prefix: {}"
+                             .format(path, rule))
+    return {"rules": rules, "renames": dict(data.get("renames") or {})}
+
+
+def _fold(text):
+    return text.replace("\\", "/").lower()
+
+
+def expand(value, variables):
+    '''Replace each %NAME% in value with variables[NAME] (unknown names
+    are left as is) and a leading "~" with the home directory.
+    '''
+    def replace(match):
+        result = variables.get(match.group(1))
+        if result is None:
+            return match.group(0)
+        return result
+    return os.path.expanduser(_VAR_RE.sub(replace, value))
+
+
+class _Node(object):
+    __slots__ = ("children", "rule", "exact_rule")
+
+    def __init__(self):
+        self.children = {}
+        self.rule = None
+        self.exact_rule = None
+
+
+class PathRules(object):
+    '''A compiled set of rules.
+
+    Attributes:
+        rules (list[dict]): The rules in the order they were added.
+        renames (dict): Folder name (lowercase) to new name.
+        variables (dict): Values for %NAME% in each "to".
+    '''
+    def __init__(self, rules=None, renames=None, variables=None):
+        self.rules = []
+        self.renames = {}
+        self.variables = dict(variables) if variables else {}
+        self._root = _Node()
+        for rule in (DEFAULT_RULES if rules is None else rules):
+            self.add(rule)
+        if renames is None:
+            renames = DEFAULT_RENAMES
+        for old, new in renames.items():
+            self.add_rename(old, new)
+
+    def add(self, rule):
+        '''Add a rule (replacing any with the same prefix and exact).'''
+        node = self._root
+        for char in _fold(rule["prefix"]).rstrip("/"):
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _Node()
+            node = child
+        if rule.get("exact"):
+            node.exact_rule = rule
+        else:
+            node.rule = rule
+        self.rules.append(rule)
+
+    def add_rename(self, old, new):
+        '''Add a rename, unless new has an unknown %NAME% (such as
+        %CLOUD_NAME% if there is no cloud folder).
+        '''
+        for name in _VAR_RE.findall(new):
+            if self.variables.get(name) is None:
+                return
+        self.renames[old.lower()] = expand(new, self.variables)
+
+    def match(self, path):
+        '''Find the rule with the longest prefix of path.
+
+        Returns:
+            tuple(dict, str): The rule and the rest of path after the
+                prefix (without leading separators), or (None, None).
+        '''
+        node = self._root
+        best = None
+        best_end = 0
+        i = 0
+        count = len(path)
+        while True:
+            at_end = (i == count)
+            if at_end or (path[i] in "\\/"):
+                # A boundary (See the module docstring)
+                if at_end and (node.exact_rule is not None):
+                    best, best_end = node.exact_rule, i
+                elif node.rule is not None:
+                    best, best_end = node.rule, i
+            if at_end:
+                break
+            char = path[i]
+            if char == "\\":
+                char = "/"
+            for folded in char.lower():
+                node = node.children.get(folded)
+                if node is None:
+                    break
+            if node is None:
+                break
+            i += 1
+        if best is None:
+            return None, None
+        return best, path[best_end:].lstrip("\\/")
+
+    def translate(self, path, bases=None, exists=os.path.exists,
+                  find=None):
+        '''Rewrite a Windows path for a non-Windows platform.
+
+        Args:
+            path (str): The path (or command line starting with one).
+            bases (list[str], optional): The directories tried by rules
+                that have "search": true.
+            exists (callable, optional): The function that checks each
+                directory tried (such as one that can time out, in
+                which case OSError means to try the next one).
+            find (callable, optional): If no directory tried has the
+                rest of the path, call find(directory, rest) for each
+                to find it another way (such as ignoring case, See
+                blnk.listing.CaseInsensitiveResolver). It returns the
+                path or None.
+
+        Returns:
+            tuple(str, dict): The new path with "/" separators, and the
+                rule that was used (None if no rule matched).
+        '''
+        rule, rest = self.match(path)
+        if rule is None:
+            return path.replace("\\", "/"), None
+        rest = rest.replace("\\", "/")
+        skip = rule.get("skip", 0)
+        if skip:
+            rest = "/".join(rest.split("/")[skip:])
+        search = rule.get("search")
+        if search:
+            if search is True:
+                search = bases or []
+            search = [expand(base, self.variables) for base in search]
+            for base in search:
+                try_path = os.path.join(base, rest)
+                try:
+                    found = exists(try_path)
+                except OSError as ex:
+                    logger.warning("  [blnk] {}".format(ex))
+                    continue
+                if found:
+                    logger.warning("  [blnk] {} was detected."
+                                   .format(try_path))
+                    return try_path, rule
+                logger.info("  [blnk] {} doesn't exist.".format(try_path))
+            if (find is None) or not rest:
+                search = []
+            for base in search:
+                try:
+                    found_path = find(base, rest)
+                except OSError as ex:
+                    logger.warning("  [blnk] {}".format(ex))
+                    continue
+                if found_path is not None:
+                    logger.warning("  [blnk] {} was detected (ignoring"
+                                   " case).".format(found_path))
+                    return found_path, rule
+        to = expand(rule["to"], self.variables)
+        result = os.path.join(to, rest) if rest else to
+        if rule.get("forced"):
+            logger.warning("  [blnk] {} was forced due to bad path:"
+                           " \"{}\".".format(result, path))
+        return result, rule
+
+    def rename(self, path):
+        '''Replace each folder name in path that has a rename.'''
+        if not self.renames:
+            return path
+        pieces = _SEP_RE.split(path)
+        for i in range(0, len(pieces), 2):
+            new = self.renames.get(pieces[i].lower())
+            if new is not None:
+                pieces[i] = new
+        return "".join(pieces)
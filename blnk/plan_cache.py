@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+'''
+Persistent cache of launch plans (See BLink.plan and BLink.run_plan).
+
+The plan for a shortcut only depends on the content of the shortcut,
+the environment variables that replace_vars consults, the system
+directories, which BASES exist and which programs are installed (the
+key of blnk.cached_which, such as for the program chosen to open a
+File). Each plan is stored in its own small JSON file under the user
+cache directory, keyed by the shortcut's path, size and mtime_ns plus a
+hash of that context, so a repeat click only costs a stat of the
+shortcut, one small read, a stat of each BASES and PATH directory and a
+stat of the target.
+
+A plan whose program was found on the PATH has that program's full path
+as its target, so the plan is dropped if the program is removed.
+'''
+import hashlib
+import json
+import os
+import re
+
+from blnk.appdirs import write_atomic
+
+CACHE_VERSION = 1
+
+# Always part of the context (in addition to any variables that the
+#   shortcut's values refer to):
+DEFAULT_ENV_NAMES = (
+    "HOME",
+    "USERPROFILE",
+    "PATH",
+    "XDG_CURRENT_DESKTOP",
+)
+
+ENV_NAME_RE = re.compile(
+    r"%([A-Za-z_][A-Za-z0-9_]*)%"
+    r"|\$\{([A-Za-z_][A-Za-z0-9_]*)\}"
+    r"|\$([A-Za-z_][A-Za-z0-9_]*)"
+)
+
+
+def referenced_env_names(values):
+    '''Get the names of environment variables used in values.
+
+    Args:
+        values (Iterable[str]): Values from a shortcut.
+
+    Returns:
+        list[str]: Names in %NAME%, ${NAME} or $NAME form (sorted).
+    '''
+    names = set()
+    for value in values:
+        if not value:
+            continue
+        for match in ENV_NAME_RE.finditer(str(value)):
+            names.add(match.group(1) or match.group(2) or match.group(3))
+    return sorted(names)
+
+
+def shortcut_key(path):
+    '''Get the part of the key that identifies the shortcut's content.
+
+    Raises:
+        OSError: If path can't be accessed.
+
+    Returns:
+        list: The absolute path, size and mtime_ns.
+    '''
+    stat = os.stat(path)
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+class PlanCache(object):
+    '''Store one launch plan per shortcut.
+
+    Attributes:
+        directory (str): Where the plan files are stored.
+        context (object): Anything JSON-serializable (besides the
+            environment) that plans depend on, such as sysdirs and
+            BLink.BASES. It is hashed into each entry.
+        exists (callable): Check whether a plan's target still exists
+            (such as a deadline-bounded probe, See blnk.probe).
+        state (callable): Get anything JSON-serializable that plans
+            depend on but that can change while the process runs (such
+            as which BASES exist). It is called for each get and put
+            and hashed into each entry along with context.
+    '''
+    def __init__(self, directory, context=None, exists=os.path.exists,
+                 state=None):
+        self.directory = directory
+        self.context = context
+        self.exists = exists
+        self.state = state
+
+    def _entry_path(self, key):
+        name = hashlib.sha1(key[0].encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name + ".json")
+
+    def _context_hash(self, env_names):
+        data = {
+            "context": self.context,
+            "state": self.state() if self.state is not None else None,
+            "env": [[name, os.environ.get(name)] for name in env_names],
+        }
+        encoded = json.dumps(data, sort_keys=True, default=str)
+        return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, path):
+        '''Get the plan for a shortcut if it is still valid.
+
+        Returns:
+            dict: The plan, or None if there isn't a valid one.
+        '''
+        try:
+            key = shortcut_key(path)
+            with open(self._entry_path(key), 'r') as ins:
+                entry = json.load(ins)
+        except (OSError, ValueError):
+            return None
+        if entry.get("version") != CACHE_VERSION:
+            return None
+        if entry.get("key") != key:
+            return None
+        env_names = entry.get("env_names", [])
+        if entry.get("context") != self._context_hash(env_names):
+            return None
+        plan = entry.get("plan")
+        if not plan:
+            return None
+        target = plan.get("target")
+        if target and not self.exists(target):
+            return None
+        return plan
+
+    def put(self, path, plan, values=()):
+        '''Store the plan for a shortcut.
+
+        Args:
+            path (str): The shortcut.
+            plan (dict): The plan made by BLink.plan.
+            values (Iterable[str]): The shortcut's raw values, so that
+                the environment variables they use become part of the
+                context.
+        '''
+        try:
+            key = shortcut_key(path)
+        except OSError:
+            return
+        env_names = sorted(set(DEFAULT_ENV_NAMES)
+                           | set(referenced_env_names(values)))
+        entry = {
+            "version": CACHE_VERSION,
+            "key": key,
+            "env_names": env_names,
+            "context": self._context_hash(env_names),
+            "plan": plan,
+        }
+        try:
+            write_atomic(self._entry_path(key),
+                         json.dumps(entry).encode("utf-8"))
+        except (OSError, TypeError, ValueError):
+            # The cache is only an optimization, so keep going.
+            pass
+
+    def discard(self, path):
+        try:
+            os.remove(self._entry_path([os.path.abspath(path)]))
+        except OSError:
+            pass
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+'''
+Deadline-bounded path probing.
+
+On a hung NFS/SMB (or FUSE) mount, a single os.path.exists can block
+for tens of seconds. The functions here run such probes on a daemon
+thread and give up after a deadline, raising ProbeTimeout (so blnk can
+fail fast with a clear error, or fall through to the next base).
+Probes under local filesystems are run directly since they can't hang
+that way.
+
+A mount root that timed out is remembered (in the user cache directory
+as well, since each click is usually a new process) for
+NEGATIVE_SECONDS, and probes under it fail immediately during that
+time.
+'''
+import errno
+import json
+import os
+import threading
+import time
+
+from blnk.appdirs import (
+    get_cache_dir,
+    write_atomic,
+)
+from blnk.mounts import get_mounts
+
+DEFAULT_TIMEOUT = 5.0  # seconds (See get_timeout)
+NEGATIVE_SECONDS = 60.0
+
+# Filesystem types that can't hang like a network mount:
+LOCAL_FS_TYPES = frozenset([
+    "btrfs", "devtmpfs", "exfat", "ext2", "ext3", "ext4", "f2fs",
+    "hfsplus", "iso9660", "jfs", "msdos", "ntfs", "ntfs3", "overlay",
+    "proc", "ramfs", "reiserfs", "squashfs", "sysfs", "tmpfs", "udf",
+    "vfat", "xfs", "zfs",
+])
+
+
+class ProbeTimeout(OSError):
+    '''A path probe didn't finish before its deadline.'''
+    def __init__(self, path, root, timeout):
+        OSError.__init__(
+            self,
+            errno.ETIMEDOUT,
+            "\"{}\" didn't respond within {}s (probing \"{}\")"
+            .format(root, timeout, path),
+        )
+        self.path = path
+        self.root = root
+        self.timeout = timeout
+
+
+def get_timeout(timeout=None):
+    '''Get the probe deadline.
+
+    Args:
+        timeout (float, optional): Use this unless the
+            BLNK_PROBE_TIMEOUT environment variable is set. Defaults to
+            DEFAULT_TIMEOUT.
+
+    Returns:
+        float: The deadline in seconds (0 or less disables threads and
+            deadlines).
+    '''
+    value = os.environ.get("BLNK_PROBE_TIMEOUT")
+    if value:
+        return float(value)
+    if timeout is None:
+        return DEFAULT_TIMEOUT
+    return timeout
+
+
+def find_mount(path):
+    '''Find the mount containing path, without accessing path.
+
+    Returns:
+        tuple(str, str): The mount point and filesystem type. If there
+            is no mount table, the first two parts of the path (or the
+            drive or UNC share) and None.
+    '''
+    path = os.path.abspath(path)
+    mounts = get_mounts()
+    if mounts is not None:
+        for mount in mounts:
+            mount_point = mount.mount_point
+            if mount_point == "/":
+                return mount_point, mount.fs_type
+            if (path == mount_point) or path.startswith(mount_point + "/"):
+                return mount_point, mount.fs_type
+    drive, rest = os.path.splitdrive(path)
+    parts = [part for part in rest.replace("\\", "/").split("/") if part]
+    return drive + os.sep + os.sep.join(parts[:2]), None
+
+
+class _NegativeCache(object):
+    '''Remember mount roots that recently timed out.'''
+    def __init__(self):
+        self.path = None
+        self.roots = None  # root: time when it may be retried
+        self._lock = threading.Lock()
+
+    def _load(self):
+        self.path = os.path.join(get_cache_dir(), "unreachable.json")
+        self.roots = {}
+        try:
+            with open(self.path, 'r') as ins:
+                self.roots = json.load(ins)
+        except (IOError, OSError, ValueError):
+            pass
+
+    def is_unreachable(self, root):
+        with self._lock:
+            if self.roots is None:
+                self._load()
+            retry_time = self.roots.get(root)
+            return (retry_time is not None) and (time.time() < retry_time)
+
+    def mark(self, root):
+        with self._lock:
+            if self.roots is None:
+                self._load()
+            now = time.time()
+            self.roots = {key: value for key, value in self.roots.items()
+                          if value > now}
+            self.roots[root] = now + NEGATIVE_SECONDS
+            try:
+                write_atomic(self.path,
+                             json.dumps(self.roots).encode("utf-8"))
+            except (IOError, OSError):
+                pass
+
+
+_negative_cache = _NegativeCache()
+
+
+def probe(fn, path, timeout=None):
+    '''Call fn(path) but give up after a deadline.
+
+    Args:
+        fn (callable): Such as os.path.exists.
+        path (str): The path to probe.
+        timeout (float, optional): See get_timeout.
+
+    Raises:
+        ProbeTimeout: If fn didn't return in time, or if the mount
+            containing path recently timed out.
+
+    Returns:
+        Whatever fn returns.
+    '''
+    timeout = get_timeout(timeout)
+    if timeout <= 0:
+        return fn(path)
+    root, fs_type = find_mount(path)
+    if fs_type in LOCAL_FS_TYPES:
+        return fn(path)
+    if _negative_cache.is_unreachable(root):
+        raise ProbeTimeout(path, root, timeout)
+    result = {}
+    done = threading.Event()
+
+    def run_fn():
+        try:
+            result["value"] = fn(path)
+        except BaseException as ex:
+            result["error"] = ex
+        finally:
+            done.set()
+
+    thread = threading.Thread(target=run_fn, name="blnk-probe")
+    thread.daemon = True  # Don't wait for a hung mount on exit.
+    thread.start()
+    if not done.wait(timeout):
+        _negative_cache.mark(root)
+        raise ProbeTimeout(path, root, timeout)
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+def exists(path, timeout=None):
+    '''os.path.exists with a deadline (See probe).'''
+    return probe(os.path.exists, path, timeout=timeout)
+
+
+def isfile(path, timeout=None):
+    '''os.path.isfile with a deadline (See probe).'''
+    return probe(os.path.isfile, path, timeout=timeout)
+
+
+def isdir(path, timeout=None):
+    '''os.path.isdir with a deadline (See probe).'''
+    return probe(os.path.isdir, path, timeout=timeout)
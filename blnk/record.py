@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+'''
+Compact, read-only summaries of shortcuts for large collections.
+
+A BLink keeps every section, value and comment of its file in dicts,
+plus parser state, so that it can be edited and saved. A service that
+only needs to list or search many shortcuts can keep a ShortcutRecord
+for each instead: one tuple of strings, made directly from the parser's
+events (See read_record) without building a BLink. Strings that repeat
+across many files (Type and hostname) are interned. Call to_blink when
+one needs to be edited or saved.
+
+tests/blnk/benchmark_records.py compares the memory used by each.
+'''
+import sys
+
+from collections import namedtuple
+
+from blnk.blnk_spec import TARGET_MAP
+from blnk.parsing import iterparse
+
+FIELDS = ("path", "type", "name", "target_key", "target", "created",
+          "modified", "accessed", "hostname")
+
+
+def get_target(options):
+    '''Get the target key and target the same way as BLink.target, but
+    also for legacy files where the key doesn't match TARGET_MAP (such
+    as Exec for Type=Directory).
+
+    Returns:
+        tuple(str, str): target_key and target (each None if not found).
+    '''
+    target_key = TARGET_MAP.get(options.get("Type"))
+    if (target_key is None) or (target_key not in options):
+        target_key = None
+        for key in ("Path", "Exec", "URL"):
+            if key in options:
+                target_key = key
+                break
+    return target_key, options.get(target_key)
+
+
+def _str(value):
+    # A BLink's values may be other types, such as the datetime objects
+    #   set by analyze_target.
+    if value is None:
+        return None
+    return str(value)
+
+
+def _intern(value):
+    if value is None:
+        return None
+    return sys.intern(str(value))
+
+
+class ShortcutRecord(namedtuple("ShortcutRecord", FIELDS)):
+    '''The values of a shortcut that a catalog needs.
+
+    Attributes:
+        path (str): The blnk file.
+        type (str): Type (such as "File" or "Link").
+        name (str): Name.
+        target_key (str): The key of the target (See get_target).
+        target (str): The target as written in the file (not rewritten
+            for this platform, See BLink.getExec).
+        created (str): created in X-Target Metadata.
+        modified (str): modified in X-Target Metadata.
+        accessed (str): accessed in X-Target Metadata.
+        hostname (str): hostname in X-Source Metadata.
+
+    Each is None if the file doesn't have it.
+    '''
+    __slots__ = ()  # no __dict__, so each is only a tuple
+
+    @classmethod
+    def from_sections(cls, path, sections):
+        '''Make a record from values by section (such as BLink.tree).
+
+        Values that aren't strings are converted using str.
+        '''
+        options = sections.get("X-Blnk", {})
+        meta = sections.get("X-Target Metadata", {})
+        source = sections.get("X-Source Metadata", {})
+        target_key, target = get_target(options)
+        return cls(
+            path=path,
+            type=_intern(options.get("Type")),
+            name=_str(options.get("Name")),
+            target_key=_intern(target_key),
+            target=_str(target),
+            created=_str(meta.get("created")),
+            modified=_str(meta.get("modified")),
+            accessed=_str(meta.get("accessed")),
+            hostname=_intern(source.get("hostname")),
+        )
+
+    @classmethod
+    def from_blink(cls, link):
+        '''Make a record from a loaded BLink.'''
+        return cls.from_sections(link.path, link.tree)
+
+    def to_blink(self):
+        '''Load the whole shortcut (such as to edit or save it).
+
+        Returns:
+            BLink: The shortcut, loaded from path again, since a record
+                doesn't have every value and comment.
+        '''
+        from blnk import BLink
+        return BLink(path=self.path)
+
+
+def read_record(path):
+    '''Parse a blnk file into a ShortcutRecord without making a BLink.
+
+    Raises:
+        FileTypeError: If path isn't a blnk file.
+        SyntaxError: If a line is not valid blnk format.
+    '''
+    sections = {}
+    for event in iterparse(path):
+        if event.event == "value":
+            sections.setdefault(event.section, {})[event.key] = event.value
+    return ShortcutRecord.from_sections(path, sections)
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+'''
+Bulk Metadata Refresher
+-----------------------
+Refresh the X-Target Metadata (modified and created) of many shortcuts
+at once, like `blnk --update <file>` for each.
+
+Usage:
+    blnk update [--jobs <n>] [--dry-run] [--all] <file>...
+    blnk update --recursive [--prune <pattern>]... <dir>...
+
+Shortcuts are loaded and their targets (resolved as by run, See
+BLink.resolve_target) statted in a bounded thread pool. Each target is
+statted once even if several shortcuts point to it, and a target that
+is in the tree being searched reuses the stat of its os.DirEntry. The
+hostname is looked up once per run (See blnk.get_hostname).
+
+A shortcut is only written if its target's modified or created time
+changed, so a nightly refresh doesn't touch (and make a sync client
+upload) every file. Only Type=Directory and Type=File have this
+metadata, so others are skipped.
+
+One JSON object is written per line for each shortcut that was updated
+or had an error (or each shortcut with --all), then a summary line.
+'''
+from __future__ import print_function
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ThreadPoolExecutor,
+    wait,
+)
+
+from blnk import (
+    BLink,
+    get_hostname,
+    get_resolve_config,
+    probe,
+)
+from blnk.catalog import (
+    DEFAULT_PRUNE,
+    walk_blnk_files,
+)
+
+DEFAULT_JOBS = 16
+
+METADATA_TYPES = ("Directory", "File")
+
+
+class TargetStats(object):
+    '''Stat each target once.
+
+    Attributes:
+        entries (dict): os.DirEntry objects by path (See
+            blnk.catalog.walk_blnk_files) whose stat is reused.
+        timeout (float): The deadline for each stat (See
+            blnk.probe.get_timeout).
+        stats (int): How many targets were actually statted (not
+            counting any stat done by an os.DirEntry).
+    '''
+    def __init__(self, entries=None, timeout=None):
+        self.entries = entries if entries is not None else {}
+        self.timeout = timeout
+        self.stats = 0
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def stat(self, path):
+        '''Get the stat of path (following symlinks, as os.stat does).
+
+        Raises:
+            OSError: Such as FileNotFoundError if path doesn't exist,
+                or ProbeTimeout if its mount didn't respond.
+        '''
+        path = os.path.abspath(path)
+        with self._lock:
+            result = self._results.get(path)
+        if result is not None:
+            if isinstance(result, OSError):
+                raise result
+            return result
+        try:
+            entry = self.entries.get(path)
+            if entry is not None:
+                result = entry.stat()
+            else:
+                result = probe.probe(os.stat, path, timeout=self.timeout)
+                with self._lock:
+                    self.stats += 1
+        except OSError as ex:
+            result = ex
+        with self._lock:
+            self._results[path] = result
+        if isinstance(result, OSError):
+            raise result
+        return result
+
+
+def update_file(path, stats, dry_run=False):
+    '''Refresh one shortcut's metadata if its target changed.
+
+    Args:
+        path (str): The shortcut.
+        stats (TargetStats): The stat cache shared by every file.
+        dry_run (bool, optional): Don't write anything.
+
+    Returns:
+        dict: "path", "status" ("updated", "unchanged", "skipped" (such
+            as for Type=Link), "missing" or "error") and, depending on
+            the status, "type", "target" and "error".
+    '''
+    result = {"path": path}
+    try:
+        link = BLink(path=path)
+        Type, target = link.resolve_target()
+    except Exception as ex:
+        result["status"] = "error"
+        result["error"] = "{}: {}".format(type(ex).__name__, ex)
+        return result
+    result["type"] = Type
+    result["target"] = target
+    if (Type not in METADATA_TYPES) or (target is None):
+        result["status"] = "skipped"
+        return result
+    try:
+        stat_result = stats.stat(target)
+    except FileNotFoundError:
+        result["status"] = "missing"
+        return result
+    except OSError as ex:
+        result["status"] = "error"
+        result["error"] = "{}: {}".format(type(ex).__name__, ex)
+        return result
+    modified, created = BLink.get_target_times(stat_result)
+    if ((str(link.meta.get("modified")) == str(modified))
+            and (str(link.meta.get("created")) == str(created))):
+        result["status"] = "unchanged"
+        return result
+    result["status"] = "updated"
+    if dry_run:
+        return result
+    try:
+        # Only change the times, keeping every other value as written.
+        #   (analyze_target would also replace Comment, hostname and the
+        #   target, and save would refuse legacy files such as those
+        #   with Exec instead of Path or without a Comment):
+        link._set("X-Target Metadata", "modified", modified)
+        link._set("X-Target Metadata", "created", created)
+        link._write(path)
+    except Exception as ex:
+        result["status"] = "error"
+        result["error"] = "{}: {}".format(type(ex).__name__, ex)
+    return result
+
+
+def iter_paths(roots, recursive=False, prune=None, entry_map=None):
+    '''Get the shortcuts to update.
+
+    Args:
+        roots (list[str]): Shortcuts, or directories if recursive.
+        entry_map (dict, optional): See blnk.catalog.walk_blnk_files.
+
+    Yields:
+        str: Each path.
+    '''
+    for root in roots:
+        if recursive and os.path.isdir(root):
+            for path, _ in walk_blnk_files(os.path.abspath(root),
+                                           prune=prune,
+                                           entry_map=entry_map):
+                yield path
+        else:
+            yield root
+
+
+def update_paths(paths, jobs=DEFAULT_JOBS, stats=None, dry_run=False):
+    '''Update shortcuts concurrently.
+
+    Args:
+        paths (iterable[str]): Such as the output of iter_paths (which
+            is only consumed as threads become free, so a huge tree
+            doesn't have to be walked first).
+        stats (TargetStats, optional): A stat cache to share.
+
+    Yields:
+        dict: The result of update_file for each shortcut, in the order
+            they finish.
+    '''
+    if stats is None:
+        stats = TargetStats()
+    max_pending = jobs * 4
+    pending = set()
+    ready = deque()
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        for path in paths:
+            pending.add(executor.submit(update_file, path, stats,
+                                        dry_run=dry_run))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                ready.extend(future.result() for future in done)
+            while ready:
+                yield ready.popleft()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def update_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="blnk update",
+        description=("Refresh the target metadata of shortcuts, writing"
+                     " only those whose target changed."),
+    )
+    parser.add_argument("paths", nargs="+", metavar="path",
+                        help="Shortcuts (or directories with -r)")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Update every shortcut under each directory")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                        help="The maximum number of threads (default: {})"
+                        .format(DEFAULT_JOBS))
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Only report which shortcuts would change")
+    parser.add_argument("--all", action="store_true",
+                        help="Also write shortcuts that are unchanged or"
+                        " skipped")
+    parser.add_argument(
+        "--prune", action="append", metavar="pattern",
+        help=("Skip files or directories with names matching this"
+              " glob pattern (can be repeated; default: {})"
+              .format(DEFAULT_PRUNE)),
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if not args.recursive:
+        for path in args.paths:
+            if os.path.isdir(path):
+                parser.error("{} is a directory (use --recursive)"
+                             .format(path))
+    start = time.time()
+    get_hostname()  # Look it up once now, not in each thread.
+    stats = TargetStats(timeout=get_resolve_config().probe_timeout)
+    paths = iter_paths(args.paths, recursive=args.recursive,
+                       prune=args.prune, entry_map=stats.entries)
+    counts = {}
+    for result in update_paths(paths, jobs=args.jobs, stats=stats,
+                               dry_run=args.dry_run):
+        status = result["status"]
+        counts[status] = counts.get(status, 0) + 1
+        if args.all or (status in ("updated", "missing", "error")):
+            print(json.dumps(result))
+            sys.stdout.flush()
+    summary = {
+        "counts": counts,
+        "stats": stats.stats,
+        "seconds": round(time.time() - start, 3),
+        "jobs": args.jobs,
+        "dry_run": args.dry_run,
+    }
+    print(json.dumps({"summary": summary}))
+    if counts.get("error"):
+        return 1
+    return 0
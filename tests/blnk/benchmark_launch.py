@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+'''
+Compare the launch strategies in blnk/launch.py (Linux or other POSIX).
+
+For each strategy, a forked child plays the part of blnk and launches a
+program that stays open for a while (like a GUI app). The time that
+"blnk" stays resident is measured from the fork until the child exits
+or is replaced by exec (a close-on-exec pipe reaches EOF either way).
+
+Usage: python tests/blnk/benchmark_launch.py [<count> [<seconds>]]
+'''
+import os
+import sys
+import time
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+sys.path.insert(0, REPO_DIR)
+
+from blnk.launch import (  # noqa: E402
+    STRATEGIES,
+    launch,
+)
+
+
+def time_resident(strategy, parts):
+    '''Get how long a process that launches parts stays resident.'''
+    read_fd, write_fd = os.pipe()  # non-inheritable (close-on-exec)
+    start = time.time()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        try:
+            launch(parts, strategy=strategy)
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    os.read(read_fd, 1)  # EOF when the child exits or execs
+    resident = time.time() - start
+    os.close(read_fd)
+    os.waitpid(pid, 0)
+    return resident
+
+
+def main():
+    count = 10
+    seconds = "0.3"
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+    if len(sys.argv) > 2:
+        seconds = sys.argv[2]
+    parts = ["sleep", seconds]
+    print("Launching {} {} times per strategy...".format(parts, count))
+    for strategy in STRATEGIES:
+        times = sorted(time_resident(strategy, parts) for _ in range(count))
+        print("{:>12}: resident for {:8.2f} ms (median), {:8.2f} ms (min)"
+              .format(strategy, times[len(times) // 2] * 1000,
+                      times[0] * 1000))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
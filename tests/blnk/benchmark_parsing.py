@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+'''
+Compare the throughput of BLink.load (blnk.parsing) with the per-line
+BLink._pushLine parser.
+
+Usage: python tests/blnk/benchmark_parsing.py [<count>]
+'''
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, TEST_MODULE_DIR)
+
+from blnk import BLink  # noqa: E402
+
+from test_parsing import load_per_line  # noqa: E402
+
+TEMPLATE = '''[X-Blnk]
+Type=File
+Name=Document {i}
+Comment=Created using 'blnk -s Document{i}.odt'
+NoDisplay=true
+# Synthetic shortcut {i}
+Path=D:\\Documents\\Document{i}.odt
+
+[X-Target Metadata]
+modified=2022-11-02 16:53:52.717704+00:00
+created=2022-11-02 16:53:52.717704+00:00
+
+[X-Source Metadata]
+hostname=example
+'''
+
+
+def make_files(directory, count):
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, "{}.blnk".format(i))
+        with open(path, 'w') as outs:
+            outs.write(TEMPLATE.format(i=i))
+        paths.append(path)
+    return paths
+
+
+def measure(name, load_fn, paths):
+    start = time.perf_counter()
+    for path in paths:
+        load_fn(path)
+    elapsed = time.perf_counter() - start
+    print("{}: {:.3f}s ({:.0f} files/s)"
+          .format(name, elapsed, len(paths) / elapsed))
+    return elapsed
+
+
+def main():
+    count = 10000
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+    directory = tempfile.mkdtemp(prefix="blnk-benchmark-")
+    try:
+        paths = make_files(directory, count)
+        slow = measure("_pushLine per line", load_per_line, paths)
+        fast = measure("BLink.load", lambda path: BLink(path=path), paths)
+        print("speedup: {:.2f}x".format(slow / fast))
+    finally:
+        shutil.rmtree(directory)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
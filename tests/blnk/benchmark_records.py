@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+'''
+Compare the memory used to hold many shortcuts as BLink objects and as
+ShortcutRecord tuples (See blnk/record.py), using tracemalloc.
+
+Usage: python tests/blnk/benchmark_records.py [<count>]
+'''
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, TEST_MODULE_DIR)
+
+from blnk import BLink  # noqa: E402
+from blnk.record import read_record  # noqa: E402
+
+from benchmark_parsing import make_files  # noqa: E402
+
+
+def measure(name, load_fn, paths):
+    '''Load every path and report the memory still held afterward.
+
+    Returns:
+        int: The bytes allocated for the loaded items.
+    '''
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    items = [load_fn(path) for path in paths]
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print("{}: {:.1f} MiB ({:.0f} bytes per file, peak {:.1f} MiB)"
+          " in {:.1f}s".format(name, size / 1048576.0, size / len(items),
+                               peak / 1048576.0, elapsed))
+    del items
+    return size
+
+
+def main():
+    count = 100000
+    if len(sys.argv) > 1:
+        count = int(sys.argv[1])
+    directory = tempfile.mkdtemp(prefix="blnk-benchmark-")
+    try:
+        paths = make_files(directory, count)
+        full = measure("BLink", lambda path: BLink(path=path), paths)
+        compact = measure("ShortcutRecord", read_record, paths)
+        print("{:.1f}x less memory".format(full / float(compact)))
+    finally:
+        shutil.rmtree(directory)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,9 @@
+import contextlib
+import os
+import shutil
+import tempfile
+
+
 def assert_equal(got, correct, tb):
     '''Raise an exception when the compared values do not match.
 
@@ -22,3 +28,32 @@ def assert_equal(got, correct, tb):
         )
     else:
         print("* {} {} OK".format(tb, got))
+
+
+@contextlib.contextmanager
+def isolated_cache():
+    '''Use a temporary BLNK_CACHE_DIR (and caches loaded from there)
+    so that tests don't change the user's caches.
+
+    Yields:
+        str: The temporary cache directory.
+    '''
+    import blnk
+    from blnk import probe
+    cache_dir = tempfile.mkdtemp()
+    old_env = os.environ.get("BLNK_CACHE_DIR")
+    old_caches = (blnk._exe_cache, blnk._plan_cache, probe._negative_cache)
+    os.environ["BLNK_CACHE_DIR"] = cache_dir
+    blnk._exe_cache = None
+    blnk._plan_cache = None
+    probe._negative_cache = probe._NegativeCache()
+    try:
+        yield cache_dir
+    finally:
+        if old_env is None:
+            del os.environ["BLNK_CACHE_DIR"]
+        else:
+            os.environ["BLNK_CACHE_DIR"] = old_env
+        blnk._exe_cache, blnk._plan_cache, probe._negative_cache = \
+            old_caches
+        shutil.rmtree(cache_dir)
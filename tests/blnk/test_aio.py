@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+'''
+Check the asyncio API (See blnk/aio.py).
+'''
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+else:
+    sys.path.insert(0, TEST_MODULE_DIR)
+    # ^ Allow importing blnktestutils from here.
+
+from blnk import (  # noqa: E402
+    BLink,
+    FileTypeError,
+)
+from blnk import aio  # noqa: E402
+
+from blnktestutils import isolated_cache  # noqa: E402
+
+
+class CustomBLink(BLink):
+    pass
+
+
+def make_app(root, name, code):
+    path = os.path.join(root, name)
+    with open(path, 'w') as outs:
+        outs.write("[X-Blnk]\n"
+                   "Type=Application\n"
+                   "Name={}\n"
+                   "Exec={} -c \"{}\"\n".format(name, sys.executable, code))
+    return path
+
+
+async def _check_run_file(root):
+    ok = make_app(root, "ok.blnk", "import sys; sys.exit(0)")
+    fails = make_app(root, "fails.blnk", "import sys; sys.exit(3)")
+    slow = make_app(root, "slow.blnk", "import time; time.sleep(30)")
+    link = await BLink.aload(ok)
+    assert link.get("Type") == "Application"
+    assert type(link) is BLink
+    assert type(await CustomBLink.aload(ok)) is CustomBLink
+    try:
+        await BLink.aload(os.path.join(REPO_DIR, "license.txt"))
+    except FileTypeError:
+        pass
+    else:
+        raise AssertionError("license.txt was loaded as blnk")
+    # Many launches at once:
+    results = await asyncio.gather(*[aio.run_file(ok, strategy="wait")
+                                     for _ in range(20)])
+    assert results == [0] * 20
+    try:
+        await aio.run_file(fails, strategy="wait")
+    except subprocess.CalledProcessError as ex:
+        assert ex.returncode == 3
+    else:
+        raise AssertionError("The failure wasn't raised.")
+    assert await aio.run_file(fails, strategy="wait", check=False) == 3
+    start = time.time()
+    try:
+        await aio.run_file(slow, strategy="wait", timeout=1)
+    except asyncio.TimeoutError:
+        pass
+    else:
+        raise AssertionError("The timeout wasn't raised.")
+    # The program was stopped rather than left running:
+    assert time.time() - start < 10
+    task = asyncio.ensure_future(aio.run_file(slow, strategy="wait"))
+    await asyncio.sleep(0.5)
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    else:
+        raise AssertionError("The launch wasn't cancelled.")
+    assert await aio.run_file(ok, strategy="detach") == 0
+
+
+def test_run_file():
+    root = tempfile.mkdtemp()
+    try:
+        with isolated_cache():
+            asyncio.run(_check_run_file(root))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_run_file()
+    print("All tests passed.")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+'''
+Check reading paths and resolving them concurrently for
+`blnk run --batch` (nothing is launched).
+'''
+import io
+import os
+import sys
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+TEST_DATA_DIR = os.path.join(TESTS_DIR, "data")
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+else:
+    sys.path.insert(0, TEST_MODULE_DIR)
+    # ^ Allow importing blnktestutils from here.
+
+from blnk.batch import (  # noqa: E402
+    read_paths,
+    resolve_all,
+)
+
+from blnktestutils import isolated_cache  # noqa: E402
+
+
+def test_read_paths():
+    stream = io.BytesIO(b"a.blnk\r\n\nb c.blnk\n")
+    assert read_paths(stream) == ["a.blnk", "b c.blnk"]
+    stream = io.BytesIO(b"a\nb.blnk\0c.blnk\0")
+    assert read_paths(stream, null=True) == ["a\nb.blnk", "c.blnk"]
+
+
+def test_resolve_all_keeps_order():
+    paths = [
+        os.path.join(TEST_DATA_DIR, "comments.blnk"),
+        os.path.join(TEST_DATA_DIR, "missing.blnk"),
+        os.path.join(REPO_DIR, "license.txt"),
+    ]
+    with isolated_cache():
+        results = resolve_all(paths, jobs=3)
+    assert [result["path"] for result in results] == paths
+    assert results[0]["plan"].argv[0] == "xdg-open"
+    assert "FileNotFoundError" in results[1]["error"]
+    # A non-blnk file is planned using the associations:
+    assert results[2]["plan"].argv[-1] == paths[2]
+
+
+if __name__ == "__main__":
+    test_read_paths()
+    test_resolve_all_keeps_order()
+    print("All tests passed.")
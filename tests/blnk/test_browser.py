@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+'''
+Check how Type=Link launch plans are combined into browser calls.
+'''
+import os
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk.browser import (  # noqa: E402
+    chunk_urls,
+    coalesce_url_plans,
+    get_multi_url_command,
+)
+from blnk.command import Command  # noqa: E402
+
+
+def url_plan(url):
+    return Command(argv=["xdg-open", url])
+
+
+def test_get_multi_url_command():
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, "browser.desktop")
+        with open(path, 'w') as outs:
+            outs.write("[Desktop Entry]\n"
+                       "Exec=browser --new-tab %U\n"
+                       "[Desktop Action new-window]\n"
+                       "Exec=browser --new-window %u\n")
+        assert get_multi_url_command(path) == (["browser", "--new-tab"], [])
+        with open(path, 'w') as outs:
+            outs.write("[Desktop Entry]\nExec=browser %u\n")
+        assert get_multi_url_command(path) is None
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_chunk_urls():
+    urls = ["https://example.com/{}".format(i) for i in range(5)]
+    assert list(chunk_urls(urls, max_count=2)) == [urls[0:2], urls[2:4],
+                                                   urls[4:]]
+    assert list(chunk_urls(urls, max_chars=len(urls[0]) + 1)) == \
+        [[url] for url in urls]
+
+
+def test_coalesce_url_plans():
+    other = Command(argv=["geany", "a.txt"], target="a.txt")
+    plans = [url_plan("https://a.example"), other,
+             url_plan("https://b.example")]
+    groups = coalesce_url_plans(plans, command=(["browser"], ["--x"]))
+    assert groups[0] == (other, [1])
+    plan, indices = groups[1]
+    assert plan.argv == ["browser", "https://a.example",
+                         "https://b.example", "--x"]
+    assert indices == [0, 2]
+    # A single URL is left for xdg-open:
+    single = coalesce_url_plans(plans[:2], command=(["browser"], []))
+    assert single == [(plans[0], [0]), (plans[1], [1])]
+
+
+if __name__ == "__main__":
+    test_get_multi_url_command()
+    test_chunk_urls()
+    test_coalesce_url_plans()
+    print("All tests passed.")
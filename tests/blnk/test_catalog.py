@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+'''
+Check that the catalog only parses changed files again, removes rows
+for deleted files, and that each query filter works (See
+blnk/catalog.py).
+'''
+import os
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk import catalog  # noqa: E402
+
+
+def make_shortcut(path, shortcut_type="File", name="Notes",
+                  target="/tmp/notes.txt", hostname="pc"):
+    parent = os.path.dirname(path)
+    if not os.path.isdir(parent):
+        os.makedirs(parent)
+    key = "URL" if shortcut_type == "Link" else "Path"
+    with open(path, 'w') as outs:
+        outs.write("[X-Blnk]\n"
+                   "Type={}\n"
+                   "Name={}\n"
+                   "{}={}\n"
+                   "\n"
+                   "[X-Source Metadata]\n"
+                   "hostname={}\n".format(shortcut_type, name, key, target,
+                                          hostname))
+
+
+def counting_read_record(parsed):
+    read_record = catalog.read_record
+
+    def _read_record(path):
+        parsed.append(path)
+        return read_record(path)
+    return _read_record
+
+
+def test_index_tree():
+    root = tempfile.mkdtemp()
+    old_read_record = catalog.read_record
+    parsed = []
+    catalog.read_record = counting_read_record(parsed)
+    conn = catalog.connect(os.path.join(root, "catalog.sqlite3"))
+    try:
+        tree = os.path.join(root, "tree")
+        notes = os.path.join(tree, "notes.blnk")
+        site = os.path.join(tree, "sub", "site.blnk")
+        pruned = os.path.join(tree, "skip", "hidden.blnk")
+        make_shortcut(notes)
+        make_shortcut(site, shortcut_type="Link", name="Site",
+                      target="https://example.com", hostname="laptop")
+        make_shortcut(pruned)
+        with open(os.path.join(tree, "bad.blnk"), 'w') as outs:
+            outs.write("not blnk\n")
+        counts = catalog.index_tree(conn, tree, prune=["skip"])
+        assert counts["seen"] == 3, counts
+        assert counts["parsed"] == 3, counts
+        assert counts["errors"] == 1, counts
+        assert pruned not in parsed
+        # Nothing changed, so nothing is parsed again:
+        del parsed[:]
+        counts = catalog.index_tree(conn, tree, prune=["skip"])
+        assert counts["unchanged"] == 3, counts
+        assert counts["parsed"] == 0, counts
+        assert parsed == []
+        # Only the changed file is parsed again:
+        make_shortcut(notes, name="Changed notes")
+        os.utime(notes, ns=(1, 1))
+        counts = catalog.index_tree(conn, tree, prune=["skip"])
+        assert counts["parsed"] == 1, counts
+        assert parsed == [notes]
+        rows = catalog.query(conn, name="Changed*")
+        assert [row["path"] for row in rows] == [notes]
+        # A deleted file's row is removed:
+        os.remove(site)
+        counts = catalog.index_tree(conn, tree, prune=["skip"])
+        assert counts["removed"] == 1, counts
+        assert catalog.query(conn, shortcut_type="Link") == []
+    finally:
+        conn.close()
+        catalog.read_record = old_read_record
+        shutil.rmtree(root)
+
+
+def test_query():
+    root = tempfile.mkdtemp()
+    conn = catalog.connect(os.path.join(root, "catalog.sqlite3"))
+    try:
+        tree = os.path.join(root, "tree")
+        notes = os.path.join(tree, "notes.blnk")
+        site = os.path.join(tree, "site.blnk")
+        make_shortcut(notes)
+        make_shortcut(site, shortcut_type="Link", name="Site",
+                      target="https://example.com", hostname="laptop")
+        with open(os.path.join(tree, "bad.blnk"), 'w') as outs:
+            outs.write("not blnk\n")
+        catalog.index_tree(conn, tree)
+
+        def paths(**kwargs):
+            return [row["path"] for row in catalog.query(conn, **kwargs)]
+        assert paths(shortcut_type="Link") == [site]
+        assert paths(hostname="pc") == [notes]
+        assert paths(name="S*") == [site]
+        assert paths(target="https://*") == [site]
+        assert paths(shortcut_type="Link", hostname="pc") == []
+        assert paths(errors=True) == [os.path.join(tree, "bad.blnk")]
+        assert len(paths(limit=2)) == 2
+    finally:
+        conn.close()
+        shutil.rmtree(root)
+
+
+def test_under_is_exact():
+    root = tempfile.mkdtemp()
+    conn = catalog.connect(os.path.join(root, "catalog.sqlite3"))
+    try:
+        # In a LIKE pattern, "_" and "%" would also match the second
+        #   directory of each pair, and so would "docs" for "Docs":
+        pairs = [("a_b", "aXb"), ("c%", "cde")]
+        os.mkdir(os.path.join(root, "docs"))
+        if not os.path.exists(os.path.join(root, "DOCS")):
+            pairs.append(("docs", "Docs"))  # case-sensitive filesystem
+        for name, other in pairs:
+            for directory in (name, other):
+                make_shortcut(os.path.join(root, directory, "one.blnk"))
+            for directory in (other, name, other):
+                counts = catalog.index_tree(conn,
+                                            os.path.join(root, directory))
+                assert counts["removed"] == 0, (directory, counts)
+            for directory in (name, other):
+                rows = catalog.query(conn,
+                                     under=os.path.join(root, directory))
+                assert [row["path"] for row in rows] == \
+                    [os.path.join(root, directory, "one.blnk")], rows
+        assert len(catalog.query(conn)) == 2 * len(pairs)
+    finally:
+        conn.close()
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_index_tree()
+    test_query()
+    test_under_is_exact()
+    print("All tests passed.")
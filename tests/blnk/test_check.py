@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+'''
+Check that `blnk check` reports shortcuts whose targets are missing or
+didn't respond, and exits with 1 only if there are any (See
+blnk/check.py).
+'''
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk import check  # noqa: E402
+from blnk.probe import ProbeTimeout  # noqa: E402
+
+
+def make_shortcut(path, target):
+    with open(path, 'w') as outs:
+        outs.write("[X-Blnk]\n"
+                   "Type=File\n"
+                   "Name={}\n"
+                   "Path={}\n".format(os.path.basename(path), target))
+
+
+def run_check(argv):
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        code = check.check_main(argv)
+    return code, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_check_main():
+    root = tempfile.mkdtemp()
+    old_path_exists = check.path_exists
+    hung = os.path.join(root, "hung", "target.txt")
+
+    def path_exists(path):
+        # Like a mount that doesn't respond (See blnk.probe.probe):
+        if path == hung:
+            raise ProbeTimeout(path, os.path.dirname(hung), 0.1)
+        return old_path_exists(path)
+    check.path_exists = path_exists
+    try:
+        tree = os.path.join(root, "tree")
+        os.mkdir(tree)
+        live = os.path.join(root, "live.txt")
+        with open(live, 'w') as outs:
+            outs.write("live\n")
+        make_shortcut(os.path.join(tree, "live.blnk"), live)
+        code, lines = run_check(["--jobs", "2", tree])
+        assert code == 0, lines
+        assert lines == [lines[-1]]  # Only the summary (not --all)
+        assert lines[-1]["summary"]["counts"] == {"ok": 1}
+
+        make_shortcut(os.path.join(tree, "dead.blnk"),
+                      os.path.join(root, "dead.txt"))
+        make_shortcut(os.path.join(tree, "hung.blnk"), hung)
+        code, lines = run_check(["--jobs", "2", "--all", tree])
+        assert code == 1, lines
+        summary = lines.pop()["summary"]
+        assert summary["counts"] == {"ok": 1, "missing": 1, "error": 1}, \
+            summary
+        assert summary["jobs"] == 2
+        results = {os.path.basename(result["path"]): result
+                   for result in lines}
+        assert results["live.blnk"]["status"] == "ok"
+        assert results["dead.blnk"]["status"] == "missing"
+        assert results["dead.blnk"]["target"] == \
+            os.path.join(root, "dead.txt")
+        assert results["hung.blnk"]["status"] == "error"
+        assert results["hung.blnk"]["error"].startswith("ProbeTimeout")
+
+        code, lines = run_check([tree])
+        assert code == 1
+        assert sorted(os.path.basename(result["path"])
+                      for result in lines[:-1]) == ["dead.blnk", "hung.blnk"]
+    finally:
+        check.path_exists = old_path_exists
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_check_main()
+    print("All tests passed.")
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+'''
+Check that paths with spaces and quotes reach the launch plan (See
+blnk.command.Command) intact.
+'''
+import os
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+else:
+    sys.path.insert(0, TEST_MODULE_DIR)
+    # ^ Allow importing blnktestutils from here.
+
+from blnk import BLink  # noqa: E402
+from blnk.command import Command  # noqa: E402
+
+from blnktestutils import isolated_cache  # noqa: E402
+
+
+def write_blnk(directory, lines):
+    path = os.path.join(directory, "test.blnk")
+    with open(path, 'w') as outs:
+        outs.write("[X-Blnk]\n" + "\n".join(lines) + "\n")
+    return path
+
+
+def test_round_trip():
+    command = Command(argv=["a b", "it's"], cwd="/tmp", target="a b")
+    assert Command.from_dict(command.to_dict()) == command
+    command = Command(startfile="C:\\a b.txt", target="C:\\a b.txt")
+    assert Command.from_dict(command.to_dict()) == command
+
+
+def test_paths_with_spaces_and_quotes():
+    tmp = tempfile.mkdtemp()
+    try:
+        with isolated_cache():
+            directory = os.path.join(tmp, "My Files")
+            os.mkdir(directory)
+            document = os.path.join(directory, "Bob's notes.txt")
+            with open(document, 'w') as outs:
+                outs.write("notes\n")
+            program = os.path.join(directory, "run me")
+            with open(program, 'w') as outs:
+                outs.write("#!/bin/sh\n")
+            path = write_blnk(tmp, ["Type=File", 'Path="{}"'.format(document)])
+            plan = BLink(path).plan()
+            assert plan.target == document
+            assert plan.argv[-1] == document
+            path = write_blnk(tmp, [
+                "Type=Application",
+                "Exec='{}' --title \"a b\"".format(program),
+            ])
+            plan = BLink(path).plan()
+            assert plan.argv == [program, "--title", "a b"]
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    test_round_trip()
+    test_paths_with_spaces_and_quotes()
+    print("All tests passed.")
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+'''
+Check that `blnk --daemon` runs requests with the client's environment,
+cwd and argv, replaces a stale socket, and that scripts/blnk runs blnk
+in-process when no daemon is listening (See blnk/daemon.py).
+'''
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from importlib.machinery import SourceFileLoader
+from importlib.util import module_from_spec, spec_from_loader
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk import daemon  # noqa: E402
+
+SCRIPT = os.path.join(REPO_DIR, "scripts", "blnk")
+
+
+def load_client():
+    '''Import scripts/blnk (which has no .py extension).'''
+    loader = SourceFileLoader("blnk_client", SCRIPT)
+    module = module_from_spec(spec_from_loader(loader.name, loader))
+    loader.exec_module(module)
+    return module
+
+
+client = load_client()
+
+
+def make_stale_socket(path):
+    '''Leave a socket file behind as if a daemon was killed.'''
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.close()
+    assert os.path.exists(path)
+
+
+def wait_for_listener(path, proc):
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        assert proc.poll() is None, "The daemon exited."
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.connect(path)
+            return
+        except OSError:
+            time.sleep(.05)
+        finally:
+            sock.close()
+    raise AssertionError("The daemon didn't start listening.")
+
+
+def test_run_request():
+    old_env = dict(os.environ)
+    old_cwd = os.getcwd()
+    old_argv = sys.argv
+    old_main = daemon.main
+    root = tempfile.mkdtemp()
+    calls = []
+    results = [3, SystemExit(2), None]
+
+    def main():
+        calls.append((dict(os.environ), os.getcwd(), list(sys.argv)))
+        result = results.pop(0)
+        if isinstance(result, BaseException):
+            raise result
+        return result
+    daemon.main = main
+    try:
+        request = {"argv": ["--terminal", "notes.blnk"], "cwd": root,
+                   "env": {"BLNK_TEST_VALUE": "1"}}
+        assert daemon.run_request(request) == 3
+        env, cwd, argv = calls[-1]
+        assert env == {"BLNK_TEST_VALUE": "1"}, env
+        assert cwd == os.path.realpath(root)
+        assert argv == ["blnk", "--terminal", "notes.blnk"]
+        assert daemon.run_request(request) == 2  # such as from argparse
+        assert daemon.run_request({"argv": []}) == 0
+        assert calls[-1][2] == ["blnk"]
+    finally:
+        daemon.main = old_main
+        sys.argv = old_argv
+        os.chdir(old_cwd)
+        os.environ.clear()
+        os.environ.update(old_env)
+        shutil.rmtree(root)
+
+
+def test_remove_stale_socket():
+    root = tempfile.mkdtemp()
+    try:
+        path = os.path.join(root, "blnk.sock")
+        daemon._remove_stale_socket(path)  # Nothing to remove.
+        make_stale_socket(path)
+        daemon._remove_stale_socket(path)
+        assert not os.path.exists(path)
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            listener.bind(path)
+            listener.listen(1)
+            try:
+                daemon._remove_stale_socket(path)
+            except RuntimeError:
+                pass
+            else:
+                raise AssertionError("A live socket was removed.")
+            assert os.path.exists(path)
+        finally:
+            listener.close()
+    finally:
+        shutil.rmtree(root)
+
+
+def test_serve_and_client():
+    root = tempfile.mkdtemp()
+    old_cwd = os.getcwd()
+    old_env = {name: os.environ.get(name)
+               for name in (daemon.SOCKET_ENV_NAME, "BLNK_NO_DAEMON")}
+    proc = None
+    try:
+        path = os.path.join(root, "blnk.sock")
+        os.environ[daemon.SOCKET_ENV_NAME] = path
+        os.environ.pop("BLNK_NO_DAEMON", None)
+        tree = os.path.join(root, "tree")
+        os.mkdir(tree)
+        with open(os.path.join(tree, "dead.blnk"), 'w') as outs:
+            outs.write("[X-Blnk]\n"
+                       "Type=File\n"
+                       "Name=Dead\n"
+                       "Path={}\n".format(os.path.join(root, "dead.txt")))
+        # Nothing is listening, so run in-process:
+        assert client.forward_to_daemon(["check", tree]) is None
+        make_stale_socket(path)
+        assert client.forward_to_daemon(["check", tree]) is None
+        result = subprocess.run([sys.executable, SCRIPT, "check", tree],
+                                stdout=subprocess.PIPE,
+                                universal_newlines=True)
+        assert result.returncode == 1
+        assert '"missing": 1' in result.stdout, result.stdout
+
+        env = dict(os.environ)
+        env["PYTHONPATH"] = REPO_DIR
+        if os.environ.get("PYTHONPATH"):
+            env["PYTHONPATH"] += os.pathsep + os.environ["PYTHONPATH"]
+        proc = subprocess.Popen(
+            [sys.executable, "-c",
+             "import sys; from blnk.daemon import serve; sys.exit(serve())"],
+            env=env,
+        )
+        wait_for_listener(path, proc)  # The stale socket was replaced.
+        # Another daemon can't take over the socket:
+        assert daemon.serve(path) == 1
+        # The daemon uses the client's cwd (for the relative path):
+        os.chdir(tree)
+        assert client.forward_to_daemon(["check", "."]) == 1
+        os.remove(os.path.join(tree, "dead.blnk"))
+        assert client.forward_to_daemon(["check", "."]) == 0
+        assert client.forward_to_daemon(["--daemon"]) is None
+        proc.send_signal(signal.SIGINT)
+        assert proc.wait(timeout=10) == 0
+        assert not os.path.exists(path)
+    finally:
+        if (proc is not None) and (proc.poll() is None):
+            proc.kill()
+            proc.wait()
+        os.chdir(old_cwd)
+        for name, value in old_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_run_request()
+    test_remove_stale_socket()
+    test_serve_and_client()
+    print("All tests passed.")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+'''
+Check that blnk.exe_cache only walks PATH when the cache is cold or
+PATH, PATHEXT or a directory in it changed (See blnk/exe_cache.py).
+'''
+import os
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk.exe_cache import ExecutableCache  # noqa: E402
+
+
+def counting_resolve(walks):
+    def _resolve(name):
+        walks.append(name)
+        for directory in os.environ["PATH"].split(os.pathsep):
+            path = os.path.join(directory, name)
+            if os.access(path, os.X_OK):
+                return path
+        return None
+    return _resolve
+
+
+def touch(directory):
+    stat = os.stat(directory)
+    os.utime(directory, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+def test_executable_cache():
+    root = tempfile.mkdtemp()
+    old_env = {name: os.environ.get(name) for name in ("PATH", "PATHEXT")}
+    try:
+        bin_dir = os.path.join(root, "bin")
+        os.mkdir(bin_dir)
+        program = os.path.join(bin_dir, "blnk-test-app")
+        with open(program, 'w') as outs:
+            outs.write("#!/bin/sh\n")
+        os.chmod(program, 0o755)
+        os.environ["PATH"] = bin_dir
+        os.environ.pop("PATHEXT", None)
+        cache_path = os.path.join(root, "which.json")
+        walks = []
+
+        def new_cache():
+            return ExecutableCache(cache_path, counting_resolve(walks),
+                                   revalidate_seconds=0)
+        cache = new_cache()
+        # Cold:
+        assert cache.which("blnk-test-app") == program
+        assert cache.which("blnk-test-missing") is None
+        assert len(walks) == 2, walks
+        # Warm (also in a new process, from the file):
+        del walks[:]
+        assert cache.which("blnk-test-app") == program
+        assert cache.which("blnk-test-missing") is None
+        assert new_cache().which("blnk-test-app") == program
+        assert walks == [], walks
+        # A file was added or removed in the directory:
+        touch(bin_dir)
+        assert cache.which("blnk-test-app") == program
+        assert walks == ["blnk-test-app"], walks
+        # PATH or PATHEXT changed:
+        for name, value in (("PATH", bin_dir + os.pathsep),
+                            ("PATHEXT", ".EXE")):
+            del walks[:]
+            os.environ[name] = value
+            assert cache.which("blnk-test-app") == program
+            assert cache.which("blnk-test-app") == program
+            assert walks == ["blnk-test-app"], (name, walks)
+            assert new_cache().which("blnk-test-app") == program
+            assert walks == ["blnk-test-app"], (name, walks)
+    finally:
+        for name, value in old_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_executable_cache()
+    print("All tests passed.")
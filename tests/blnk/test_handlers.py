@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+'''
+Check that non-blnk files are matched to handlers by suffix (See
+blnk/handlers.py).
+'''
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk.handlers import (  # noqa: E402
+    HandlerRegistry,
+    load_config,
+    to_chain,
+)
+
+INSTALLED = {
+    "file-roller": "/usr/bin/file-roller",
+    "gzip": "/bin/gzip",
+    "gnumeric": "/usr/bin/gnumeric",
+}
+
+
+class CountingWhich(object):
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, name):
+        self.calls.append(name)
+        return INSTALLED.get(name)
+
+
+def test_to_chain():
+    assert to_chain("geany") == [["geany"]]
+    assert to_chain(["ninja-ide", "-p"]) == [["ninja-ide", "-p"]]
+    assert to_chain([["a", "-x"], "b"]) == [["a", "-x"], ["b"]]
+    for bad in ([], 1, [["a"], []]):
+        try:
+            to_chain(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("{!r} was accepted".format(bad))
+
+
+def test_resolve():
+    registry = HandlerRegistry({
+        ".gz": ["gzip", "-d"],
+        "TAR.GZ": [["ark"], ["file-roller"]],
+        ".csv": [["libreoffice", "--calc"], ["gnumeric"]],
+        ".kdbx": "keepassxc",
+    })
+    assert registry.match("/tmp/a.b/Backup.Tar.GZ") == [".tar.gz", ".gz"]
+    assert registry.match("/tmp/notes.txt") == []
+    which = CountingWhich()
+    assert registry.resolve("Backup.tar.gz", which) \
+        == (["/usr/bin/file-roller"], ["ark"])
+    assert registry.resolve("data.CSV", which) \
+        == (["/usr/bin/gnumeric"], ["libreoffice"])
+    # Each suffix is only resolved once:
+    calls = len(which.calls)
+    registry.resolve("other.csv", which)
+    assert len(which.calls) == calls
+    # If no handler for the longer suffix is installed, try shorter ones:
+    registry.add(".tar.gz", "ark")
+    assert registry.resolve("Backup.tar.gz", which) \
+        == (["/bin/gzip", "-d"], ["ark"])
+    assert registry.resolve("db.kdbx", which) == (None, ["keepassxc"])
+    assert registry.resolve("notes.txt", which) == (None, [])
+
+
+def test_load_config():
+    root = tempfile.mkdtemp()
+    try:
+        path = os.path.join(root, "associations.json")
+        assert load_config(path) == {}
+        with open(path, 'w') as outs:
+            json.dump({"associations": {".log": "geany"}}, outs)
+        assert load_config(path) == {".log": "geany"}
+        for data in ({"associations": {".log": 1}},
+                     [".log", "geany"],
+                     {"associations": [".log", "geany"]}):
+            with open(path, 'w') as outs:
+                json.dump(data, outs)
+            try:
+                load_config(path)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("{} was loaded.".format(data))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_to_chain()
+    test_resolve()
+    test_load_config()
+    print("All tests passed.")
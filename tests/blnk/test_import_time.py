@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+'''
+Keep `import blnk` cheap, since BLink is embedded in other tools that
+pay for the import every time they start. Set BLNK_IMPORT_BUDGET_US to
+change the budget (in microseconds, as reported by
+`python -X importtime`).
+'''
+import os
+import subprocess
+import sys
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+IMPORT_BUDGET_US = int(os.environ.get("BLNK_IMPORT_BUDGET_US", "200000"))
+
+LAZY_MODULES = ("argparse", "tkinter", "Tkinter", "pytz", "socket",
+                "datetime", "subprocess")
+
+
+def get_import_times(statement="import blnk"):
+    '''Run statement in a new interpreter with -X importtime.
+
+    Returns:
+        dict: The cumulative import time in microseconds for each
+            module name.
+    '''
+    cmd = [sys.executable, "-X", "importtime", "-c", statement]
+    proc = subprocess.run(cmd, cwd=REPO_DIR, check=True,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        opener = "import time:"
+        if not line.startswith(opener):
+            continue
+        parts = line[len(opener):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue  # the heading
+        times[parts[2].strip()] = cumulative
+    return times
+
+
+def test_import_time_budget():
+    get_import_times()  # Make sure bytecode is cached before measuring.
+    times = get_import_times()
+    assert "blnk" in times
+    assert times["blnk"] <= IMPORT_BUDGET_US, (
+        "import blnk took {}us (budget: {}us)"
+        .format(times["blnk"], IMPORT_BUDGET_US))
+
+
+def test_import_is_lazy():
+    times = get_import_times("import blnk; blnk.BLink")
+    # Only check modules hierosoft doesn't also need:
+    baseline = get_import_times(
+        "import sys; sys.path.insert(0, 'blnk'); import find_hierosoft;"
+        " import hierosoft.logging2, hierosoft.morelogging"
+    )
+    for name in LAZY_MODULES:
+        if name in baseline:
+            continue
+        assert name not in times, "import blnk imported {}".format(name)
+
+
+if __name__ == "__main__":
+    test_import_time_budget()
+    test_import_is_lazy()
+    print("All tests passed.")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+'''
+Check how blnk.launch chooses a strategy, that exec falls back to
+detach where it isn't allowed, and that detached programs are reaped.
+'''
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk import launch  # noqa: E402
+
+WRITE_PID = "import os, sys; open(sys.argv[1], 'w').write(str(os.getpid()))"
+
+
+def wait_for_pid(path):
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        if os.path.isfile(path):
+            with open(path, 'r') as ins:
+                data = ins.read()
+            if data:
+                return int(data)
+        time.sleep(.05)
+    raise AssertionError("The program didn't start.")
+
+
+def is_zombie_or_running(pid):
+    try:
+        with open("/proc/{}/stat".format(pid), 'r') as ins:
+            return ins.read().rsplit(")", 1)[1].split()[0] != "X"
+    except OSError:
+        return False
+
+
+def assert_reaped(pid):
+    if not os.path.isdir("/proc"):
+        return  # There is no portable way to see a zombie.
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        if not is_zombie_or_running(pid):
+            return
+        time.sleep(.05)
+    raise AssertionError("{} wasn't reaped.".format(pid))
+
+
+def test_strategy_selection():
+    ok = [sys.executable, "-c", "pass"]
+    fails = [sys.executable, "-c", "import sys; sys.exit(3)"]
+    result = launch.launch(ok)
+    assert result.strategy == launch.DEFAULT_STRATEGY == "wait"
+    assert result.returncode == 0
+    assert launch.launch(fails, strategy="wait", check=False).returncode == 3
+    try:
+        launch.launch(fails, strategy="wait")
+    except subprocess.CalledProcessError as ex:
+        assert ex.returncode == 3
+    else:
+        raise AssertionError("The failure wasn't raised.")
+    try:
+        launch.launch(ok, strategy="fork")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("An unknown strategy was allowed.")
+    # Detached programs don't report failure:
+    result = launch.launch(fails, strategy="detach")
+    assert (result.returncode, result.strategy) == (0, "detach")
+    # posix_spawn can't change the working directory:
+    result = launch.launch(ok, cwd=TEST_MODULE_DIR, strategy="posix_spawn")
+    assert result.strategy == "detach"
+    if hasattr(os, "posix_spawnp"):
+        result = launch.launch(ok, strategy="posix_spawn")
+        assert result.strategy == "posix_spawn"
+
+
+def test_exec_falls_back_to_detach():
+    root = tempfile.mkdtemp()
+    launch.set_exec_allowed(False)
+    try:
+        pid_path = os.path.join(root, "pid")
+        result = launch.launch([sys.executable, "-c", WRITE_PID, pid_path],
+                               strategy="exec")
+        # This process wasn't replaced:
+        assert result.strategy == "detach"
+        assert wait_for_pid(pid_path) != os.getpid()
+    finally:
+        launch.set_exec_allowed(True)
+        shutil.rmtree(root)
+
+
+def test_detached_programs_are_reaped():
+    root = tempfile.mkdtemp()
+    try:
+        for strategy in ("detach", "posix_spawn"):
+            pid_path = os.path.join(root, strategy)
+            launch.launch([sys.executable, "-c", WRITE_PID, pid_path],
+                          strategy=strategy)
+            assert_reaped(wait_for_pid(pid_path))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_strategy_selection()
+    test_exec_falls_back_to_detach()
+    test_detached_programs_are_reaped()
+    print("All tests passed.")
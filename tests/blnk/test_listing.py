@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+'''
+Check that BLink.resolve_many gives the same paths as resolving each
+value by itself, while listing each directory only once (See
+blnk/listing.py).
+'''
+import os
+import platform
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk import (  # noqa: E402
+    BLink,
+    configure,
+    get_resolve_config,
+)
+from blnk.listing import (  # noqa: E402
+    CaseInsensitiveResolver,
+    ListingCache,
+)
+
+
+def test_listing_cache():
+    tmp = tempfile.mkdtemp()
+    try:
+        os.makedirs(os.path.join(tmp, "a", "b"))
+        open(os.path.join(tmp, "a", "file"), 'w').close()
+        listings = ListingCache()
+        assert listings.exists(os.path.join(tmp, "a", "b"))
+        assert listings.exists(os.path.join(tmp, "a", "file"))
+        assert not listings.exists(os.path.join(tmp, "a", "missing"))
+        scans = listings.scans
+        # Everything under a missing directory is answered without
+        #   listing anything else:
+        for name in ("x", "y", "z"):
+            assert not listings.exists(os.path.join(tmp, "gone", name))
+        assert not listings.exists(os.path.join(tmp, "a", "file", "x"))
+        assert listings.scans == scans
+    finally:
+        shutil.rmtree(tmp)
+
+
+def test_resolve_many():
+    if platform.system() == "Windows":
+        return
+    tmp = tempfile.mkdtemp()
+    old_config = get_resolve_config()
+    try:
+        bases = [os.path.join(tmp, name) for name in ("cloud", "home")]
+        for base in bases:
+            os.mkdir(base)
+        for i in range(10):
+            os.makedirs(os.path.join(bases[i % 2], "dir{}".format(i), "sub"))
+        configure(bases=bases)
+        values = ["D:\\dir{}\\sub".format(i) for i in range(10)]
+        values += ['"E:\\dir{}"'.format(i) for i in range(10)]
+        values += ["F:\\missing\\x", "/usr/bin"]
+        listings = ListingCache()
+        results = BLink.resolve_many(values, listings=listings)
+        assert len(results) == len(values)
+        for value, (path, err) in zip(values, results):
+            assert err is None
+            assert path == BLink._translate(value.strip('"'))
+        assert results[0][0] == os.path.join(bases[0], "dir0", "sub")
+        assert results[11][0] == os.path.join(bases[1], "dir1")
+        # Each base and each directory under it is listed at most once
+        #   (plus the directories above the bases):
+        assert listings.scans <= 2 + 10 + tmp.count(os.sep) + 1
+    finally:
+        configure(bases=old_config.bases)
+        shutil.rmtree(tmp)
+
+
+def test_case_insensitive():
+    tmp = tempfile.mkdtemp()
+    old_config = get_resolve_config()
+    try:
+        meshes = os.path.join(tmp, "cloud", "Meshes")
+        os.makedirs(meshes)
+        for name in ("tree.obj", "rock.obj"):
+            open(os.path.join(meshes, name), 'w').close()
+        resolver = CaseInsensitiveResolver()
+        base = os.path.join(tmp, "cloud")
+        assert resolver.find(base, "meshes\\Tree.OBJ") == \
+            os.path.join(meshes, "tree.obj")
+        scans = resolver.scans
+        # The prefix (and listing) are reused for the same tree:
+        assert resolver.find(base, "MESHES/ROCK.obj") == \
+            os.path.join(meshes, "rock.obj")
+        assert resolver.find(base, "meshes/tree.obj") == \
+            os.path.join(meshes, "tree.obj")
+        assert resolver.scans == scans
+        assert resolver.find(base, "meshes/none.obj") is None
+        # A renamed folder invalidates the cached prefix:
+        os.rename(meshes, os.path.join(base, "MESHES2"))
+        assert resolver.find(base, "meshes/tree.obj") is None
+        os.rename(os.path.join(base, "MESHES2"), meshes)
+        assert resolver.find(base, "meshes/tree.obj") == \
+            os.path.join(meshes, "tree.obj")
+        if platform.system() != "Windows":
+            configure(bases=[base])
+            value = "D:\\meshes\\Tree.OBJ"
+            assert BLink._translate(value) != \
+                os.path.join(meshes, "tree.obj")
+            configure(ignore_case=True)
+            assert BLink._translate(value) == \
+                os.path.join(meshes, "tree.obj")
+    finally:
+        configure(bases=old_config.bases,
+                  ignore_case=old_config.ignore_case)
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    test_listing_cache()
+    test_resolve_many()
+    test_case_insensitive()
+    print("All tests passed.")
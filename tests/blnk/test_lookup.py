@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+'''
+Check that BLink's key index (See BLink._set) gives the same results as
+scanning every section of the tree.
+'''
+import os
+import sys
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+TEST_DATA_DIR = os.path.join(TESTS_DIR, "data")
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk import BLink  # noqa: E402
+
+
+def scan_branch(link, section, key):
+    '''Find a value the way getBranch did before the index.'''
+    sectionD = link.tree.get(section)
+    if (sectionD is not None) and (sectionD.get(key) is not None):
+        return section, sectionD.get(key)
+    for trySection, sectionD in link.tree.items():
+        if sectionD.get(key) is not None:
+            return trySection, sectionD.get(key)
+    return None, None
+
+
+def test_index_matches_scan():
+    for name in sorted(os.listdir(TEST_DATA_DIR)):
+        if not name.endswith(".blnk"):
+            continue
+        link = BLink(path=os.path.join(TEST_DATA_DIR, name))
+        keys = set(["Missing"])
+        for sectionD in link.tree.values():
+            keys.update(sectionD.keys())
+        for key in keys:
+            for section in list(link.tree.keys()) + [BLink.SECTION_GLOBAL]:
+                assert (link.getBranch(section, key)
+                        == scan_branch(link, section, key)), (name, key)
+
+
+def test_set_updates_get():
+    link = BLink(path=None, load=False)
+    assert link.get("Name") is None
+    link._set("X-Source Metadata", "Name", "'source'")
+    assert link.get("Name") == "source"
+    # An earlier section takes precedence (as with the old scan):
+    link._set("X-Blnk", "Name", '"blnk"')
+    assert link.getBranch(BLink.SECTION_GLOBAL, "Name") == \
+        ("X-Blnk", '"blnk"')
+    assert link.get("Name") == "blnk"
+
+
+if __name__ == "__main__":
+    test_index_matches_scan()
+    test_set_updates_get()
+    print("All tests passed.")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+'''
+Check that UNC paths are found on the mounts in a mountinfo file (See
+blnk/mounts.py).
+'''
+import os
+import platform
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk import (  # noqa: E402
+    BLink,
+    mounts,
+)
+
+MOUNTINFO = '''\
+22 1 8:1 / / rw,relatime shared:1 - ext4 /dev/sda1 rw
+40 22 0:40 / /mnt/media rw,relatime shared:20 - cifs //NAS/Media rw
+41 22 0:41 / /mnt/my\\040docs rw,relatime - cifs //nas/docs/My\\040Docs rw
+42 22 0:40 /Music /srv/music rw,relatime shared:20 - cifs //NAS/Media rw
+43 22 0:42 / /mnt/projects rw,relatime - nfs4 files:/export/projects rw
+44 22 0:43 / {gvfs} rw,nosuid - fuse.gvfsd-fuse gvfsd-fuse rw
+'''
+
+
+def test_find_share():
+    tmp = tempfile.mkdtemp()
+    try:
+        gvfs = os.path.join(tmp, "gvfs")
+        os.mkdir(gvfs)
+        os.mkdir(os.path.join(gvfs, "smb-share:server=laptop,share=c$"))
+        path = os.path.join(tmp, "mountinfo")
+        with open(path, 'w') as outs:
+            outs.write(MOUNTINFO.format(gvfs=gvfs))
+        table = mounts.MountTable(path=path)
+        assert len(table.get_mounts()) == 6
+        assert table.get_mounts()[-1].mount_point == "/"
+        assert table.find_share("\\\\nas\\media\\a\\b.txt") == \
+            "/mnt/media/a/b.txt"
+        assert table.find_share("\\\\NAS\\MEDIA") == "/mnt/media"
+        # The longest share path wins (the bind mount of Music):
+        assert table.find_share("\\\\nas\\media\\music\\x.ogg") == \
+            "/srv/music/x.ogg"
+        assert table.find_share("\\\\nas\\docs\\my docs\\a") == \
+            "/mnt/my docs/a"
+        assert table.find_share("\\\\nas\\docs\\other") is None
+        assert table.find_share("\\\\files\\export\\projects\\p") == \
+            "/mnt/projects/p"
+        assert table.find_share("\\\\laptop\\C$\\x") == os.path.join(
+            gvfs, "smb-share:server=laptop,share=c$", "x")
+        # A share that GVFS mounted after the shares were listed is
+        #   found once GVFS_SECONDS have passed:
+        os.mkdir(os.path.join(gvfs, "smb-share:server=pc,share=d"))
+        assert table.find_share("//pc/d/y") is None
+        old_gvfs_seconds = mounts.GVFS_SECONDS
+        mounts.GVFS_SECONDS = 0
+        try:
+            assert table.find_share("//pc/d/y") == os.path.join(
+                gvfs, "smb-share:server=pc,share=d", "y")
+        finally:
+            mounts.GVFS_SECONDS = old_gvfs_seconds
+        assert table.find_share("\\\\other\\share") is None
+        assert table.find_share("C:\\x") is None
+        if platform.system() != "Windows":
+            old_table = mounts._mount_table
+            mounts._mount_table = table
+            try:
+                assert BLink._translate("\\\\nas\\media\\a") == \
+                    "/mnt/media/a"
+                assert BLink._translate("\\\\other\\share\\a") == \
+                    "//other/share/a"
+            finally:
+                mounts._mount_table = old_table
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    test_find_share()
+    print("All tests passed.")
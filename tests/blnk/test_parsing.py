@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+'''
+Check that BLink.load (which uses blnk.parsing) produces exactly the
+same result as the per-line BLink._pushLine parser.
+'''
+import codecs
+import io
+import os
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+TEST_DATA_DIR = os.path.join(TESTS_DIR, "data")
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk import (  # noqa: E402
+    BLink,
+    FileTypeError,
+    iterparse,
+)
+from blnk.parsing import (  # noqa: E402
+    SNIFF_BYTES,
+    sniff,
+)
+
+
+def load_per_line(path):
+    '''Load path the way BLink.load did before blnk.parsing.'''
+    link = BLink(path=None, load=False)
+    with open(path, 'r') as ins:
+        row = 0
+        for line in ins:
+            row += 1
+            link._pushLine(line, path=path, row=row)
+    link.lastSection = None
+    link.path = path
+    return link
+
+
+def saved(link):
+    '''Get the output of _save, or None if it has no (known) target.'''
+    stream = io.StringIO()
+    try:
+        link._save(stream)
+    except (RuntimeError, KeyError):
+        # KeyError: TARGET_MAP has no entry for the Type (Application)
+        return None
+    return stream.getvalue()
+
+
+def assert_same(fast, slow, path):
+    for name in ("contentType", "contentTypeParts", "assignmentOperator",
+                 "tree", "_comments", "_last_line_mode", "_last_line_key",
+                 "path"):
+        assert getattr(fast, name) == getattr(slow, name), (
+            "{}: {} differs: {} != {}".format(
+                path, name, getattr(fast, name), getattr(slow, name)))
+    assert list(fast.tree.keys()) == list(slow.tree.keys())
+    assert saved(fast) == saved(slow), path
+
+
+def data_paths():
+    return sorted(
+        os.path.join(TEST_DATA_DIR, name)
+        for name in os.listdir(TEST_DATA_DIR)
+        if name.endswith(".blnk")
+    )
+
+
+def test_parity_with_pushLine():
+    paths = data_paths()
+    assert paths
+    for path in paths:
+        assert_same(BLink(path=path), load_per_line(path), path)
+
+
+def test_iterparse_matches_tree():
+    for path in data_paths():
+        tree = {}
+        for event in iterparse(path):
+            if event.event == "value":
+                tree.setdefault(event.section, {})[event.key] = event.value
+        link = BLink(path=path)
+        expected = {section: dict(values)
+                    for section, values in link.tree.items() if values}
+        assert tree == expected, path
+
+
+def test_non_blnk_raises_FileTypeError():
+    path = os.path.join(REPO_DIR, "license.txt")
+    for load_fn in (lambda: BLink(path=path), lambda: load_per_line(path),
+                    lambda: list(iterparse(path))):
+        try:
+            load_fn()
+        except FileTypeError:
+            pass
+        else:
+            raise AssertionError("{} was loaded as blnk".format(path))
+
+
+def test_sniff():
+    header = b"[X-Blnk]\nType=Link\n"
+    assert sniff(header, complete=True) == ("blnk", None)
+    assert sniff(b"\n\n  Content-Type: text/blnk; charset=utf-8\r\n") \
+        == ("legacy", None)
+    assert sniff(codecs.BOM_UTF8 + header) == ("blnk", "utf-8-sig")
+    assert sniff(header.decode("utf-8").encode("utf-16")) \
+        == ("blnk", "utf-16")
+    assert sniff(b"Hello\n") == ("other", None)
+    assert sniff(b" \n", complete=True) == ("empty", None)
+    # Not complete, so more blank lines (or a longer line) may follow:
+    assert sniff(b" \n") == ("other", None)
+    assert sniff(b"[X-Blnk]") == ("other", None)
+    # A multi-byte character cut off at the end is okay:
+    assert sniff(header + u"\u00e9".encode("utf-8")[:1]) \
+        == ("blnk", None)
+    for binary in (b"\x00" * 16, b"\x89PNG\r\n\x1a\n"):
+        try:
+            sniff(binary)
+        except UnicodeDecodeError:
+            pass
+        else:
+            raise AssertionError("{} was sniffed as text".format(binary))
+
+
+def test_load_sniffs():
+    root = tempfile.mkdtemp()
+    try:
+        path = os.path.join(root, "bom.blnk")
+        with open(path, 'wb') as outs:
+            outs.write(codecs.BOM_UTF8
+                       + b"[X-Blnk]\nType=Link\nURL=https://example.com\n")
+        assert BLink(path=path).tree["X-Blnk"]["Type"] == "Link"
+        # A large binary file isn't decoded:
+        path = os.path.join(root, "large.bin")
+        with open(path, 'wb') as outs:
+            outs.write(b"\x00\xff" * SNIFF_BYTES * 4)
+        try:
+            BLink(path=path)
+        except FileTypeError:
+            pass
+        else:
+            raise AssertionError("{} was loaded as blnk".format(path))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_parity_with_pushLine()
+    test_iterparse_matches_tree()
+    test_non_blnk_raises_FileTypeError()
+    test_sniff()
+    test_load_sniffs()
+    print("All tests passed.")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+'''
+Check that blnk.pathrules rewrites Windows paths the way blnk always
+has, and that site-specific rules can be added.
+'''
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk.pathrules import (  # noqa: E402
+    PathRules,
+    load_config,
+)
+
+VARIABLES = {
+    "HOME": "/home/me",
+    "PROFILESFOLDER": "/home",
+    "TMP": "/tmp",
+    "CLOUD_NAME": "Nextcloud",
+}
+
+
+def translate(rules, path, bases=None, exists=lambda path: False):
+    return rules.translate(path, bases=bases, exists=exists)[0]
+
+
+def test_default_rules():
+    rules = PathRules(variables=VARIABLES)
+    assert translate(rules, "C:\\Users\\someone\\Documents") == \
+        "/home/me/Documents"
+    assert translate(rules, "c:\\USERS\\someone") == "/home/me"
+    assert translate(rules, "C:\\Users") == "/home"
+    assert translate(rules, "C:\\Documents and Settings\\x\\a") == \
+        "/home/me/a"
+    assert translate(rules, "c:\\tmp") == "/tmp"
+    assert translate(rules, "C:\\tmp2\\a") == "/home/me/tmp2/a"
+    assert translate(rules, "D:\\a\\b") == "/home/me/a/b"
+    assert translate(rules, "D:\\a", bases=["/srv", "/mnt"],
+                     exists=lambda path: path == "/mnt/a") == "/mnt/a"
+    assert translate(rules, "\\\\server\\share\\a") == "//server/share/a"
+    assert rules.rename("/home/me/ownCloud/a") == "/home/me/Nextcloud/a"
+    assert rules.rename("/home/me/ownClouds") == "/home/me/ownClouds"
+    assert PathRules(variables={"HOME": "/h"}).renames == {}
+
+
+def test_user_rules():
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "path_rules.json")
+        with open(path, 'w') as outs:
+            json.dump({
+                "rules": [
+                    {"prefix": "P:\\", "to": "/mnt/projects"},
+                    {"prefix": "\\\\nas\\media", "to": "/srv/media"},
+                ],
+                "renames": {"Dropbox": "Sync"},
+            }, outs)
+        config = load_config(path)
+        rules = PathRules(variables=VARIABLES)
+        for rule in config["rules"]:
+            rules.add(rule)
+        for old, new in config["renames"].items():
+            rules.add_rename(old, new)
+        assert translate(rules, "p:\\Art\\a.png") == "/mnt/projects/Art/a.png"
+        assert translate(rules, "P:") == "/mnt/projects"
+        assert translate(rules, "\\\\NAS\\Media\\a") == "/srv/media/a"
+        assert translate(rules, "\\\\nas\\other") == "//nas/other"
+        assert rules.rename("/x/dropbox/a") == "/x/Sync/a"
+        assert load_config(os.path.join(directory, "missing.json")) == \
+            {"rules": [], "renames": {}}
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    test_default_rules()
+    test_user_rules()
+    print("All tests passed.")
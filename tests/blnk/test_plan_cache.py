@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+'''
+Check that launch plans are cached and reused, and dropped if the
+program they use is removed or a better one is installed (See
+blnk/plan_cache.py).
+'''
+import os
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+else:
+    sys.path.insert(0, TEST_MODULE_DIR)
+    # ^ Allow importing blnktestutils from here.
+
+import blnk  # noqa: E402
+from blnk import (  # noqa: E402
+    configure,
+    get_plan_cache,
+    plan_file,
+    settings,
+)
+
+from blnktestutils import isolated_cache  # noqa: E402
+
+
+def make_program(bin_dir, name):
+    program = os.path.join(bin_dir, name)
+    with open(program, 'w') as outs:
+        outs.write("#!/bin/sh\n")
+    os.chmod(program, 0o755)
+    return program
+
+
+def with_bin_dir(test_fn):
+    '''Run test_fn(root, bin_dir) with bin_dir first in PATH, the plan
+    cache on and temporary caches.
+    '''
+    root = tempfile.mkdtemp()
+    old_path = os.environ["PATH"]
+    old_plan_cache = settings["plan_cache"]
+    bin_dir = os.path.join(root, "bin")
+    os.mkdir(bin_dir)
+    os.environ["PATH"] = bin_dir + os.pathsep + old_path
+    configure(plan_cache=True)
+    try:
+        with isolated_cache():
+            test_fn(root, bin_dir)
+    finally:
+        os.environ["PATH"] = old_path
+        configure(plan_cache=old_plan_cache)
+        shutil.rmtree(root)
+
+
+def check_application_plan_is_reused(root, bin_dir):
+    program = make_program(bin_dir, "blnk-test-app")
+    path = os.path.join(root, "app.blnk")
+    with open(path, 'w') as outs:
+        outs.write("[X-Blnk]\n"
+                   "Type=Application\n"
+                   "Name=App\n"
+                   "Exec=blnk-test-app --flag\n")
+    plan = plan_file(path)
+    assert plan.argv[1:] == ["--flag"]
+    assert plan.target == program
+    assert get_plan_cache().get(path) is not None
+    assert plan_file(path).to_dict() == plan.to_dict()
+    os.remove(program)
+    assert get_plan_cache().get(path) is None
+
+
+def test_application_plan_is_reused():
+    with_bin_dir(check_application_plan_is_reused)
+
+
+def check_installed_handler_is_used(root, bin_dir):
+    document = os.path.join(root, "notes.blnktest")
+    with open(document, 'w') as outs:
+        outs.write("notes\n")
+    path = os.path.join(root, "notes.blnk")
+    with open(path, 'w') as outs:
+        outs.write("[X-Blnk]\n"
+                   "Type=File\n"
+                   "Name=Notes\n"
+                   "Path={}\n".format(document))
+    # Check the PATH directories every time:
+    blnk._get_exe_cache().revalidate_seconds = 0
+    plan = plan_file(path)
+    assert os.path.basename(plan.argv[0]) != "blnk-test-viewer"
+    assert get_plan_cache().get(path) is not None
+    viewer = make_program(bin_dir, "blnk-test-viewer")
+    stat = os.stat(bin_dir)
+    os.utime(bin_dir, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert get_plan_cache().get(path) is None
+    assert plan_file(path).argv == [viewer, document]
+
+
+def test_installed_handler_is_used():
+    old_associations = settings["file_type_associations"]
+    associations = dict(old_associations)
+    associations[".blnktest"] = [["blnk-test-viewer"]]
+    configure(file_type_associations=associations)
+    try:
+        with_bin_dir(check_installed_handler_is_used)
+    finally:
+        configure(file_type_associations=old_associations)
+
+
+if __name__ == "__main__":
+    test_application_plan_is_reused()
+    test_installed_handler_is_used()
+    print("All tests passed.")
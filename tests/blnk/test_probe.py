@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+'''
+Check that blnk.probe gives up on a slow probe and then fails fast for
+the same mount.
+'''
+import os
+import sys
+import time
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+else:
+    sys.path.insert(0, TEST_MODULE_DIR)
+    # ^ Allow importing blnktestutils from here.
+
+from blnk import probe  # noqa: E402
+
+from blnktestutils import isolated_cache  # noqa: E402
+
+
+def slow_exists(path):
+    time.sleep(2)
+    return True
+
+
+def check_probe_timeout_and_negative_cache(cache_dir):
+    path = os.path.join(cache_dir, "target")
+    assert probe.exists(path, timeout=1.0) is False
+    start = time.time()
+    try:
+        probe.probe(slow_exists, path, timeout=0.2)
+    except probe.ProbeTimeout as ex:
+        assert ex.path == path
+    else:
+        raise AssertionError("slow_exists didn't time out")
+    assert time.time() - start < 1.0
+    # The mount is now known to be unreachable, so fail immediately:
+    start = time.time()
+    try:
+        probe.exists(path, timeout=1.0)
+    except probe.ProbeTimeout:
+        pass
+    else:
+        raise AssertionError("The negative cache wasn't used")
+    assert time.time() - start < 0.1
+    assert os.path.isfile(os.path.join(cache_dir, "unreachable.json"))
+
+
+def test_probe_timeout_and_negative_cache():
+    old_local = probe.LOCAL_FS_TYPES
+    # Probe in a thread even though the test directory is local:
+    probe.LOCAL_FS_TYPES = frozenset()
+    try:
+        with isolated_cache() as cache_dir:
+            check_probe_timeout_and_negative_cache(cache_dir)
+    finally:
+        probe.LOCAL_FS_TYPES = old_local
+
+
+def test_find_mount():
+    root, _ = probe.find_mount(os.path.realpath(__file__))
+    assert os.path.realpath(__file__).startswith(root)
+
+
+if __name__ == "__main__":
+    test_probe_timeout_and_negative_cache()
+    test_find_mount()
+    print("All tests passed.")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+'''
+Check that ShortcutRecord has the same values as a loaded BLink (See
+blnk/record.py).
+'''
+import os
+import sys
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+TEST_DATA_DIR = os.path.join(TESTS_DIR, "data")
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk import BLink  # noqa: E402
+from blnk.record import (  # noqa: E402
+    ShortcutRecord,
+    read_record,
+)
+
+
+def test_read_record():
+    for name in sorted(os.listdir(TEST_DATA_DIR)):
+        if not name.endswith(".blnk"):
+            continue
+        path = os.path.join(TEST_DATA_DIR, name)
+        record = read_record(path)
+        link = record.to_blink()
+        assert isinstance(link, BLink)
+        assert record == ShortcutRecord.from_blink(link), path
+        assert record.type == link.get("Type")
+    record = read_record(os.path.join(TEST_DATA_DIR, "comments.blnk"))
+    assert record.type == "Link"
+    assert record.target_key == "URL"
+    assert record.hostname == "example"
+    assert record.created is None
+    try:
+        record.name = "Changed"
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("A record was changed.")
+    assert not hasattr(record, "__dict__")
+    # Values set by analyze_target are datetime objects, not strings:
+    link = record.to_blink()
+    modified, created = BLink.get_target_times(os.stat(TEST_DATA_DIR))
+    link._set("X-Target Metadata", "modified", modified)
+    link._set("X-Target Metadata", "created", created)
+    record = ShortcutRecord.from_blink(link)
+    assert record.modified == str(modified)
+    assert record.created == str(created)
+
+
+if __name__ == "__main__":
+    test_read_record()
+    print("All tests passed.")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+'''
+Check that BLink.save only changes the lines whose values changed, and
+doesn't write a file that wouldn't change (See blnk.parsing.merge_text).
+'''
+import os
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk import BLink  # noqa: E402
+from blnk.parsing import merge_text  # noqa: E402
+
+ORIGINAL = ("Content-Type: text/blnk\r\n"
+            "# Made by hand\r\n"
+            "Type = File\r\n"
+            "Path =  /tmp/notes.txt\r\n"
+            "Name=Notes\r\n"
+            "Comment=Notes\r\n"
+            "NoDisplay=True\r\n"
+            "\r\n"
+            "[X-Target Metadata]\r\n"
+            "modified=1\r\n"
+            "created=2\r\n"
+            "\r\n"
+            "[X-Source Metadata]\r\n"
+            "hostname=pc\r\n")
+
+
+def test_merge_text():
+    tree = {
+        "X-Blnk": {"Type": "File", "Path": "/srv/notes.txt",
+                   "Name": "Notes", "Comment": "Notes",
+                   "NoDisplay": "True"},
+        "X-Target Metadata": {"modified": "1", "created": "2",
+                              "size": "5"},
+        "X-Source Metadata": {},
+        "X-Extra": {"a": "b"},
+    }
+    result = merge_text(ORIGINAL, tree)
+    assert result == ORIGINAL.replace(
+        "  /tmp/notes.txt", "  /srv/notes.txt"
+    ).replace(
+        "created=2\r\n", "created=2\r\nsize=5\r\n"
+    ).replace(
+        "hostname=pc\r\n", "\r\n[X-Extra]\r\na=b\r\n\r\n"
+    )
+    assert merge_text(ORIGINAL, {"X-Blnk": {}}).count("=") == 0
+
+
+def test_save_keeps_layout():
+    root = tempfile.mkdtemp()
+    try:
+        path = os.path.join(root, "notes.blnk")
+        with open(path, 'wb') as outs:
+            outs.write(ORIGINAL.encode("utf-8"))
+        link = BLink(path=path)
+        assert link.save(path, overwrite=True) == {}
+        with open(path, 'rb') as ins:
+            assert ins.read() == ORIGINAL.encode("utf-8")
+        os.utime(path, ns=(1000000000, 1000000000))
+        link._set("X-Target Metadata", "modified", "3")
+        link.save(path, overwrite=True)
+        with open(path, 'rb') as ins:
+            assert ins.read() == ORIGINAL.replace(
+                "modified=1", "modified=3").encode("utf-8")
+        mtime_ns = os.stat(path).st_mtime_ns
+        assert mtime_ns != 1000000000
+        # Saving again without a change doesn't write:
+        link.save(path, overwrite=True)
+        assert os.stat(path).st_mtime_ns == mtime_ns
+        assert [name for name in os.listdir(root)] == ["notes.blnk"]
+    finally:
+        shutil.rmtree(root)
+
+
+def test_save_through_symlink():
+    if not hasattr(os, "symlink"):
+        return
+    root = tempfile.mkdtemp()
+    try:
+        real = os.path.join(root, "real.blnk")
+        link_path = os.path.join(root, "link.blnk")
+        with open(real, 'wb') as outs:
+            outs.write(ORIGINAL.encode("utf-8"))
+        try:
+            os.symlink("real.blnk", link_path)
+        except OSError:
+            return  # such as on Windows without the privilege
+        link = BLink(path=link_path)
+        link._set("X-Target Metadata", "modified", "3")
+        link.save(link_path, overwrite=True)
+        assert os.path.islink(link_path)
+        assert os.readlink(link_path) == "real.blnk"
+        with open(real, 'rb') as ins:
+            assert ins.read() == ORIGINAL.replace(
+                "modified=1", "modified=3").encode("utf-8")
+        assert sorted(os.listdir(root)) == ["link.blnk", "real.blnk"]
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_merge_text()
+    test_save_keeps_layout()
+    test_save_through_symlink()
+    print("All tests passed.")
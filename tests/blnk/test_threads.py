@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+'''
+Check that shortcuts parsed and resolved by many threads at once get
+the same results as one at a time (See _init_lock in blnk).
+'''
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+
+from concurrent.futures import ThreadPoolExecutor
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+import blnk  # noqa: E402
+from blnk import (  # noqa: E402
+    BLink,
+    configure,
+    get_resolve_config,
+)
+
+COUNT = 2000
+JOBS = 16
+
+
+def make_shortcuts(root, base):
+    '''Write COUNT shortcuts in several layouts (legacy header and ':'
+    operator, comments, Windows paths in each case and some that don't
+    exist).
+    '''
+    paths = []
+    for i in range(COUNT):
+        folder = "Folder{}".format(i % 50)
+        os.makedirs(os.path.join(base, folder), exist_ok=True)
+        if i % 4 == 0:
+            text = ("Content-Type: text/blnk\n"
+                    "Type:Directory\n"
+                    "Name:Item {i}\n"
+                    "Exec:D:\\{folder}\n")
+        elif i % 4 == 1:
+            text = ("[X-Blnk]\n"
+                    "# Item {i}\n"
+                    "Type=Directory\n"
+                    "Name=Item {i}\n"
+                    "Exec=E:\\{lower}\n"
+                    "\n"
+                    "[X-Target Metadata]\n"
+                    "modified=2024-01-01 00:00:00+00:00\n")
+        elif i % 4 == 2:
+            text = ("[X-Blnk]\n"
+                    "Type=File\n"
+                    "Name=Item {i}\n"
+                    "Exec=F:\\missing{i}\\notes.txt\n")
+        else:
+            text = ("Content-Type: text/blnk\n"
+                    "Type=Link\n"
+                    "Name=Item {i}\n"
+                    "URL=https://example.com/{i}\n")
+        path = os.path.join(root, "item{}.blnk".format(i))
+        with open(path, 'w') as outs:
+            outs.write(text.format(i=i, folder=folder, lower=folder.lower()))
+        paths.append(path)
+    return paths
+
+
+def summarize(path):
+    link = BLink(path)
+    return (json.dumps(link.tree), link.assignmentOperator,
+            link.resolve_target())
+
+
+def reset_shared():
+    # Make the threads race to create these (See _init_lock):
+    blnk._path_rules = None
+    blnk._case_resolver = None
+
+
+def test_threads_match_serial():
+    if platform.system() == "Windows":
+        return
+    root = tempfile.mkdtemp()
+    old_config = get_resolve_config()
+    try:
+        base = os.path.join(root, "cloud")
+        paths = make_shortcuts(root, base)
+        configure(bases=[base], ignore_case=True)
+        # ^ ignore_case so E:\folder0 finds Folder0
+        reset_shared()
+        serial = [summarize(path) for path in paths]
+        assert serial[0][1] == ":"
+        assert serial[1][2] == ("Directory",
+                                os.path.join(base, "Folder1"))
+        values = ["D:\\Folder{}".format(i % 50) for i in range(COUNT)]
+        serial_many = BLink.resolve_many(values)
+        for _ in range(2):
+            reset_shared()
+            with ThreadPoolExecutor(max_workers=JOBS) as executor:
+                threaded = list(executor.map(summarize, paths))
+                chunks = [values[i:i+100] for i in range(0, COUNT, 100)]
+                threaded_many = []
+                for results in executor.map(BLink.resolve_many, chunks):
+                    threaded_many.extend(results)
+            assert threaded == serial
+            assert threaded_many == serial_many
+    finally:
+        configure(bases=old_config.bases,
+                  ignore_case=old_config.ignore_case)
+        reset_shared()
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_threads_match_serial()
+    print("All tests passed.")
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+'''
+Check that `blnk update` only rewrites shortcuts whose target changed
+(See blnk/update.py).
+'''
+import os
+import shutil
+import sys
+import tempfile
+
+TEST_MODULE_DIR = os.path.dirname(os.path.realpath(__file__))
+TESTS_DIR = os.path.dirname(TEST_MODULE_DIR)
+REPO_DIR = os.path.dirname(TESTS_DIR)
+
+if __name__ == "__main__":
+    sys.path.insert(0, REPO_DIR)
+
+from blnk.update import (  # noqa: E402
+    TargetStats,
+    iter_paths,
+    update_paths,
+)
+
+
+def run_update(root, dry_run=False):
+    stats = TargetStats()
+    paths = iter_paths([root], recursive=True,
+                       entry_map=stats.entries)
+    results = {os.path.basename(result["path"]): result["status"]
+               for result in update_paths(paths, jobs=2, stats=stats,
+                                          dry_run=dry_run)}
+    return results, stats
+
+
+def test_update_tree():
+    root = tempfile.mkdtemp()
+    try:
+        target = os.path.join(root, "notes.txt")
+        with open(target, 'w') as outs:
+            outs.write("notes\n")
+        for name in ("a.blnk", "b.blnk"):
+            with open(os.path.join(root, name), 'w') as outs:
+                outs.write("Content-Type: text/blnk\n"
+                           "Name=Notes\n"
+                           "Type=File\n"
+                           "Path={}\n".format(target))
+        with open(os.path.join(root, "link.blnk"), 'w') as outs:
+            outs.write("Content-Type: text/blnk\n"
+                       "Type=Link\n"
+                       "URL=https://example.com\n")
+        results, _ = run_update(root, dry_run=True)
+        assert results["a.blnk"] == "updated"
+        results, stats = run_update(root)
+        assert results == {"a.blnk": "updated", "b.blnk": "updated",
+                           "link.blnk": "skipped"}
+        # The target was in the tree, so its DirEntry was used:
+        assert stats.stats == 0
+        with open(os.path.join(root, "a.blnk"), 'r') as ins:
+            assert "modified=" in ins.read()
+        mtime_ns = os.stat(os.path.join(root, "a.blnk")).st_mtime_ns
+        results, _ = run_update(root)
+        assert results["a.blnk"] == "unchanged"
+        assert os.stat(os.path.join(root, "a.blnk")).st_mtime_ns == mtime_ns
+        os.utime(target, (1000000000, 1000000000))
+        results, _ = run_update(root)
+        assert results["a.blnk"] == "updated"
+    finally:
+        shutil.rmtree(root)
+
+
+def test_update_keeps_other_values():
+    root = tempfile.mkdtemp()
+    try:
+        folder = os.path.join(root, "Folder")
+        os.mkdir(folder)
+        document = os.path.join(root, "My notes.txt")
+        with open(document, 'w') as outs:
+            outs.write("notes\n")
+        originals = {
+            # A legacy shortcut (Exec rather than Path for a Directory):
+            "folder.blnk": ("Content-Type: text/blnk\n"
+                            "Name=Folder\n"
+                            "Type=Directory\n"
+                            "Exec={}\n"
+                            "Comment=Written by hand\n".format(folder)),
+            "notes.blnk": ("[X-Blnk]\n"
+                           "Type=File\n"
+                           "Path={}\n"
+                           "Comment=Also written by hand\n"
+                           "\n"
+                           "[X-Source Metadata]\n"
+                           "hostname=pc\n".format(document)),
+        }
+        for name, original in originals.items():
+            with open(os.path.join(root, name), 'w') as outs:
+                outs.write(original)
+        results, _ = run_update(root)
+        assert results == {"folder.blnk": "updated",
+                           "notes.blnk": "updated"}, results
+        for name, original in originals.items():
+            with open(os.path.join(root, name), 'r') as ins:
+                lines = ins.read().splitlines()
+            added = [line for line in lines if line
+                     and (line not in original.splitlines())]
+            # Only the times were added (and the section for them):
+            assert sorted(line.split("=")[0] for line in added) == \
+                ["[X-Target Metadata]", "created", "modified"], added
+            assert lines[:len(original.splitlines())] == \
+                original.splitlines(), lines
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    test_update_tree()
+    test_update_keeps_other_values()
+    print("All tests passed.")